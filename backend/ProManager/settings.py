@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -46,6 +47,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Lectures sur les répliques, sauf après une écriture du client (voir api/routage.py)
+    'api.routage.LectureApresEcritureMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -79,14 +82,107 @@ WSGI_APPLICATION = 'ProManager.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# https://docs.djangoproject.com/en/5.2/ref/databases/#sqlite-notes
+# Profil SQLite choisi par PROMANAGER_DB_PROFIL :
+# - 'simple' (par défaut) : configuration par défaut de Django (journal rollback,
+#   une connexion par requête). Pour le développement : db.sqlite3 est suivi par
+#   git, et le passage en WAL modifierait ce fichier et créerait -wal et -shm ;
+# - 'production' (PROMANAGER_DB_PROFIL=production en déploiement) : journal WAL (les lectures ne bloquent plus les
+#   écritures), attente du verrou jusqu'à SQLITE_TIMEOUT secondes au lieu de
+#   "database is locked", transactions ouvertes par BEGIN IMMEDIATE (le verrou
+#   d'écriture est pris au début : pas d'échec immédiat quand deux transactions
+#   veulent passer de la lecture à l'écriture) et connexions persistantes.
+# `manage.py bench_ecritures_sqlite` compare les deux.
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    # Sûr avec WAL : une coupure de courant peut perdre les dernières transactions, pas corrompre la base
+    'synchronous': 'NORMAL',
+    # En Kio quand la valeur est négative (64 Mo par connexion)
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+SQLITE_TIMEOUT = int(os.environ.get('PROMANAGER_DB_TIMEOUT', 20))
 
-DATABASES = {
-    'default': {
+DATABASE_PROFILS = {
+    'simple': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+    },
+    'production': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': int(os.environ.get('PROMANAGER_DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': SQLITE_TIMEOUT,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': ';'.join(f'PRAGMA {nom}={valeur}' for nom, valeur in SQLITE_PRAGMAS.items()),
+        },
+    },
+}
+
+DATABASES = {
+    'default': DATABASE_PROFILS[os.environ.get('PROMANAGER_DB_PROFIL', 'simple')],
+}
+
+# Répliques en lecture (voir api/routage.py) : chemins de copies de la base,
+# séparés par des virgules, tenues à jour par `manage.py synchroniser_repliques`.
+# Même profil que la base principale, en lecture seule.
+DATABASE_REPLIQUES = []
+for numero, chemin in enumerate(filter(None, os.environ.get('PROMANAGER_DB_REPLIQUES', '').split(',')), 1):
+    options = DATABASES['default'].get('OPTIONS', {})
+    DATABASES[f'replique_{numero}'] = {
+        **DATABASES['default'],
+        'NAME': chemin.strip(),
+        'OPTIONS': {**options, 'init_command': ';'.join(filter(None, [options.get('init_command'), 'PRAGMA query_only=ON']))},
+        # Pendant les tests, les répliques sont la base de test principale
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_REPLIQUES.append(f'replique_{numero}')
+
+DATABASE_ROUTERS = ['api.routage.RouteurLectureEcriture']
+# Durée (s) pendant laquelle un client lit sur la base principale après une
+# écriture : doit couvrir le retard des répliques (intervalle de synchronisation)
+REPLIQUES_DELAI = int(os.environ.get('PROMANAGER_DB_REPLIQUES_DELAI', 10))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Mémoire locale par défaut ; PROMANAGER_CACHE=file ou db pour partager le cache
+# entre plusieurs processus (la table du cache DB se crée avec `manage.py createcachetable`).
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('PROMANAGER_CACHE_LOCATION', BASE_DIR / 'cache'),
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': os.environ.get('PROMANAGER_CACHE_LOCATION', 'cache_table'),
+    },
+}
+
+CACHES = {
+    'default': CACHE_BACKENDS[os.environ.get('PROMANAGER_CACHE', 'locmem')],
 }
 
+# Cache des réponses des tableaux de bord (alias dans CACHES et durée en secondes)
+DASHBOARD_CACHE_ALIAS = 'default'
+DASHBOARD_CACHE_TIMEOUT = 300
+# Vues /api/dashboard/async/ : requêtes indépendantes en parallèle, une connexion par thread
+DASHBOARD_PARALLELE = True
+
+# Durée de conservation en cache des projets visibles par chaque membre (0 : recalcul à chaque requête)
+VISIBILITE_CACHE_TIMEOUT = 300
+
+# Durée de conservation en cache de l'utilisateur authentifié et de son profil Membre (0 : relus à chaque requête)
+AUTH_CACHE_TIMEOUT = 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -133,16 +229,66 @@ from datetime import timedelta
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+        'api.authentification.MembreJWTAuthentication',
+    ),
+    # Toutes les listes sont paginées par curseur (?page_size= pour changer la taille d'une page)
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.CurseurPagination',
+    'PAGE_SIZE': 100,
+    # Encode avec orjson s'il est installé (mêmes octets que JSONRenderer)
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.RapideJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
+# Taille maximale d'une page demandée avec ?page_size=
+API_MAX_PAGE_SIZE = 500
+
+# Longueur maximale (en jours) de la fenêtre de /api/taches/calendrier/
+CALENDRIER_MAX_JOURS = 366
+
+# Nombre maximal d'éléments par requête des opérations en masse sur les tâches
+TACHES_MAX_PAR_LOT = 500
+
+# Nombre de lignes lues par requête SQL pendant un export en flux (?type=csv|ndjson)
+EXPORT_CHUNK_SIZE = 2000
+
+# Nombre de lignes insérées par transaction lors d'un import (/import/ ou importer_donnees)
+IMPORT_TAILLE_LOT = 1000
+
+# Synchronisation incrémentale des listes (?since=<curseur>) : recouvrement du
+# curseur (écritures validées pendant une lecture), rétention des suppressions
+# et nombre maximal d'objets modifiés renvoyés (au-delà : 410, liste complète)
+SYNC_MARGE_SECONDES = 2
+SYNC_RETENTION_JOURS = 30
+SYNC_MAX_CHANGEMENTS = 1000
+
+# Événements en temps réel (/api/evenements/, voir api/evenements.py) : diffusion
+# utilisée (à remplacer par un bus partagé avec plusieurs processus), durée de
+# validité des liens signés, intervalle de maintien de la connexion et nombre
+# d'événements en attente par connexion
+EVENEMENTS_BACKEND = 'api.evenements.DiffusionLocale'
+EVENEMENTS_LIEN_DUREE = 60
+EVENEMENTS_PING_SECONDES = 15
+EVENEMENTS_TAILLE_FILE = 1000
+
+# Téléversement en plusieurs parties (/api/televersements/) : taille des parties
+# et taille maximale d'un fichier, en octets
+TELEVERSEMENT_TAILLE_PART = 8 * 1024 * 1024
+TELEVERSEMENT_TAILLE_MAX = 20 * 1024 ** 3
+# Parties reçues, avant assemblage (un sous-dossier par téléversement)
+TELEVERSEMENTS_ROOT = BASE_DIR / 'televersements'
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
 
 CORS_ALLOW_ALL_ORIGINS = True  # Pour les tests locaux
+# Empreinte SHA-256 des parties envoyées à /api/televersements/<id>/parts/<n>/
+CORS_ALLOW_HEADERS = (*default_headers, 'x-sha256')
+# Curseur de synchronisation incrémentale, lu par le frontend
+CORS_EXPOSE_HEADERS = ['X-Curseur-Synchro']
 
 # CORS_ALLOWED_ORIGINS = [
 #     "http://localhost:5173",
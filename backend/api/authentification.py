@@ -0,0 +1,146 @@
+"""
+Authentification JWT qui charge l'utilisateur et son profil Membre ensemble.
+
+Les permissions et les vues lisent `request.user.membre_profile` plusieurs fois
+par requête : l'utilisateur est chargé avec `select_related('membre_profile')`
+(une seule requête), puis conservé quelques secondes dans le cache. Les signaux
+de User et de Membre retirent l'entrée du cache dès qu'ils changent (rôle,
+archivage, mot de passe...).
+
+Les jetons portent aussi le rôle, l'id du membre, son état actif et la version
+de ses jetons (claims 'role', 'membre_id', 'is_active', 'version') : les
+permissions décident à partir du jeton, et un jeton dont la version n'est plus
+celle du membre (voir revoquer_jetons()) est refusé. La version courante est
+lue dans le cache, sans requête, et relue en base après AUTH_CACHE_TIMEOUT
+secondes : c'est le délai maximal de prise en compte d'une révocation par les
+autres processus quand le cache n'est pas partagé (PROMANAGER_CACHE=locmem).
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache_dashboard import get_cache
+from .models import Membre
+
+
+def _cle(user_id):
+    return f'auth:utilisateur:{user_id}'
+
+
+def charger_utilisateur(user_id):
+    """
+    Utilisateur (avec son profil Membre déjà chargé) ou None, lu dans le cache si possible.
+    Le hash du mot de passe n'est pas chargé, donc jamais mis en cache : il est
+    relu en base si on y accède (check_password(), CHECK_REVOKE_TOKEN).
+    Lu sur la base principale : une réplique en retard ferait garder en cache
+    un utilisateur désactivé depuis.
+    """
+    timeout = getattr(settings, 'AUTH_CACHE_TIMEOUT', 60)
+    if timeout:
+        user = get_cache().get(_cle(user_id))
+        if user is not None:
+            return user
+    user = get_user_model().objects.using(DEFAULT_DB_ALIAS).select_related('membre_profile').defer('password').filter(
+        **{api_settings.USER_ID_FIELD: user_id}
+    ).first()
+    if user is not None and timeout:
+        get_cache().set(_cle(user_id), user, timeout)
+    return user
+
+
+def oublier_utilisateur(user_id):
+    """Retire un utilisateur du cache d'authentification."""
+    get_cache().delete(_cle(user_id))
+
+
+def _cle_version(membre_id):
+    return f'auth:version_jetons:{membre_id}'
+
+
+def version_jetons(membre_id):
+    """
+    Version courante des jetons d'un membre (None si le membre n'existe plus),
+    lue sur la base principale (pas sur une réplique qui ignorerait encore une
+    révocation) et gardée AUTH_CACHE_TIMEOUT secondes.
+    """
+    timeout = getattr(settings, 'AUTH_CACHE_TIMEOUT', 60)
+    version = get_cache().get(_cle_version(membre_id)) if timeout else None
+    if version is None:
+        version = Membre.objects.using(DEFAULT_DB_ALIAS).filter(pk=membre_id).values_list('version_jetons', flat=True).first()
+        if version is not None and timeout:
+            get_cache().set(_cle_version(membre_id), version, timeout)
+    return version
+
+
+def revoquer_jetons(membre):
+    """Invalide tous les jetons déjà émis pour le membre (ils portent l'ancienne version)."""
+    Membre.objects.filter(pk=membre.pk).update(version_jetons=F('version_jetons') + 1)
+    membre.refresh_from_db(fields=['version_jetons'])
+    timeout = getattr(settings, 'AUTH_CACHE_TIMEOUT', 60)
+    if timeout:
+        get_cache().set(_cle_version(membre.pk), membre.version_jetons, timeout)
+    else:
+        get_cache().delete(_cle_version(membre.pk))
+    oublier_utilisateur(membre.user_id)
+
+
+def claims_membre(membre):
+    """Claims ajoutés aux jetons émis pour un membre."""
+    return {
+        'membre_id': membre.id,
+        'role': membre.role,
+        'is_active': membre.is_active,
+        'version': membre.version_jetons,
+    }
+
+
+def role_demandeur(request):
+    """
+    Rôle de l'utilisateur de la requête : lu dans le jeton s'il porte les claims
+    (sans requête), sinon dans le profil Membre. None si le membre est archivé
+    d'après le jeton ou si l'utilisateur n'a pas de profil.
+    """
+    jeton = request.auth
+    if jeton is not None and hasattr(jeton, 'get') and jeton.get('role') is not None:
+        return jeton['role'] if jeton.get('is_active', True) else None
+    try:
+        return request.user.membre_profile.role
+    except Exception:
+        return None
+
+
+class MembreJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication dont l'utilisateur arrive avec son profil Membre, en une requête ou aucune."""
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        membre_id = validated_token.get('membre_id')
+        if membre_id is not None and validated_token.get('version') != version_jetons(membre_id):
+            raise AuthenticationFailed('Jeton révoqué', code='token_revoked')
+        return validated_token
+
+    def get_user(self, validated_token):
+        # Mêmes contrôles que JWTAuthentication.get_user, avec charger_utilisateur()
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        user = charger_utilisateur(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
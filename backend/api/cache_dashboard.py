@@ -0,0 +1,135 @@
+"""
+Cache des réponses des tableaux de bord.
+
+Chaque réponse est stockée sous une clé construite à partir des "versions" des
+portées dont elle dépend ('global', 'projet:<id>', 'membre:<id>'). Les signaux
+(voir signals.py) remplacent la version d'une portée quand ses données changent :
+les anciennes entrées ne sont alors plus jamais lues et expirent d'elles-mêmes.
+La clé sert aussi d'ETag, ce qui permet de répondre 304 sans rien sérialiser,
+sauf pour une réponse calculée sur une réplique en lecture (voir routage.py).
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .routage import lit_sur_replique
+
+
+# Réponse calculée sur une réplique (voir enregistrer())
+EN_TETES_REPLIQUE = {'Cache-Control': 'private, no-store'}
+
+
+def get_cache():
+    return caches[getattr(settings, 'DASHBOARD_CACHE_ALIAS', 'default')]
+
+
+def _cle_version(portee):
+    return f'dashboard:version:{portee}'
+
+
+def invalider(*portees):
+    """Change la version des portées données, rendant obsolètes les réponses qui en dépendent."""
+    if portees:
+        get_cache().set_many({_cle_version(portee): uuid.uuid4().hex for portee in set(portees)}, timeout=None)
+
+
+def versions(portees):
+    """Versions courantes des portées ; une version absente (jamais créée ou évincée) est créée."""
+    cles = {portee: _cle_version(portee) for portee in portees}
+    trouvees = get_cache().get_many(cles.values())
+    manquantes = {cle: uuid.uuid4().hex for cle in cles.values() if cle not in trouvees}
+    if manquantes:
+        get_cache().set_many(manquantes, timeout=None)
+        trouvees.update(manquantes)
+    return [trouvees[cles[portee]] for portee in portees]
+
+
+def erreur_calcul(exc):
+    return Response(
+        {'error': f'Erreur lors de la récupération des données: {exc}'},
+        status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+    )
+
+
+class DashboardCacheMixin:
+    """
+    Met en cache la réponse des vues de tableau de bord.
+
+    Les sous-classes implémentent `portees_cache(request)`, qui retourne la
+    liste des portées dont dépend la réponse (None pour ne pas utiliser le
+    cache), et le calcul en deux temps : `parties(request)` retourne les
+    calculs indépendants les uns des autres ({nom: fonction sans argument}, ou
+    une Response à renvoyer telle quelle), puis `assembler(resultats)` construit
+    les données de la réponse. Les vues synchrones exécutent les parties l'une
+    après l'autre ; dashboard_async.py les exécute en même temps.
+    """
+
+    def portees_cache(self, request):
+        raise NotImplementedError
+
+    def parties(self, request):
+        raise NotImplementedError
+
+    def assembler(self, resultats):
+        raise NotImplementedError
+
+    def calculer(self, request):
+        try:
+            parties = self.parties(request)
+            if isinstance(parties, Response):
+                return parties
+            return Response(self.assembler({nom: partie() for nom, partie in parties.items()}))
+        except Exception as e:
+            return erreur_calcul(e)
+
+    def lire_cache(self, request):
+        """
+        (réponse, None) si la réponse est connue (304 ou lue dans le cache),
+        sinon (None, contexte) à passer à enregistrer() avec la réponse calculée.
+        """
+        portees = self.portees_cache(request)
+        if portees is None:
+            return None, None
+
+        # Les tâches en retard et à venir dépendent aussi de la date du jour
+        empreinte = hashlib.sha1('|'.join(
+            [type(self).__name__, str(timezone.now().date())] + portees + versions(portees)
+        ).encode()).hexdigest()
+        etag = f'"{empreinte}"'
+        en_tetes = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+
+        if etag in [valeur.strip() for valeur in request.headers.get('If-None-Match', '').split(',')]:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=en_tetes), None
+
+        cle = f'dashboard:reponse:{empreinte}'
+        entree = get_cache().get(cle)
+        if entree is not None:
+            data, sur_replique = entree
+            return Response(data, headers=EN_TETES_REPLIQUE if sur_replique else en_tetes), None
+        return None, (cle, en_tetes)
+
+    def enregistrer(self, contexte, response):
+        """Met en cache la réponse calculée (sauf erreur) et la retourne avec ses en-têtes."""
+        if contexte is None or response.status_code != status.HTTP_200_OK:
+            return response
+        cle, en_tetes = contexte
+        timeout = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300)
+        sur_replique = lit_sur_replique()
+        if sur_replique:
+            # Calculée sur une réplique qui a peut-être du retard sur la version
+            # de l'ETag : ni ETag (un 304 la figerait), ni cache navigateur
+            timeout = min(timeout, getattr(settings, 'REPLIQUES_DELAI', 10))
+            en_tetes = EN_TETES_REPLIQUE
+        get_cache().set(cle, (response.data, sur_replique), timeout)
+        return Response(response.data, headers=en_tetes)
+
+    def get(self, request):
+        response, contexte = self.lire_cache(request)
+        if response is None:
+            response = self.enregistrer(contexte, self.calculer(request))
+        return response
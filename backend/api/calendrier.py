@@ -0,0 +1,87 @@
+"""
+Flux du calendrier : tâches et projets dont l'intervalle [date_debut, date_fin]
+recoupe une fenêtre demandée (`?debut=AAAA-MM-JJ&fin=AAAA-MM-JJ`).
+
+Le recoupement s'écrit `date_debut <= fin AND date_fin >= debut`, deux bornes
+indexées, et la réponse est compacte : une ligne par tâche ou projet (values(),
+sans serializer) et, par jour, les ids des tâches qui arrivent à échéance.
+"""
+from collections import defaultdict
+from datetime import date
+
+from django.conf import settings
+
+# Colonnes lues pour une tâche du calendrier (clé de réponse -> chemin en base)
+CHAMPS_TACHE = {
+    'id': 'id',
+    'nom': 'nom',
+    'statut': 'statut',
+    'priorite': 'priorite',
+    'date_debut': 'date_debut',
+    'date_fin': 'date_fin',
+    'projet': 'projet_id',
+    'projet_nom': 'projet__nom',
+    'assignee': 'assignee_id',
+    'assignee_nom': 'assignee__nom',
+}
+CHAMPS_PROJET = ('id', 'nom', 'statut', 'date_debut', 'date_fin')
+
+
+def lire_fenetre(params):
+    """
+    (debut, fin, projet_id) lus dans les paramètres de requête, projet_id
+    valant None s'il n'est pas donné. Lève ValueError avec un message lisible
+    si une borne manque, est mal formée, si la fenêtre est inversée ou plus
+    longue que CALENDRIER_MAX_JOURS, ou si projet_id n'est pas un entier.
+    """
+    bornes = []
+    for nom in ('debut', 'fin'):
+        valeur = params.get(nom)
+        if not valeur:
+            raise ValueError(f'{nom} requis (AAAA-MM-JJ)')
+        try:
+            bornes.append(date.fromisoformat(valeur))
+        except ValueError:
+            raise ValueError(f'{nom} invalide (AAAA-MM-JJ attendu)')
+    debut, fin = bornes
+    if fin < debut:
+        raise ValueError('fin doit être postérieure ou égale à debut')
+    max_jours = getattr(settings, 'CALENDRIER_MAX_JOURS', 366)
+    if (fin - debut).days + 1 > max_jours:
+        raise ValueError(f'La fenêtre ne peut pas dépasser {max_jours} jours')
+    projet_id = params.get('projet_id')
+    if projet_id == '':
+        projet_id = None
+    if projet_id is not None:
+        try:
+            projet_id = int(projet_id)
+        except ValueError:
+            raise ValueError('projet_id invalide (entier attendu)')
+    return debut, fin, projet_id
+
+
+def recoupe(queryset, debut, fin):
+    """Objets dont l'intervalle [date_debut, date_fin] recoupe [debut, fin]."""
+    return queryset.filter(date_debut__lte=fin, date_fin__gte=debut)
+
+
+def flux_calendrier(taches, projets, debut, fin):
+    """
+    Réponse du calendrier pour des querysets de tâches et de projets déjà
+    restreints aux projets visibles : deux requêtes, quelle que soit la fenêtre.
+    """
+    lignes_taches = [
+        {cle: ligne[chemin] for cle, chemin in CHAMPS_TACHE.items()}
+        for ligne in recoupe(taches, debut, fin).order_by('date_fin', 'id').values(*CHAMPS_TACHE.values())
+    ]
+    jours = defaultdict(list)
+    for tache in lignes_taches:
+        if debut <= tache['date_fin'] <= fin:
+            jours[tache['date_fin'].isoformat()].append(tache['id'])
+    return {
+        'debut': debut,
+        'fin': fin,
+        'taches': lignes_taches,
+        'projets': list(recoupe(projets, debut, fin).order_by('date_debut', 'id').values(*CHAMPS_PROJET)),
+        'jours': dict(jours),
+    }
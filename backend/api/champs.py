@@ -0,0 +1,86 @@
+"""
+Champs clairsemés : `?fields=a,b,c` ne sérialise que les champs nommés et
+`?omit=a,b` retire des champs. Côté base, le queryset est restreint avec
+only() / select_related() / prefetch_related() aux colonnes qu'il faut lire
+pour produire ces champs.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+def _noms(request, parametre):
+    valeur = request.query_params.get(parametre)
+    if not valeur:
+        return None
+    return {nom.strip() for nom in valeur.split(',') if nom.strip()}
+
+
+def champs_demandes(request):
+    """(champs à garder ou None, champs à retirer ou None) pour une requête GET."""
+    if request is None or request.method != 'GET':
+        return None, None
+    return _noms(request, 'fields'), _noms(request, 'omit')
+
+
+class ChampsDynamiquesMixin:
+    """Retire du serializer les champs exclus par ?fields= / ?omit= (lectures uniquement)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        garder, retirer = champs_demandes(self.context.get('request'))
+        if garder is None and retirer is None:
+            return
+        for nom in list(self.fields):
+            if (garder is not None and nom not in garder) or (retirer is not None and nom in retirer):
+                self.fields.pop(nom)
+
+
+def restreindre_queryset(queryset, champs):
+    """
+    Limite les colonnes chargées aux sources des champs de serializer donnés.
+    Si l'une des sources ne correspond pas à un chemin de champs du modèle
+    (méthode, serializer imbriqué...), le queryset est retourné inchangé.
+    """
+    modele = queryset.model
+    only = {modele._meta.pk.name}
+    select_related, prefetch_related = set(), set()
+    for champ in champs.values():
+        if champ.source == '*' or isinstance(champ, serializers.BaseSerializer):
+            return queryset
+        attributs = champ.source.split('.')
+        courant = modele
+        for position, attribut in enumerate(attributs):
+            try:
+                champ_modele = courant._meta.get_field(attribut)
+            except FieldDoesNotExist:
+                return queryset
+            chemin = '__'.join(attributs[:position + 1])
+            if champ_modele.many_to_many or champ_modele.one_to_many:
+                if position != 0 or len(attributs) != 1:
+                    return queryset
+                prefetch_related.add(chemin)
+                break
+            if position < len(attributs) - 1:
+                if not champ_modele.is_relation:
+                    return queryset
+                # Relation traversée : jointure, en gardant la clé étrangère elle-même
+                select_related.add(chemin)
+                courant = champ_modele.related_model
+            only.add(chemin)
+    queryset = queryset.only(*only)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset
+
+
+class ChampsClairsemesMixin:
+    """Pour un viewset : applique ?fields= / ?omit= à la réponse et aux colonnes lues en base."""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        garder, retirer = champs_demandes(self.request)
+        if garder is not None or retirer is not None:
+            queryset = restreindre_queryset(queryset, self.get_serializer().fields)
+        return queryset
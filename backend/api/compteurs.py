@@ -0,0 +1,162 @@
+"""
+Compteurs de tâches matérialisés par projet et par membre.
+
+Les lignes de StatistiquesProjet / StatistiquesMembre sont mises à jour de façon
+incrémentale par les signaux de Tache (voir signals.py), créées à la première
+lecture si elles manquent, et le nombre de tâches en retard (qui dépend de la
+date du jour) est recalculé à la lecture quand il date d'un jour précédent.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Membre, Projet, StatistiquesMembre, StatistiquesProjet, Tache
+from .stats import STATUTS_TACHE, agregats_taches
+
+CHAMPS_COMPTEURS = ('taches_total', *STATUTS_TACHE, 'taches_retard')
+CHAMP_PAR_STATUT = {statut: champ for champ, statut in STATUTS_TACHE.items()}
+
+# (modèle de statistiques, modèle source, champ de Tache qui le référence)
+CIBLES = (
+    (StatistiquesProjet, Projet, 'projet_id'),
+    (StatistiquesMembre, Membre, 'assignee_id'),
+)
+
+
+def _contribution(statut, date_fin, today):
+    """Compteurs auxquels contribue une tâche dans l'état donné."""
+    contribution = Counter(taches_total=1)
+    if statut in CHAMP_PAR_STATUT:
+        contribution[CHAMP_PAR_STATUT[statut]] += 1
+    if date_fin is not None and date_fin < today and statut != 'Terminé':
+        contribution['taches_retard'] += 1
+    return contribution
+
+
+def appliquer_changement(avant, apres, today=None, ignorer_projet=False):
+    """
+    Répercute sur les compteurs le passage d'une tâche de l'état `avant` à l'état
+    `apres` (tuples de Tache.etat_statistiques(), None pour une création ou une
+    suppression). Les lignes absentes sont ignorées : elles seront calculées à la
+    première lecture.
+    """
+    appliquer_changements([(avant, apres)], today, ignorer_projet)
+
+
+def appliquer_changements(changements, today=None, ignorer_projet=False):
+    """
+    Comme appliquer_changement() pour une liste de paires (avant, apres) : les
+    deltas sont cumulés, puis une seule mise à jour est faite par ligne touchée.
+    """
+    if today is None:
+        today = timezone.now().date()
+    deltas = defaultdict(Counter)
+    for avant, apres in changements:
+        for etat, signe in ((avant, -1), (apres, 1)):
+            if etat is None:
+                continue
+            projet_id, assignee_id, statut, date_fin = etat
+            contribution = _contribution(statut, date_fin, today)
+            cibles = []
+            if not ignorer_projet:
+                cibles.append((StatistiquesProjet, projet_id))
+            if assignee_id is not None:
+                cibles.append((StatistiquesMembre, assignee_id))
+            for cible in cibles:
+                for champ, valeur in contribution.items():
+                    deltas[cible][champ] += signe * valeur
+
+    for (modele, pk), delta in deltas.items():
+        modifications = {champ: F(champ) + valeur for champ, valeur in delta.items() if valeur}
+        if modifications:
+            modele.objects.filter(pk=pk).update(**modifications)
+
+
+def _calculer(champ_tache, ids, today, agregats=None):
+    """Compteurs recalculés depuis Tache, groupés par `champ_tache` (une requête)."""
+    taches = Tache.objects.order_by()
+    if ids is not None:
+        taches = taches.filter(**{f'{champ_tache}__in': ids})
+    else:
+        taches = taches.filter(**{f'{champ_tache}__isnull': False})
+    lignes = taches.values(champ_tache).annotate(**(agregats or agregats_taches(today)))
+    return {ligne.pop(champ_tache): ligne for ligne in lignes}
+
+
+def _assurer_lignes(modele, source, champ_tache, ids, today):
+    """Crée les lignes manquantes et rafraîchit le retard des lignes calculées avant aujourd'hui."""
+    manquants = source.objects.filter(statistiques__isnull=True)
+    lignes = modele.objects.all()
+    if ids is not None:
+        manquants = manquants.filter(id__in=ids)
+        lignes = lignes.filter(pk__in=ids)
+
+    manquants = list(manquants.values_list('id', flat=True))
+    if manquants:
+        calcules = _calculer(champ_tache, manquants, today)
+        modele.objects.bulk_create(
+            [modele(pk=pk, retard_calcule_le=today, **calcules.get(pk, {})) for pk in manquants],
+            ignore_conflicts=True,
+        )
+
+    perimes = list(lignes.filter(retard_calcule_le__lt=today))
+    if perimes:
+        agregats = {'taches_retard': agregats_taches(today)['taches_retard']}
+        calcules = _calculer(champ_tache, [ligne.pk for ligne in perimes], today, agregats)
+        for ligne in perimes:
+            ligne.taches_retard = calcules.get(ligne.pk, {}).get('taches_retard', 0)
+            ligne.retard_calcule_le = today
+        modele.objects.bulk_update(perimes, ['taches_retard', 'retard_calcule_le'])
+    return lignes
+
+
+def statistiques_projets(projets_ids=None, today=None):
+    """Compteurs cumulés des projets donnés (de tous les projets si `projets_ids` est None)."""
+    if today is None:
+        today = timezone.now().date()
+    lignes = _assurer_lignes(StatistiquesProjet, Projet, 'projet_id', projets_ids, today)
+    totaux = lignes.aggregate(**{champ: Sum(champ) for champ in CHAMPS_COMPTEURS})
+    return {champ: totaux[champ] or 0 for champ in CHAMPS_COMPTEURS}
+
+
+def statistiques_membre(membre_id, today=None):
+    """Compteurs des tâches assignées à un membre."""
+    if today is None:
+        today = timezone.now().date()
+    lignes = _assurer_lignes(StatistiquesMembre, Membre, 'assignee_id', [membre_id], today)
+    return lignes.values(*CHAMPS_COMPTEURS).get()
+
+
+def recalculer_statistiques(corriger=True, today=None):
+    """
+    Recalcule tous les compteurs depuis la table des tâches et retourne, pour
+    chaque modèle de statistiques, le nombre de lignes existantes qui divergeaient.
+    Si `corriger` est vrai, les lignes sont remplacées par les valeurs recalculées.
+    """
+    if today is None:
+        today = timezone.now().date()
+    ecarts = {}
+    with transaction.atomic():
+        for modele, source, champ_tache in CIBLES:
+            calcules = _calculer(champ_tache, None, today)
+            attendus = {
+                pk: {champ: calcules.get(pk, {}).get(champ, 0) for champ in CHAMPS_COMPTEURS}
+                for pk in source.objects.values_list('id', flat=True)
+            }
+            ecarts[modele.__name__] = 0
+            for ligne in modele.objects.values('pk', 'retard_calcule_le', *CHAMPS_COMPTEURS):
+                attendu = dict(attendus.get(ligne['pk'], {}))
+                if ligne['retard_calcule_le'] < today:
+                    # Un retard calculé un jour précédent n'est pas une divergence
+                    attendu['taches_retard'] = ligne['taches_retard']
+                if attendu != {champ: ligne[champ] for champ in CHAMPS_COMPTEURS}:
+                    ecarts[modele.__name__] += 1
+            if corriger:
+                modele.objects.all().delete()
+                modele.objects.bulk_create(
+                    [modele(pk=pk, retard_calcule_le=today, **valeurs) for pk, valeurs in attendus.items()],
+                    batch_size=1000,
+                )
+    return ecarts
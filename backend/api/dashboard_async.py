@@ -0,0 +1,83 @@
+"""
+Versions asynchrones des tableaux de bord : `GET /api/dashboard/async/{stats,chef,membre}/`.
+
+Mêmes réponses, même cache et mêmes ETag que les vues synchrones (voir
+cache_dashboard.py), mais les parties indépendantes du calcul (`parties()` de
+chaque vue) sont lancées en même temps, chacune dans un thread du pool avec sa
+propre connexion à la base : la durée d'un tableau de bord est celle de sa
+requête la plus longue au lieu de la somme de toutes. Sous ASGI, la vue ne tient
+pas de thread pendant l'attente ; sous WSGI elle fonctionne aussi, Django
+l'exécutant dans une boucle propre à la requête.
+
+Avec DASHBOARD_PARALLELE = False, les parties s'exécutent l'une après l'autre
+dans le thread des vues synchrones. C'est nécessaire dans une transaction non
+validée (les tests par exemple), que les autres connexions ne voient pas.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework.response import Response
+
+from .cache_dashboard import erreur_calcul
+from .views import ChefDashboardStatsView, DashboardStatsView, MembreDashboardStatsView
+
+
+def _dans_son_thread(partie):
+    def executer():
+        try:
+            return partie()
+        finally:
+            # Connexion propre à ce thread : fermée comme en fin de requête (selon CONN_MAX_AGE)
+            close_old_connections()
+    return executer
+
+
+async def executer_parties(parties):
+    """Résultats des parties ({nom: fonction}), calculées en même temps."""
+    if getattr(settings, 'DASHBOARD_PARALLELE', True):
+        appels = [sync_to_async(_dans_son_thread(partie), thread_sensitive=False)() for partie in parties.values()]
+    else:
+        appels = [sync_to_async(partie)() for partie in parties.values()]
+    return dict(zip(parties, await asyncio.gather(*appels)))
+
+
+async def calculer(vue, request):
+    try:
+        parties = await sync_to_async(vue.parties)(request)
+        if isinstance(parties, Response):
+            return parties
+        return Response(vue.assembler(await executer_parties(parties)))
+    except Exception as e:
+        return erreur_calcul(e)
+
+
+async def servir(request, classe):
+    """Traite la requête comme APIView.dispatch (authentification, permissions, cache), le calcul en parallèle."""
+    vue = classe()
+    vue.args, vue.kwargs = (), {}
+    vue.request = request = vue.initialize_request(request)
+    vue.headers = vue.default_response_headers
+    try:
+        await sync_to_async(vue.initial)(request)
+        if request.method != 'GET':
+            vue.http_method_not_allowed(request)
+        response, contexte = await sync_to_async(vue.lire_cache)(request)
+        if response is None:
+            response = await sync_to_async(vue.enregistrer)(contexte, await calculer(vue, request))
+    except Exception as exc:
+        response = vue.handle_exception(exc)
+    return vue.finalize_response(request, response)
+
+
+async def dashboard_stats(request):
+    return await servir(request, DashboardStatsView)
+
+
+async def dashboard_chef(request):
+    return await servir(request, ChefDashboardStatsView)
+
+
+async def dashboard_membre(request):
+    return await servir(request, MembreDashboardStatsView)
@@ -0,0 +1,181 @@
+"""
+Diffusion en temps réel des changements par projet (Server-Sent Events).
+
+Les signaux (et les écritures en masse, qui n'en émettent pas) publient, une
+fois la transaction validée, un événement par changement :
+
+    {"type": "tache" | "commentaire" | "fichier" | "membres" | "projet",
+     "action": "modifie" | "supprime" | "ajoute" | "retire" | "cree",
+     "projet": <id du projet>, "ids": [ids concernés]}
+
+(pour "membres" et "projet", `ids` sont des ids de membres). Le client se
+connecte une fois à `GET /api/evenements/?jeton=...` (lien signé donné par
+`GET /api/evenements/lien/`, EventSource ne pouvant pas envoyer d'en-tête
+Authorization) et ne reçoit que les événements des projets qu'il voit, avec
+les règles de visibilite.py. Il lit ensuite les changements par ?since= (voir
+synchro.py) au lieu d'interroger les listes à intervalles réguliers.
+
+Le flux est une vue asynchrone : elle ne tient pas de thread et ne fonctionne
+que sous ASGI (ProManager.asgi, par ex. `uvicorn ProManager.asgi:application`),
+qui peut servir toute l'API : les exports et téléchargements y sont envoyés en
+flux (voir flux_asgi.py). Sous WSGI, elle répond 501 et le client n'insiste pas.
+La diffusion par défaut (DiffusionLocale) reste dans le processus ; avec
+plusieurs processus, EVENEMENTS_BACKEND désigne une classe qui fournit les
+mêmes méthodes publier() et abonnement() sur un bus partagé.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+SEL_LIEN = 'api.evenements'
+# Placé dans la file d'un abonné trop lent dont des événements ont été perdus
+DEBORDEMENT = object()
+
+
+class Abonne:
+    """File d'événements d'une connexion, alimentée depuis n'importe quel thread."""
+
+    def __init__(self, boucle, taille):
+        self.boucle = boucle
+        self.file = asyncio.Queue(maxsize=taille)
+
+    def recevoir(self, evenement):
+        try:
+            self.boucle.call_soon_threadsafe(self._deposer, evenement)
+        except RuntimeError:
+            # Boucle déjà fermée : la connexion se termine
+            pass
+
+    def _deposer(self, evenement):
+        try:
+            self.file.put_nowait(evenement)
+        except asyncio.QueueFull:
+            # Le client devra tout resynchroniser : inutile de garder la suite
+            while not self.file.empty():
+                self.file.get_nowait()
+            self.file.put_nowait(DEBORDEMENT)
+
+    async def suivant(self, timeout):
+        """Prochain événement, DEBORDEMENT, ou None après `timeout` secondes sans événement."""
+        try:
+            return await asyncio.wait_for(self.file.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class DiffusionLocale:
+    """Diffusion dans le processus courant : chaque événement est remis à tous les abonnés."""
+
+    def __init__(self):
+        self._abonnes = set()
+        self._verrou = threading.Lock()
+
+    def publier(self, evenement):
+        with self._verrou:
+            abonnes = list(self._abonnes)
+        for abonne in abonnes:
+            abonne.recevoir(evenement)
+
+    @contextmanager
+    def abonnement(self):
+        # Appelé depuis la boucle de la connexion
+        abonne = Abonne(asyncio.get_running_loop(), getattr(settings, 'EVENEMENTS_TAILLE_FILE', 1000))
+        with self._verrou:
+            self._abonnes.add(abonne)
+        try:
+            yield abonne
+        finally:
+            with self._verrou:
+                self._abonnes.discard(abonne)
+
+    def nombre_abonnes(self):
+        with self._verrou:
+            return len(self._abonnes)
+
+
+_diffusion = None
+_verrou_diffusion = threading.Lock()
+
+
+def diffusion():
+    """Diffusion configurée par EVENEMENTS_BACKEND (une instance par processus)."""
+    global _diffusion
+    if _diffusion is None:
+        with _verrou_diffusion:
+            if _diffusion is None:
+                classe = getattr(settings, 'EVENEMENTS_BACKEND', 'api.evenements.DiffusionLocale')
+                _diffusion = import_string(classe)()
+    return _diffusion
+
+
+def publier(type_evenement, action, projet_id, ids):
+    """Publie l'événement une fois la transaction en cours validée."""
+    if projet_id is None or not ids:
+        return
+    evenement = {'type': type_evenement, 'action': action, 'projet': projet_id, 'ids': list(ids)}
+    transaction.on_commit(lambda: diffusion().publier(evenement))
+
+
+def publier_taches(taches, action):
+    """Un événement par projet pour des tâches écrites en masse (sans signaux)."""
+    par_projet = defaultdict(list)
+    for tache in taches:
+        par_projet[tache.projet_id].append(tache.id)
+    for projet_id, ids in par_projet.items():
+        publier('tache', action, projet_id, ids)
+
+
+def jeton_flux(membre):
+    return signing.dumps(membre.pk, salt=SEL_LIEN)
+
+
+def membre_du_jeton(jeton):
+    """Id du membre d'un lien signé encore valable, sinon None."""
+    try:
+        return signing.loads(jeton, salt=SEL_LIEN, max_age=getattr(settings, 'EVENEMENTS_LIEN_DUREE', 60))
+    except signing.BadSignature:
+        return None
+
+
+def concerne(evenement, membre_id, visibles):
+    """Vrai si l'événement est destiné au membre qui voit les projets `visibles` (None : tous)."""
+    if evenement['type'] in ('membres', 'projet') and membre_id in evenement['ids']:
+        return True
+    return visibles is None or evenement['projet'] in visibles
+
+
+def message(nom, donnees):
+    return f'event: {nom}\ndata: {json.dumps(donnees)}\n\n'
+
+
+async def flux(membre_id, visibles, recalculer_visibles):
+    """
+    Messages SSE d'une connexion : événements des projets visibles, commentaire
+    de maintien toutes les EVENEMENTS_PING_SECONDES, et `resync` si des
+    événements ont été perdus. `recalculer_visibles` (coroutine) relit les
+    projets visibles quand les membres d'un projet du membre changent.
+    """
+    ping = getattr(settings, 'EVENEMENTS_PING_SECONDES', 15)
+    with diffusion().abonnement() as abonne:
+        # Délai de reconnexion d'EventSource (ms)
+        yield 'retry: 5000\n\n'
+        while True:
+            evenement = await abonne.suivant(ping)
+            if evenement is None:
+                yield ': ping\n\n'
+                continue
+            if evenement is DEBORDEMENT:
+                yield message('resync', {})
+                continue
+            if not concerne(evenement, membre_id, visibles):
+                continue
+            if evenement['type'] in ('membres', 'projet') and membre_id in evenement['ids']:
+                visibles = await recalculer_visibles()
+            yield message(evenement['type'], evenement)
@@ -0,0 +1,101 @@
+"""
+Export en flux (CSV ou NDJSON) des listes des viewsets : `GET <liste>/export/?type=csv|ndjson`.
+
+Les lignes sont celles du serializer de la liste, lues avec les mêmes règles de
+visibilité et les mêmes filtres que `list`, sans pagination. Le queryset est
+parcouru par `.iterator(chunk_size=...)` (par values() quand la lecture rapide
+le permet, sinon avec les jointures de restreindre_queryset()) et la réponse
+est produite au fur et à mesure : la mémoire utilisée ne dépend pas du nombre
+de lignes, sous WSGI comme sous ASGI (voir flux_asgi.py).
+"""
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .champs import restreindre_queryset
+from .flux_asgi import diffuser
+from .rapide import lire_lignes, plan_de_lecture, representer_ligne
+
+TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+# Taille approximative (en caractères) des morceaux envoyés au client
+TAILLE_MORCEAU = 64 * 1024
+
+
+def lignes_serializees(queryset, serializer):
+    """Dictionnaires du serializer pour chaque objet du queryset, lus par morceaux."""
+    chunk_size = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+    plan = plan_de_lecture(serializer, queryset.model)
+    if plan is not None:
+        for ligne in lire_lignes(queryset, plan).iterator(chunk_size=chunk_size):
+            yield representer_ligne(ligne, plan)
+        return
+    for instance in restreindre_queryset(queryset, serializer.fields).iterator(chunk_size=chunk_size):
+        yield serializer.to_representation(instance)
+
+
+def _valeur_csv(valeur):
+    if valeur is None:
+        return ''
+    if isinstance(valeur, (list, tuple)):
+        return ','.join(str(v) for v in valeur)
+    if isinstance(valeur, dict):
+        return json.dumps(valeur, cls=JSONEncoder, ensure_ascii=False)
+    return valeur
+
+
+def en_csv(lignes, colonnes):
+    tampon = io.StringIO()
+    writer = csv.writer(tampon)
+    writer.writerow(colonnes)
+    for ligne in lignes:
+        writer.writerow([_valeur_csv(ligne.get(colonne)) for colonne in colonnes])
+        if tampon.tell() >= TAILLE_MORCEAU:
+            yield tampon.getvalue()
+            tampon.seek(0)
+            tampon.truncate()
+    yield tampon.getvalue()
+
+
+def en_ndjson(lignes):
+    morceau = []
+    taille = 0
+    for ligne in lignes:
+        texte = json.dumps(ligne, cls=JSONEncoder, ensure_ascii=False)
+        morceau.append(texte)
+        taille += len(texte) + 1
+        if taille >= TAILLE_MORCEAU:
+            yield '\n'.join(morceau) + '\n'
+            morceau, taille = [], 0
+    if morceau:
+        yield '\n'.join(morceau) + '\n'
+
+
+class ExportMixin:
+    """Pour un viewset : action `export` qui diffuse la liste filtrée en CSV ou NDJSON."""
+    # Nom du fichier proposé au téléchargement (sans extension)
+    nom_export = 'export'
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        type_export = request.query_params.get('type', 'csv')
+        if type_export not in TYPES:
+            return Response({'error': f"type doit être l'un de : {', '.join(TYPES)}"}, status=400)
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+        lignes = lignes_serializees(queryset, serializer)
+        if type_export == 'csv':
+            contenu = en_csv(lignes, [champ.field_name for champ in serializer._readable_fields])
+        else:
+            contenu = en_ndjson(lignes)
+        response = StreamingHttpResponse(contenu, content_type=TYPES[type_export])
+        response['Content-Disposition'] = f'attachment; filename="{self.nom_export}.{type_export}"'
+        return diffuser(request, response)
@@ -0,0 +1,30 @@
+"""
+Réponses en flux des vues synchrones sous ASGI.
+
+Sous ASGI, Django ne sait envoyer au fur et à mesure que le contenu asynchrone
+d'une StreamingHttpResponse (ou FileResponse) : un contenu synchrone est d'abord
+lu en entier par sync_to_async(list), ce qui charge tout un export ou tout un
+fichier en mémoire avant le premier octet. diffuser() remplace alors le contenu
+par un itérateur asynchrone qui lit un morceau à la fois dans le thread de la
+requête (celui de la vue, qui tient la connexion à la base). Sous WSGI, la
+réponse est laissée telle quelle.
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+_FIN = object()
+
+
+async def _morceaux(iterateur):
+    lire = sync_to_async(next, thread_sensitive=True)
+    while (morceau := await lire(iterateur, _FIN)) is not _FIN:
+        yield morceau
+
+
+def diffuser(request, response):
+    """Retourne la réponse, lue en flux par un itérateur asynchrone si la requête est servie par ASGI."""
+    # request peut être une Request de DRF, qui enveloppe la HttpRequest
+    if response.streaming and not response.is_async and isinstance(getattr(request, '_request', request), ASGIRequest):
+        # Les fermetures d'origine (fichier, générateur) restent enregistrées sur la réponse
+        response.streaming_content = _morceaux(iter(response.streaming_content))
+    return response
@@ -0,0 +1,260 @@
+"""
+Import en masse de projets ou de tâches depuis un fichier CSV ou NDJSON.
+
+Le fichier est lu ligne à ligne. Chaque ligne est validée par le serializer de
+l'API (ProjetSerializer / TacheSerializer), dont les champs de relation sont
+remplacés par des références résolues dans des tables de correspondance
+construites une fois avant la lecture (id ou nom de projet, id ou nom
+d'utilisateur de membre) : la validation ne fait aucune requête. Les lignes
+valides sont insérées par bulk_create, un lot par transaction, et chaque ligne
+refusée est rapportée avec son numéro (à partir de 1, en-tête CSV non compté).
+Un fichier qui n'est pas en UTF-8 est refusé (400) avant toute insertion.
+
+Les colonnes en lecture seule (id, projet_nom...) sont ignorées : un fichier
+produit par l'export (voir export.py) peut être réimporté tel quel.
+"""
+import codecs
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .cache_dashboard import invalider
+from .evenements import publier, publier_taches
+from .masse import enregistrer_changements
+from .models import Membre, Projet, Tache
+from .serializers import ProjetSerializer, TacheSerializer
+from .visibilite import projets_visibles
+
+FORMATS = ('csv', 'ndjson')
+# Taille des blocs lus pour vérifier l'encodage
+TAILLE_BLOC = 1024 * 1024
+
+
+class _Ambigu:
+    pass
+
+
+# Valeur d'une table de correspondance pour un nom partagé par plusieurs objets
+AMBIGU = _Ambigu()
+
+
+def _ajouter(table, cle, pk):
+    cle = str(cle).strip()
+    if cle in table and table[cle] != pk:
+        table[cle] = AMBIGU
+    else:
+        table[cle] = pk
+
+
+def tables_de_correspondance(projets_ids=None):
+    """
+    {'projets': {id ou nom -> id}, 'membres': {id ou nom d'utilisateur -> id}},
+    limitées aux projets `projets_ids` (None : tous). Les ids passent avant les noms.
+    """
+    projets = Projet.objects.order_by()
+    if projets_ids is not None:
+        projets = projets.filter(id__in=projets_ids)
+    tables = {'projets': {}, 'membres': {}}
+    for table, lignes in (
+        (tables['projets'], projets.values_list('id', 'nom')),
+        (tables['membres'], Membre.objects.order_by().values_list('id', 'user__username')),
+    ):
+        lignes = list(lignes)
+        for pk, nom in lignes:
+            _ajouter(table, nom, pk)
+        for pk, _ in lignes:
+            table[str(pk)] = pk
+    return tables
+
+
+class Reference(serializers.Field):
+    """Relation résolue par une table de correspondance (valeur -> id), sans requête."""
+    default_error_messages = {
+        'introuvable': 'Objet introuvable : "{valeur}".',
+        'ambigu': 'Référence ambiguë : "{valeur}" désigne plusieurs objets.',
+    }
+
+    def __init__(self, table, **kwargs):
+        self.table = table
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if data in ('', None) and self.allow_null:
+            return None
+        pk = self.table.get(str(data).strip())
+        if pk is None:
+            self.fail('introuvable', valeur=data)
+        if pk is AMBIGU:
+            self.fail('ambigu', valeur=data)
+        return pk
+
+
+class References(Reference):
+    """Relation multiple : liste, ou chaîne de valeurs séparées par des virgules (CSV)."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = [valeur for valeur in data.split(',') if valeur.strip()]
+        if not isinstance(data, (list, tuple)):
+            self.fail('introuvable', valeur=data)
+        return [super(References, self).to_internal_value(valeur) for valeur in data]
+
+
+def verifier_encodage(fichier):
+    """
+    Lève ValueError si le fichier binaire n'est pas de l'UTF-8 valide. Lu par
+    blocs avant l'import, puis rembobiné : une erreur d'encodage en cours de
+    lecture laisserait les lots déjà insérés.
+    """
+    decodeur = codecs.getincrementaldecoder('utf-8-sig')()
+    try:
+        for bloc in iter(lambda: fichier.read(TAILLE_BLOC), b''):
+            decodeur.decode(bloc)
+        decodeur.decode(b'', final=True)
+    except UnicodeDecodeError:
+        raise ValueError('Fichier illisible : encodage UTF-8 attendu')
+    finally:
+        fichier.seek(0)
+
+
+def lire_fichier(fichier, format_fichier):
+    """
+    Enregistrements d'un fichier binaire, lus au fur et à mesure : dictionnaires,
+    ou ValueError pour une ligne NDJSON illisible.
+    """
+    texte = io.TextIOWrapper(fichier, encoding='utf-8-sig', newline='')
+    if format_fichier == 'csv':
+        yield from csv.DictReader(texte)
+        return
+    for ligne in texte:
+        if not ligne.strip():
+            continue
+        try:
+            enregistrement = json.loads(ligne)
+        except ValueError as e:
+            yield ValueError(f'JSON invalide : {e}')
+            continue
+        yield enregistrement if isinstance(enregistrement, dict) else ValueError('Objet JSON attendu')
+
+
+def _serializer_taches(tables):
+    serializer = TacheSerializer()
+    serializer.fields['projet'] = Reference(tables['projets'], source='projet_id')
+    serializer.fields['assignee'] = Reference(tables['membres'], source='assignee_id', required=False, allow_null=True)
+    return serializer
+
+
+def _serializer_projets(tables):
+    serializer = ProjetSerializer()
+    serializer.fields['cree_par'] = Reference(tables['membres'], source='cree_par_id', required=False)
+    serializer.fields['membres'] = References(tables['membres'], required=False)
+    return serializer
+
+
+def _inserer_taches(lot, membre):
+    creees = Tache.objects.bulk_create([Tache(**donnees) for donnees in lot])
+    # bulk_create n'émet pas les signaux : compteurs et cache tenus à jour ici
+    enregistrer_changements([(None, tache.etat_statistiques()) for tache in creees])
+    publier_taches(creees, 'modifie')
+    return len(creees)
+
+
+def _inserer_projets(lot, membre):
+    projets, membres = [], []
+    for donnees in lot:
+        membres.append(donnees.pop('membres', []))
+        donnees.setdefault('cree_par_id', membre.id)
+        projets.append(Projet(**donnees))
+    creees = Projet.objects.bulk_create(projets)
+    Lien = Projet.membres.through
+    Lien.objects.bulk_create(
+        [Lien(projet_id=projet.id, membre_id=m) for projet, ids in zip(creees, membres) for m in set(ids)],
+        ignore_conflicts=True,
+    )
+    # Projets visibles de leur créateur et de leurs membres, statistiques globales
+    concernes = {projet.cree_par_id for projet in creees} | {m for ids in membres for m in ids}
+    invalider('global', *[f'membre:{membre_id}' for membre_id in concernes])
+    for projet, ids in zip(creees, membres):
+        publier('projet', 'cree', projet.id, {projet.cree_par_id, *ids})
+    return len(creees)
+
+
+CIBLES = {
+    'taches': (_serializer_taches, _inserer_taches),
+    'projets': (_serializer_projets, _inserer_projets),
+}
+
+
+def importer_enregistrements(enregistrements, cible, membre, projets_ids=None, taille_lot=None):
+    """
+    Valide et insère les enregistrements (itérable de dictionnaires) dans `cible`
+    ('taches' ou 'projets') pour le compte de `membre` (créateur par défaut des
+    projets). Seuls les projets `projets_ids` (None : tous) peuvent recevoir des
+    tâches. Retourne {'lignes': n, 'creees': n, 'erreurs': [{'ligne': n, 'errors': ...}]}.
+    """
+    if taille_lot is None:
+        taille_lot = getattr(settings, 'IMPORT_TAILLE_LOT', 1000)
+    construire_serializer, inserer = CIBLES[cible]
+    serializer = construire_serializer(tables_de_correspondance(projets_ids))
+    rapport = {'lignes': 0, 'creees': 0, 'erreurs': []}
+
+    def vider(lot):
+        with transaction.atomic():
+            rapport['creees'] += inserer(lot, membre)
+
+    lot = []
+    for numero, enregistrement in enumerate(enregistrements, start=1):
+        rapport['lignes'] = numero
+        if isinstance(enregistrement, Exception):
+            rapport['erreurs'].append({'ligne': numero, 'errors': {'non_field_errors': [str(enregistrement)]}})
+            continue
+        try:
+            lot.append(dict(serializer.run_validation(enregistrement)))
+        except serializers.ValidationError as e:
+            rapport['erreurs'].append({'ligne': numero, 'errors': e.detail})
+            continue
+        if len(lot) >= taille_lot:
+            vider(lot)
+            lot = []
+    if lot:
+        vider(lot)
+    return rapport
+
+
+class ImportMixin:
+    """
+    Pour un viewset : action `POST <liste>/import/` qui importe le fichier envoyé
+    sous `fichier` (multipart), au format `?type=csv|ndjson` ou deviné d'après
+    son extension.
+    """
+    # 'taches' ou 'projets'
+    cible_import = None
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def importer(self, request):
+        fichier = request.FILES.get('fichier')
+        if fichier is None:
+            return Response({'error': 'fichier requis'}, status=400)
+        format_fichier = request.query_params.get('type') or fichier.name.rsplit('.', 1)[-1].lower()
+        if format_fichier not in FORMATS:
+            return Response({'error': f"type doit être l'un de : {', '.join(FORMATS)}"}, status=400)
+        try:
+            membre = request.user.membre_profile
+        except Exception:
+            return Response({'error': 'Profil membre introuvable'}, status=403)
+        # Des tâches ne peuvent être importées que dans les projets visibles
+        projets_ids = projets_visibles(request) if self.cible_import == 'taches' else None
+        try:
+            verifier_encodage(fichier.file)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        rapport = importer_enregistrements(
+            lire_fichier(fichier.file, format_fichier), self.cible_import, membre, projets_ids
+        )
+        return Response(rapport)
@@ -0,0 +1,101 @@
+"""Génération de données volumineuses pour les commandes de benchmark."""
+import random
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from api.models import Commentaire, Membre, Projet, Tache
+
+STATUTS = ['En attente', 'En cours', 'Terminé', 'Annulé']
+PRIORITES = ['Basse', 'Moyenne', 'Haute']
+
+
+@contextmanager
+def transaction_annulee():
+    """Transaction annulée à la sortie : les données générées ne sont jamais enregistrées."""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def seed_donnees(nb_projets, nb_membres, nb_taches, prefixe='bench', graine=42, batch_size=5000,
+                 nb_commentaires=0):
+    """
+    Crée un chef de projet, `nb_membres` membres, `nb_projets` projets (tous créés
+    par le chef, avec une dizaine de membres chacun), `nb_taches` tâches et
+    `nb_commentaires` commentaires répartis aléatoirement. Retourne le chef.
+    """
+    rng = random.Random(graine)
+    today = date.today()
+
+    User.objects.bulk_create(
+        [User(username=f'{prefixe}_chef')]
+        + [User(username=f'{prefixe}_membre_{i}') for i in range(nb_membres)],
+        batch_size=batch_size,
+    )
+    users = {u.username: u.id for u in User.objects.filter(username__startswith=f'{prefixe}_')}
+    Membre.objects.bulk_create(
+        [Membre(user_id=users[f'{prefixe}_chef'], nom=f'{prefixe} chef', role='CHEF_PROJET')]
+        + [
+            Membre(user_id=users[f'{prefixe}_membre_{i}'], nom=f'{prefixe} membre {i}', role='MEMBRE')
+            for i in range(nb_membres)
+        ],
+        batch_size=batch_size,
+    )
+    chef = Membre.objects.get(user_id=users[f'{prefixe}_chef'])
+    membres_ids = list(
+        Membre.objects.filter(user__username__startswith=f'{prefixe}_membre_').values_list('id', flat=True)
+    )
+
+    Projet.objects.bulk_create([
+        Projet(
+            nom=f'{prefixe} projet {i}',
+            description='Projet généré pour les benchmarks',
+            date_debut=today - timedelta(days=rng.randint(0, 180)),
+            date_fin=today + timedelta(days=rng.randint(0, 180)),
+            statut='En cours',
+            cree_par=chef,
+        ) for i in range(nb_projets)
+    ], batch_size=batch_size)
+    projets_ids = list(Projet.objects.filter(cree_par=chef).values_list('id', flat=True))
+
+    Lien = Projet.membres.through
+    liens = set()
+    for projet_id in projets_ids:
+        for membre_id in rng.sample(membres_ids, min(10, len(membres_ids))):
+            liens.add((projet_id, membre_id))
+    Lien.objects.bulk_create(
+        [Lien(projet_id=p, membre_id=m) for p, m in liens],
+        batch_size=batch_size,
+    )
+
+    taches = []
+    for i in range(nb_taches):
+        debut = today + timedelta(days=rng.randint(-120, 60))
+        taches.append(Tache(
+            nom=f'{prefixe} tâche {i}',
+            description='Tâche générée pour les benchmarks',
+            date_debut=debut,
+            date_fin=debut + timedelta(days=rng.randint(1, 30)),
+            statut=rng.choice(STATUTS),
+            priorite=rng.choice(PRIORITES),
+            projet_id=rng.choice(projets_ids),
+            assignee_id=rng.choice(membres_ids) if membres_ids and rng.random() < 0.9 else None,
+        ))
+        if len(taches) >= batch_size:
+            Tache.objects.bulk_create(taches)
+            taches = []
+    Tache.objects.bulk_create(taches)
+
+    if nb_commentaires:
+        taches_ids = list(Tache.objects.filter(projet_id__in=projets_ids).values_list('id', flat=True))
+        Commentaire.objects.bulk_create([
+            Commentaire(
+                contenu=f'{prefixe} commentaire {i}',
+                tache_id=rng.choice(taches_ids),
+                auteur_id=rng.choice(membres_ids),
+            ) for i in range(nb_commentaires)
+        ], batch_size=batch_size)
+    return chef
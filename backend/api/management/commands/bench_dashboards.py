@@ -0,0 +1,88 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.views import ChefDashboardStatsView, DashboardStatsView, MembreDashboardStatsView
+
+from ._seed import seed_donnees, transaction_annulee
+
+VUES = [
+    ('dashboard/stats/', DashboardStatsView),
+    ('dashboard/chef/', ChefDashboardStatsView),
+    ('dashboard/membre/', MembreDashboardStatsView),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère un jeu de données volumineux (dans une transaction annulée à la fin), "
+        "mesure le nombre de requêtes et la durée des tableaux de bord à deux échelles "
+        "et échoue si le nombre de requêtes dépend du volume de données."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projets', type=int, default=100)
+        parser.add_argument('--membres', type=int, default=500)
+        parser.add_argument('--taches', type=int, default=50000)
+        parser.add_argument('--repetitions', type=int, default=5)
+        parser.add_argument(
+            '--avec-cache',
+            action='store_true',
+            help='Mesure les réponses servies par le cache au lieu du calcul des tableaux de bord.',
+        )
+
+    def handle(self, *args, **options):
+        timeout = settings.DASHBOARD_CACHE_TIMEOUT if options['avec_cache'] else 0
+        with transaction_annulee(), override_settings(DASHBOARD_CACHE_TIMEOUT=timeout):
+            resultats = self.mesurer(options)
+
+        erreurs = []
+        for url, _ in VUES:
+            petit, grand = resultats['petit'][url], resultats['grand'][url]
+            self.stdout.write(
+                f"{url:<20} requêtes {petit[0]:>3} -> {grand[0]:>3}   "
+                f"durée {petit[1] * 1000:8.1f} ms -> {grand[1] * 1000:8.1f} ms"
+            )
+            if petit[0] != grand[0]:
+                erreurs.append(url)
+        if erreurs:
+            raise CommandError(f"Nombre de requêtes non constant pour : {', '.join(erreurs)}")
+        self.stdout.write(self.style.SUCCESS('Nombre de requêtes constant sur toutes les vues.'))
+
+    def mesurer(self, options):
+        resultats = {}
+        echelles = [('petit', 10), ('grand', 1)]
+        for nom, diviseur in echelles:
+            chef = seed_donnees(
+                max(1, options['projets'] // diviseur),
+                max(1, options['membres'] // diviseur),
+                max(1, options['taches'] // diviseur),
+                prefixe=f'bench_{nom}',
+            )
+            membre = chef.projets.first().membres.first()
+            resultats[nom] = {
+                'dashboard/stats/': self.mesurer_vue(DashboardStatsView, chef.user, options['repetitions']),
+                'dashboard/chef/': self.mesurer_vue(ChefDashboardStatsView, chef.user, options['repetitions']),
+                'dashboard/membre/': self.mesurer_vue(MembreDashboardStatsView, membre.user, options['repetitions']),
+            }
+        return resultats
+
+    def mesurer_vue(self, vue, user, repetitions):
+        factory = APIRequestFactory()
+        view = vue.as_view()
+        durees = []
+        for _ in range(repetitions):
+            request = factory.get('/')
+            force_authenticate(request, user=user)
+            with CaptureQueriesContext(connection) as ctx:
+                debut = time.perf_counter()
+                response = view(request)
+                durees.append(time.perf_counter() - debut)
+            if response.status_code != 200:
+                raise CommandError(f'{vue.__name__} a répondu {response.status_code}')
+        durees.sort()
+        return len(ctx.captured_queries), durees[len(durees) // 2]
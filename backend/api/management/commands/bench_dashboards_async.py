@@ -0,0 +1,125 @@
+import asyncio
+import math
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api import dashboard_async
+from api.views import ChefDashboardStatsView, DashboardStatsView, MembreDashboardStatsView
+
+from ._seed import seed_donnees
+
+VUES = [
+    ('dashboard/stats/', DashboardStatsView, dashboard_async.dashboard_stats, 'chef'),
+    ('dashboard/chef/', ChefDashboardStatsView, dashboard_async.dashboard_chef, 'chef'),
+    ('dashboard/membre/', MembreDashboardStatsView, dashboard_async.dashboard_membre, 'membre'),
+]
+
+
+def percentile(durees, p):
+    durees = sorted(durees)
+    return durees[max(0, math.ceil(p * len(durees)) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare la latence (p50/p99) et le débit des tableaux de bord synchrones et "
+        "asynchrones (requêtes indépendantes en parallèle) sous charge concurrente, sur "
+        "une base SQLite temporaire peuplée pour l'occasion (la base configurée n'est pas modifiée)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projets', type=int, default=100)
+        parser.add_argument('--membres', type=int, default=500)
+        parser.add_argument('--taches', type=int, default=50000)
+        parser.add_argument('--requetes', type=int, default=200, help='Requêtes par vue et par mode.')
+        parser.add_argument(
+            '--concurrence', type=int, nargs='+', default=[1, 16],
+            help='Nombre(s) de requêtes simultanées à mesurer.',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Ce benchmark crée une base SQLite temporaire : base par défaut SQLite requise.')
+        dossier = tempfile.mkdtemp(prefix='bench_dashboards_')
+        # Base fichier (et non en mémoire) : chaque thread a sa propre connexion
+        connection.settings_dict['TEST'] = {**connection.settings_dict.get('TEST', {}),
+                                            'NAME': os.path.join(dossier, 'bench.sqlite3')}
+        nom_initial = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(DASHBOARD_CACHE_TIMEOUT=0, DASHBOARD_PARALLELE=True):
+                self.executer(options)
+        finally:
+            connection.creation.destroy_test_db(nom_initial, verbosity=0)
+            shutil.rmtree(dossier, ignore_errors=True)
+
+    def executer(self, options):
+        chef = seed_donnees(options['projets'], options['membres'], options['taches'])
+        utilisateurs = {'chef': chef.user, 'membre': chef.projets.first().membres.first().user}
+        factory = APIRequestFactory()
+
+        def requete(qui):
+            request = factory.get('/')
+            force_authenticate(request, user=utilisateurs[qui])
+            return request
+
+        self.stdout.write(f"{options['requetes']} requêtes par vue, par mode et par niveau de concurrence")
+        self.stdout.write(f"{'vue':<20}{'simult.':>8}  {'mode':<7}{'p50 (ms)':>10}{'p99 (ms)':>10}{'req/s':>9}")
+        for url, vue, vue_async, qui in VUES:
+            # Première requête : création paresseuse des lignes de statistiques
+            vue.as_view()(requete(qui))
+            for concurrence in options['concurrence']:
+                for mode, mesurer in (('sync', self.mesurer_sync), ('async', self.mesurer_async)):
+                    durees, total = mesurer(vue, vue_async, lambda: requete(qui), options['requetes'], concurrence)
+                    self.stdout.write(
+                        f'{url:<20}{concurrence:>8}  {mode:<7}{percentile(durees, 0.5) * 1000:>10.1f}'
+                        f'{percentile(durees, 0.99) * 1000:>10.1f}{len(durees) / total:>9.1f}'
+                    )
+
+    def mesurer_sync(self, vue, vue_async, requete, nombre, concurrence):
+        """Serveur WSGI à threads : une requête par thread, calcul séquentiel."""
+        view = vue.as_view()
+
+        def appel(_):
+            try:
+                debut = time.perf_counter()
+                response = view(requete())
+                duree = time.perf_counter() - debut
+            finally:
+                close_old_connections()
+            if response.status_code != 200:
+                raise CommandError(f'{vue.__name__} a répondu {response.status_code}')
+            return duree
+
+        debut = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrence) as executeur:
+            durees = list(executeur.map(appel, range(nombre)))
+        return durees, time.perf_counter() - debut
+
+    def mesurer_async(self, vue, vue_async, requete, nombre, concurrence):
+        """Serveur ASGI : une boucle, les requêtes sont des coroutines concurrentes."""
+        async def charge():
+            limite = asyncio.Semaphore(concurrence)
+
+            async def appel():
+                async with limite:
+                    debut = time.perf_counter()
+                    response = await vue_async(requete())
+                    duree = time.perf_counter() - debut
+                if response.status_code != 200:
+                    raise CommandError(f'{vue.__name__} (async) a répondu {response.status_code}')
+                return duree
+
+            return await asyncio.gather(*(appel() for _ in range(nombre)))
+
+        debut = time.perf_counter()
+        durees = asyncio.run(charge())
+        return durees, time.perf_counter() - debut
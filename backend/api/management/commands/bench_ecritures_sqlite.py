@@ -0,0 +1,151 @@
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection, connections
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import Tache
+from api.views import CommentaireViewSet, TacheViewSet
+
+from ._seed import seed_donnees
+
+STATUTS = ['En attente', 'En cours', 'Terminé', 'Annulé']
+PARAMETRES = ('OPTIONS', 'CONN_MAX_AGE', 'CONN_HEALTH_CHECKS', 'TEST')
+
+
+class Command(BaseCommand):
+    help = (
+        "Charge d'écritures concurrentes (changements de statut, commentaires, modifications "
+        "en masse) et de lectures sur une base SQLite temporaire, pour chaque profil de "
+        "DATABASE_PROFILS : débit d'écriture, latence et taux d'erreurs \"database is locked\"."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profils', nargs='+', default=['simple', 'production'])
+        parser.add_argument('--ecrivains', type=int, default=8, help="Threads d'écriture.")
+        parser.add_argument('--lecteurs', type=int, default=4, help='Threads de lecture.')
+        parser.add_argument('--duree', type=float, default=10, help='Durée de la charge par profil (s).')
+        parser.add_argument('--taches', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Ce benchmark compare des profils SQLite : base par défaut SQLite requise.')
+        inconnus = set(options['profils']) - set(settings.DATABASE_PROFILS)
+        if inconnus:
+            raise CommandError(f"Profil(s) inconnu(s) : {', '.join(sorted(inconnus))}")
+
+        self.stdout.write(
+            f"{options['ecrivains']} écrivains, {options['lecteurs']} lecteurs, {options['duree']:g} s par profil"
+        )
+        self.stdout.write(
+            f"{'profil':<12}{'écritures/s':>12}{'p50 (ms)':>10}{'p99 (ms)':>10}"
+            f"{'verrous':>9}{'taux':>8}{'lectures/s':>12}"
+        )
+        for profil in options['profils']:
+            resultat = self.mesurer_profil(profil, options)
+            ecritures, durees = resultat['ecritures'], sorted(resultat['durees'])
+            tentatives = ecritures + resultat['verrous']
+            p50 = durees[len(durees) // 2] * 1000 if durees else 0
+            p99 = durees[min(len(durees) - 1, int(len(durees) * 0.99))] * 1000 if durees else 0
+            self.stdout.write(
+                f"{profil:<12}{ecritures / options['duree']:>12.1f}{p50:>10.1f}{p99:>10.1f}"
+                f"{resultat['verrous']:>9}{resultat['verrous'] / max(1, tentatives):>8.1%}"
+                f"{resultat['lectures'] / options['duree']:>12.1f}"
+            )
+
+    def mesurer_profil(self, profil, options):
+        """Crée une base fichier temporaire avec les paramètres du profil, la charge, puis la supprime."""
+        parametres = connection.settings_dict
+        sauvegarde = {cle: parametres.get(cle) for cle in PARAMETRES}
+        dossier = tempfile.mkdtemp(prefix='bench_ecritures_')
+        config = settings.DATABASE_PROFILS[profil]
+        connection.close()
+        # Le même dictionnaire sert aux connexions de tous les threads
+        parametres.update(
+            OPTIONS=dict(config.get('OPTIONS', {})),
+            CONN_MAX_AGE=config.get('CONN_MAX_AGE', 0),
+            CONN_HEALTH_CHECKS=config.get('CONN_HEALTH_CHECKS', False),
+            TEST={**parametres['TEST'], 'NAME': os.path.join(dossier, f'{profil}.sqlite3')},
+        )
+        nom_initial = parametres['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            chef = seed_donnees(5, 20, options['taches'], prefixe=f'stress_{profil}')
+            return self.charger(chef, options)
+        finally:
+            connection.creation.destroy_test_db(nom_initial, verbosity=0)
+            parametres.update(sauvegarde)
+            shutil.rmtree(dossier, ignore_errors=True)
+
+    def charger(self, chef, options):
+        taches_ids = list(Tache.objects.values_list('id', flat=True))
+        # Hôte accepté par ALLOWED_HOSTS (liens de pagination)
+        factory = APIRequestFactory(SERVER_NAME='localhost')
+        fin = time.monotonic() + options['duree']
+        verrou = threading.Lock()
+        total = {'ecritures': 0, 'verrous': 0, 'lectures': 0, 'durees': []}
+
+        def requete(methode, donnees=None):
+            request = getattr(factory, methode)('/', donnees, format='json')
+            force_authenticate(request, user=chef.user)
+            return request
+
+        change_status = TacheViewSet.as_view({'post': 'change_status'})
+        bulk_change_status = TacheViewSet.as_view({'post': 'bulk_change_status'})
+        commenter = CommentaireViewSet.as_view({'post': 'create'})
+        lister = TacheViewSet.as_view({'get': 'list'})
+
+        def ecrire(rng):
+            tirage = rng.random()
+            if tirage < 0.5:
+                return change_status(requete('post', {'statut': rng.choice(STATUTS)}), pk=rng.choice(taches_ids))
+            if tirage < 0.8:
+                return commenter(requete('post', {
+                    'contenu': 'Commentaire de charge', 'tache': rng.choice(taches_ids), 'auteur': chef.id,
+                }))
+            # Lecture puis écriture dans une même transaction (modifier_taches)
+            return bulk_change_status(requete('post', {'taches': [
+                {'id': tache_id, 'statut': rng.choice(STATUTS)} for tache_id in rng.sample(taches_ids, 5)
+            ]}))
+
+        def travailler(numero):
+            rng = random.Random(numero)
+            lecteur = numero >= options['ecrivains']
+            compte = {'ecritures': 0, 'verrous': 0, 'lectures': 0, 'durees': []}
+            try:
+                while time.monotonic() < fin:
+                    debut = time.perf_counter()
+                    try:
+                        response = lister(requete('get')) if lecteur else ecrire(rng)
+                    except OperationalError as e:
+                        if 'locked' not in str(e):
+                            raise
+                        compte['verrous'] += 1
+                        continue
+                    finally:
+                        # Comme en fin de requête : ferme la connexion selon CONN_MAX_AGE
+                        close_old_connections()
+                    if response.status_code >= 400:
+                        raise CommandError(f'Réponse {response.status_code} : {response.data}')
+                    if lecteur:
+                        compte['lectures'] += 1
+                    else:
+                        compte['ecritures'] += 1
+                        compte['durees'].append(time.perf_counter() - debut)
+            finally:
+                connections.close_all()
+            with verrou:
+                for cle, valeur in compte.items():
+                    total[cle] += valeur
+
+        nombre = options['ecrivains'] + options['lecteurs']
+        with ThreadPoolExecutor(max_workers=nombre) as executeur:
+            list(executeur.map(travailler, range(nombre)))
+        return total
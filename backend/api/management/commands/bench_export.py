@@ -0,0 +1,54 @@
+import resource
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.views import TacheViewSet
+
+from ._seed import seed_donnees, transaction_annulee
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère un grand nombre de tâches (dans une transaction annulée à la fin), les "
+        "exporte en flux par /api/taches/export/ et mesure le débit et le pic de mémoire "
+        "allouée pendant l'export ; échoue si ce pic dépasse --max-mo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--taches', type=int, default=1_000_000)
+        parser.add_argument('--type', choices=['csv', 'ndjson'], default='csv')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--max-mo', type=float, default=50)
+
+    def handle(self, *args, **options):
+        with transaction_annulee(), override_settings(EXPORT_CHUNK_SIZE=options['chunk_size']):
+            chef = seed_donnees(100, 500, options['taches'])
+            request = APIRequestFactory().get('/', {'type': options['type']})
+            # Le chef voit les projets qu'il a créés, donc toutes les tâches générées
+            force_authenticate(request, user=chef.user)
+            rss_avant = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            tracemalloc.start()
+            try:
+                debut = time.perf_counter()
+                response = TacheViewSet.as_view({'get': 'export'})(request)
+                taille = sum(len(morceau) for morceau in response.streaming_content)
+                duree = time.perf_counter() - debut
+                _, pic = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            rss_apres = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        pic_mo = pic / 1024 / 1024
+        self.stdout.write(
+            f"{options['taches']:,} tâches, {taille / 1024 / 1024:.1f} Mo en {duree:.1f} s "
+            f"({options['taches'] / duree:,.0f} lignes/s)"
+        )
+        self.stdout.write(f'pic de mémoire allouée pendant l\'export : {pic_mo:.1f} Mo')
+        self.stdout.write(f'RSS maximale du processus : {rss_avant / 1024:.0f} Mo -> {rss_apres / 1024:.0f} Mo')
+        if pic_mo > options['max_mo']:
+            raise CommandError(f"Pic de mémoire de {pic_mo:.1f} Mo au-delà de {options['max_mo']} Mo")
+        self.stdout.write(self.style.SUCCESS('Mémoire bornée pendant l\'export.'))
@@ -0,0 +1,86 @@
+import csv
+import io
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.importation import importer_enregistrements, lire_fichier
+from api.models import Membre, Projet, Tache
+from api.views import TacheViewSet
+
+from ._seed import PRIORITES, STATUTS, seed_donnees, transaction_annulee
+
+
+def lignes_taches(nombre, projets_ids, usernames, graine=42):
+    rng = random.Random(graine)
+    today = date.today()
+    for i in range(nombre):
+        debut = today + timedelta(days=rng.randint(-60, 60))
+        yield {
+            'nom': f'import tâche {i}',
+            'description': 'Tâche importée pour le benchmark',
+            'date_debut': debut.isoformat(),
+            'date_fin': (debut + timedelta(days=rng.randint(1, 30))).isoformat(),
+            'statut': rng.choice(STATUTS),
+            'priorite': rng.choice(PRIORITES),
+            'projet': rng.choice(projets_ids),
+            'assignee': rng.choice(usernames),
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare, dans une transaction annulée, le débit de création de tâches par "
+        "POST /api/taches/ (une requête par tâche) et par l'import d'un fichier CSV, "
+        "et échoue si l'accélération est inférieure à --min-acceleration."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--taches', type=int, default=20000, help="Lignes du fichier importé.")
+        parser.add_argument('--rest', type=int, default=500, help='Tâches créées une à une par POST.')
+        parser.add_argument('--min-acceleration', type=float, default=10)
+
+    def handle(self, *args, **options):
+        with transaction_annulee():
+            chef = seed_donnees(20, 100, 0)
+            projets_ids = list(Projet.objects.filter(cree_par=chef).values_list('id', flat=True))
+            usernames = list(Membre.objects.filter(
+                user__username__startswith='bench_membre_'
+            ).values_list('user__username', flat=True))
+            membres = dict(Membre.objects.filter(user__username__in=usernames).values_list('user__username', 'id'))
+
+            view = TacheViewSet.as_view({'post': 'create'})
+            factory = APIRequestFactory()
+            debut = time.perf_counter()
+            for ligne in lignes_taches(options['rest'], projets_ids, usernames, graine=1):
+                request = factory.post('/', {**ligne, 'assignee': membres[ligne['assignee']]}, format='json')
+                force_authenticate(request, user=chef.user)
+                if view(request).status_code != 201:
+                    raise CommandError('La création par POST a échoué.')
+            duree_rest = time.perf_counter() - debut
+
+            tampon = io.StringIO()
+            writer = csv.DictWriter(tampon, fieldnames=list(next(lignes_taches(1, projets_ids, usernames))))
+            writer.writeheader()
+            writer.writerows(lignes_taches(options['taches'], projets_ids, usernames))
+            fichier = io.BytesIO(tampon.getvalue().encode())
+
+            avant = Tache.objects.count()
+            debut = time.perf_counter()
+            rapport = importer_enregistrements(lire_fichier(fichier, 'csv'), 'taches', chef)
+            duree_import = time.perf_counter() - debut
+            if rapport['erreurs'] or Tache.objects.count() - avant != options['taches']:
+                raise CommandError(f"L'import a refusé des lignes : {rapport['erreurs'][:5]}")
+
+        debit_rest = options['rest'] / duree_rest
+        debit_import = options['taches'] / duree_import
+        self.stdout.write(f"POST unitaire {options['rest']:>8} tâches {debit_rest:12,.0f} tâches/s")
+        self.stdout.write(f"import CSV    {options['taches']:>8} tâches {debit_import:12,.0f} tâches/s")
+        acceleration = debit_import / debit_rest
+        self.stdout.write(f'accélération : x{acceleration:.1f}')
+        if acceleration < options['min_acceleration']:
+            raise CommandError(f"Accélération inférieure à x{options['min_acceleration']}")
+        self.stdout.write(self.style.SUCCESS('Objectif de débit atteint.'))
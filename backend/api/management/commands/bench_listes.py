@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Tache
+from api.rapide import lire_lignes, plan_de_lecture, representer
+from api.renderers import RapideJSONRenderer
+from api.serializers import TacheSerializer
+
+from ._seed import seed_donnees, transaction_annulee
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare, sur un jeu de tâches généré puis annulé, le débit (lignes par seconde) "
+        "de la liste des tâches par TacheSerializer + JSONRenderer et par la lecture "
+        "rapide (values() + RapideJSONRenderer), et vérifie que les octets sont identiques."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--taches', type=int, default=20000)
+        parser.add_argument('--repetitions', type=int, default=3)
+
+    def handle(self, *args, **options):
+        with transaction_annulee():
+            seed_donnees(20, 100, options['taches'])
+            queryset = Tache.objects.order_by('id')
+            plan = plan_de_lecture(TacheSerializer(), Tache)
+
+            def serializer():
+                data = TacheSerializer(queryset.select_related('assignee', 'projet'), many=True).data
+                return JSONRenderer().render(data)
+
+            def rapide():
+                return RapideJSONRenderer().render(representer(lire_lignes(queryset, plan), plan))
+
+            resultats = {}
+            for nom, fonction in (('serializer', serializer), ('lecture rapide', rapide)):
+                durees = []
+                for _ in range(options['repetitions']):
+                    debut = time.perf_counter()
+                    contenu = fonction()
+                    durees.append(time.perf_counter() - debut)
+                resultats[nom] = (min(durees), contenu)
+
+        lignes = options['taches']
+        for nom, (duree, _) in resultats.items():
+            self.stdout.write(f'{nom:<16} {duree * 1000:9.1f} ms   {lignes / duree:12,.0f} lignes/s')
+        self.stdout.write(f"accélération : x{resultats['serializer'][0] / resultats['lecture rapide'][0]:.1f}")
+        if resultats['serializer'][1] == resultats['lecture rapide'][1]:
+            self.stdout.write(self.style.SUCCESS('Sorties identiques octet pour octet.'))
+        else:
+            self.stdout.write(self.style.ERROR('Les sorties diffèrent.'))
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import Tache
+from api.views import TacheViewSet
+
+from ._seed import seed_donnees, transaction_annulee
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare, sur un jeu de données généré puis annulé, le débit (tâches par seconde) "
+        "et le nombre de requêtes du changement de statut tâche par tâche (change_status) "
+        "et en masse (bulk_change_status)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--taches', type=int, default=200, help='Nombre de tâches modifiées.')
+
+    def handle(self, *args, **options):
+        nombre = options['taches']
+        with transaction_annulee():
+            chef = seed_donnees(10, 50, max(nombre * 2, 1000))
+            ids = list(Tache.objects.filter(projet__cree_par=chef).order_by('id').values_list('id', flat=True))
+            unitaire = self.mesurer(chef.user, [
+                ('post', {'statut': 'En cours'}, {'post': 'change_status'}, {'pk': tache_id})
+                for tache_id in ids[:nombre]
+            ])
+            masse = self.mesurer(chef.user, [
+                ('post', {'taches': [{'id': tache_id, 'statut': 'En cours'} for tache_id in ids[nombre:2 * nombre]]},
+                 {'post': 'bulk_change_status'}, {}),
+            ])
+
+        for nom, (duree, requetes) in (('unitaire', unitaire), ('en masse', masse)):
+            self.stdout.write(
+                f'{nom:<10} {duree * 1000:9.1f} ms   {nombre / duree:10,.0f} tâches/s   {requetes:>5} requêtes'
+            )
+        self.stdout.write(f'accélération : x{unitaire[0] / masse[0]:.1f}')
+
+    def mesurer(self, user, appels):
+        factory = APIRequestFactory()
+        with CaptureQueriesContext(connection) as ctx:
+            debut = time.perf_counter()
+            for methode, data, actions, kwargs in appels:
+                request = getattr(factory, methode)('/', data, format='json')
+                force_authenticate(request, user=user)
+                response = TacheViewSet.as_view(actions)(request, **kwargs)
+                if response.status_code != 200:
+                    raise CommandError(f'{actions} a répondu {response.status_code}')
+            duree = time.perf_counter() - debut
+        return duree, len(ctx.captured_queries)
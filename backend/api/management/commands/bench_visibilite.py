@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count, Q
+
+from api.models import Commentaire, Fichier, Membre, Projet, Tache
+from api.visibilite import ids_projets_visibles
+
+from ._seed import seed_donnees, transaction_annulee
+
+
+def _avant(membre):
+    """Querysets tels que les construisaient les viewsets avant la résolution par requête."""
+    projets_membre = Projet.objects.filter(Q(cree_par=membre) | Q(membres=membre))
+    return {
+        'projets': Projet.objects.filter(Q(cree_par=membre) | Q(membres=membre)).distinct(),
+        'taches': Tache.objects.filter(projet__in=projets_membre),
+        'fichiers': Fichier.objects.filter(projet__in=projets_membre),
+        'commentaires': Commentaire.objects.filter(tache__in=Tache.objects.filter(projet__in=projets_membre)),
+    }
+
+
+def _apres(membre):
+    ids = ids_projets_visibles(membre)
+    return {
+        'projets': Projet.objects.filter(id__in=ids),
+        'taches': Tache.objects.filter(projet_id__in=ids),
+        'fichiers': Fichier.objects.filter(projet_id__in=ids),
+        'commentaires': Commentaire.objects.filter(tache__projet_id__in=ids),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare, sur un jeu de données généré puis annulé, les plans d'exécution "
+        "(EXPLAIN QUERY PLAN) et les durées des querysets de visibilité des viewsets "
+        "avant et après la résolution des projets visibles une fois par requête."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projets', type=int, default=100)
+        parser.add_argument('--membres', type=int, default=500)
+        parser.add_argument('--taches', type=int, default=50000)
+        parser.add_argument('--commentaires', type=int, default=100000)
+        parser.add_argument('--repetitions', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction_annulee():
+            seed_donnees(
+                options['projets'], options['membres'], options['taches'],
+                nb_commentaires=options['commentaires'],
+            )
+            # Le membre qui participe au plus grand nombre de projets
+            membre = Membre.objects.filter(user__username__startswith='bench_membre_').annotate(
+                nombre=Count('projets_membre')
+            ).order_by('-nombre').first()
+            avant, apres = _avant(membre), _apres(membre)
+            for nom in avant:
+                self.stdout.write(self.style.MIGRATE_HEADING(nom))
+                for libelle, queryset in (('avant', avant[nom]), ('après', apres[nom])):
+                    duree, lignes = self.mesurer(queryset, options['repetitions'])
+                    self.stdout.write(f'  {libelle}: {lignes} lignes, {duree * 1000:.1f} ms')
+                    for ligne in self.plan(queryset):
+                        self.stdout.write(f'    {ligne}')
+
+    def mesurer(self, queryset, repetitions):
+        durees = []
+        for _ in range(repetitions):
+            debut = time.perf_counter()
+            lignes = len(list(queryset.values_list('id', flat=True)))
+            durees.append(time.perf_counter() - debut)
+        durees.sort()
+        return durees[len(durees) // 2], lignes
+
+    def plan(self, queryset):
+        sql, params = queryset.values_list('id', flat=True).query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [ligne[-1] for ligne in cursor.fetchall()]
@@ -0,0 +1,65 @@
+from django.core.files import File
+from django.core.management.base import BaseCommand
+
+from api.models import Contenu, Fichier
+from api.stockage import PREFIXE, empreinte_fichier, recalculer_references, stockage, supprimer_orphelins
+
+
+class Command(BaseCommand):
+    help = (
+        "Convertit les fichiers enregistrés avant le stockage adressé par le contenu "
+        "(un exemplaire par contenu), recompte les références et affiche l'espace récupéré."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--simuler',
+            action='store_true',
+            help="Calcule seulement l'espace qui serait récupéré, sans rien modifier.",
+        )
+
+    def handle(self, *args, **options):
+        anciens = (
+            Fichier.objects.exclude(fichier='').exclude(fichier__isnull=True)
+            .exclude(fichier__startswith=PREFIXE).order_by('id').values_list('id', 'fichier')
+        )
+        # Empreinte de chaque ancien fichier, lu une seule fois même s'il est partagé
+        empreintes, fichiers, manquants = {}, [], 0
+        for fichier_id, nom in anciens.iterator():
+            if nom not in empreintes:
+                if not stockage().exists(nom):
+                    self.stderr.write(f'Introuvable : {nom} (fichier {fichier_id})')
+                    manquants += 1
+                    continue
+                with stockage().open(nom) as contenu:
+                    empreintes[nom] = empreinte_fichier(contenu)
+            fichiers.append((fichier_id, nom))
+
+        tailles = {nom: stockage().size(nom) for nom in empreintes}
+        deja_stockees = set(Contenu.objects.filter(empreinte__in=set(empreintes.values())).values_list('pk', flat=True))
+        # Espace occupé ensuite : une fois chaque contenu qui n'est pas déjà stocké
+        ajoute = sum({empreintes[nom]: tailles[nom] for nom in empreintes if empreintes[nom] not in deja_stockees}.values())
+        recupere = sum(tailles.values()) - ajoute
+
+        if not options['simuler']:
+            convertis = {}
+            for fichier_id, nom in fichiers:
+                if nom not in convertis:
+                    with stockage().open(nom) as source:
+                        contenu = File(source, nom)
+                        contenu.sha256 = empreintes[nom]
+                        convertis[nom] = stockage().save(nom, contenu)
+                # update() : les références sont recomptées ensuite
+                Fichier.objects.filter(pk=fichier_id).update(fichier=convertis[nom])
+            for nom in convertis:
+                if not Fichier.objects.filter(fichier=nom).exists():
+                    stockage().delete(nom)
+            recalculer_references()
+            recupere += supprimer_orphelins()
+
+        self.stdout.write(
+            f'{len(fichiers)} fichier(s), {len(empreintes)} ancien(s) fichier(s) sur disque, '
+            f'{len(set(empreintes.values()))} contenu(s) distinct(s), {manquants} introuvable(s)'
+        )
+        verbe = 'seraient récupérés' if options['simuler'] else 'récupérés'
+        self.stdout.write(self.style.SUCCESS(f'{recupere} octet(s) {verbe}.'))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importation import CIBLES, FORMATS, importer_enregistrements, lire_fichier
+from api.models import Membre
+
+
+class Command(BaseCommand):
+    help = (
+        "Importe des projets ou des tâches depuis un fichier CSV ou NDJSON (mêmes "
+        "validations que l'API, insertion par lots) et affiche les lignes refusées."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('cible', choices=sorted(CIBLES))
+        parser.add_argument('fichier')
+        parser.add_argument('--type', choices=FORMATS, help="Format du fichier (par défaut : d'après l'extension).")
+        parser.add_argument(
+            '--membre',
+            required=True,
+            help="Nom d'utilisateur du membre pour le compte duquel l'import est fait (créateur par défaut des projets).",
+        )
+        parser.add_argument('--taille-lot', type=int, default=None, help='Lignes insérées par transaction.')
+
+    def handle(self, *args, **options):
+        format_fichier = options['type'] or options['fichier'].rsplit('.', 1)[-1].lower()
+        if format_fichier not in FORMATS:
+            raise CommandError(f"Format inconnu : utilisez --type ({', '.join(FORMATS)}).")
+        try:
+            membre = Membre.objects.get(user__username=options['membre'])
+        except Membre.DoesNotExist:
+            raise CommandError(f"Membre introuvable : {options['membre']}")
+
+        with open(options['fichier'], 'rb') as fichier:
+            rapport = importer_enregistrements(
+                lire_fichier(fichier, format_fichier), options['cible'], membre,
+                taille_lot=options['taille_lot'],
+            )
+
+        for erreur in rapport['erreurs']:
+            self.stdout.write(self.style.ERROR(f"ligne {erreur['ligne']} : {erreur['errors']}"))
+        self.stdout.write(
+            f"{rapport['lignes']} ligne(s) lue(s), {rapport['creees']} créée(s), "
+            f"{len(rapport['erreurs'])} refusée(s)."
+        )
+        if rapport['erreurs']:
+            raise CommandError('Certaines lignes ont été refusées.')
+        self.stdout.write(self.style.SUCCESS('Import terminé.'))
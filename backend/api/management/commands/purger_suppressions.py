@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import Suppression
+
+
+class Command(BaseCommand):
+    help = (
+        "Supprime les traces de suppression plus anciennes que la rétention de la "
+        "synchronisation incrémentale (les curseurs plus anciens reçoivent déjà 410)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--jours',
+            type=int,
+            default=None,
+            help='Âge minimal des traces supprimées (par défaut : SYNC_RETENTION_JOURS).',
+        )
+
+    def handle(self, *args, **options):
+        jours = options['jours'] if options['jours'] is not None else getattr(settings, 'SYNC_RETENTION_JOURS', 30)
+        nombre, _ = Suppression.objects.filter(date__lt=timezone.now() - timedelta(days=jours)).delete()
+        self.stdout.write(self.style.SUCCESS(f'{nombre} trace(s) de suppression supprimée(s).'))
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import Televersement
+from api.televersement import supprimer
+
+
+class Command(BaseCommand):
+    help = (
+        "Supprime les téléversements en plusieurs parties abandonnés (ouverts depuis "
+        "plus de --heures heures) et les parties déjà reçues sur disque."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--heures', type=int, default=24, help='Âge minimal des téléversements supprimés.')
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(hours=options['heures'])
+        nombre = 0
+        for televersement in Televersement.objects.filter(date_creation__lt=limite).iterator():
+            supprimer(televersement)
+            nombre += 1
+        self.stdout.write(self.style.SUCCESS(f'{nombre} téléversement(s) supprimé(s).'))
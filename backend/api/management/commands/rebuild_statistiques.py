@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.compteurs import recalculer_statistiques
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule depuis la table des tâches les compteurs matérialisés par projet "
+        "et par membre, et signale les lignes qui divergeaient."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verifier',
+            action='store_true',
+            help="Vérifie seulement les divergences sans modifier les compteurs (code de sortie non nul en cas d'écart).",
+        )
+
+    def handle(self, *args, **options):
+        ecarts = recalculer_statistiques(corriger=not options['verifier'])
+        for modele, nombre in ecarts.items():
+            self.stdout.write(f'{modele}: {nombre} ligne(s) divergente(s)')
+        if options['verifier'] and any(ecarts.values()):
+            raise CommandError('Les compteurs divergent de la table des tâches.')
+        if not options['verifier']:
+            self.stdout.write(self.style.SUCCESS('Compteurs recalculés.'))
@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.routage import copier_base
+
+
+class Command(BaseCommand):
+    help = (
+        "Copie la base principale SQLite dans chaque réplique de DATABASE_REPLIQUES "
+        "(PROMANAGER_DB_REPLIQUES), une fois ou à intervalle régulier."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalle',
+            type=float,
+            default=0,
+            help='Recommence toutes les N secondes (0 : une seule copie). Garder REPLIQUES_DELAI au-dessus.',
+        )
+
+    def handle(self, *args, **options):
+        principale = settings.DATABASES['default']
+        if not settings.DATABASE_REPLIQUES:
+            raise CommandError('Aucune réplique configurée (PROMANAGER_DB_REPLIQUES).')
+        if principale['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('La copie des répliques ne concerne que SQLite : utiliser la réplication du serveur.')
+        while True:
+            for alias in settings.DATABASE_REPLIQUES:
+                debut = time.perf_counter()
+                copier_base(principale['NAME'], settings.DATABASES[alias]['NAME'])
+                self.stdout.write(f'{alias} : copiée en {(time.perf_counter() - debut) * 1000:.0f} ms')
+            if not options['intervalle']:
+                break
+            time.sleep(options['intervalle'])
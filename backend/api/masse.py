@@ -0,0 +1,130 @@
+"""
+Opérations en masse sur les tâches : création, changement de statut et
+assignation de plusieurs tâches en une seule requête.
+
+Les contrôles (tâches visibles, droits, membres existants) portent sur
+l'ensemble des éléments en quelques requêtes, les écritures passent par
+bulk_create / bulk_update dans une seule transaction et chaque élément reçoit
+son propre résultat. bulk_create et bulk_update n'émettent pas les signaux de
+Tache : les compteurs et le cache des tableaux de bord sont tenus à jour ici.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .cache_dashboard import invalider
+from .compteurs import appliquer_changements
+from .evenements import publier_taches
+from .models import Tache
+from .signals import portees_tache
+
+# Colonnes chargées pour modifier une tâche : celles que suivent les compteurs
+CHAMPS_CHARGES = ('id', 'projet', 'assignee', 'statut', 'date_fin')
+
+
+def lire_elements(data, cle='taches'):
+    """Liste d'éléments envoyée sous `cle` ; lève ValueError si elle est absente, vide ou trop longue."""
+    elements = data.get(cle) if hasattr(data, 'get') else None
+    if not isinstance(elements, list) or not elements:
+        raise ValueError(f'{cle} doit être une liste non vide')
+    maximum = getattr(settings, 'TACHES_MAX_PAR_LOT', 500)
+    if len(elements) > maximum:
+        raise ValueError(f'Au plus {maximum} éléments par requête')
+    return elements
+
+
+def enregistrer_changements(changements):
+    """Répercute des paires (avant, apres) sur les compteurs et le cache, comme le feraient les signaux."""
+    if changements:
+        appliquer_changements(changements)
+        invalider(*portees_tache(*[etat for paire in changements for etat in paire]))
+
+
+def _lire_id(element):
+    try:
+        return int(element['id'])
+    except (TypeError, KeyError, ValueError):
+        return None
+
+
+def modifier_taches(taches, elements, champ, valider, autoriser=None):
+    """
+    Donne à `champ` la valeur demandée pour chaque élément `{'id': ..., ...}`.
+
+    `taches` est le queryset des tâches modifiables (déjà restreint aux projets
+    visibles), `valider(element)` retourne `(valeur, erreur)` et
+    `autoriser(tache)` un message d'erreur ou None. Les tâches qui ont déjà la
+    valeur demandée ne sont pas réécrites. Retourne `(resultats, modifiees)`.
+    """
+    attname = Tache._meta.get_field(champ).attname
+    resultats = []
+    demandes = {}
+    for element in elements:
+        tache_id = _lire_id(element)
+        if tache_id is None:
+            resultats.append({'id': None, 'error': 'id requis'})
+            continue
+        if tache_id in demandes:
+            resultats.append({'id': tache_id, 'error': 'Tâche en double dans la requête'})
+            continue
+        valeur, erreur = valider(element)
+        if erreur:
+            resultats.append({'id': tache_id, 'error': erreur})
+            continue
+        demandes[tache_id] = (len(resultats), valeur)
+        resultats.append(None)
+
+    with transaction.atomic():
+        instances = taches.filter(id__in=demandes).only(*CHAMPS_CHARGES).in_bulk()
+        modifiees, changements = [], []
+        for tache_id, (position, valeur) in demandes.items():
+            tache = instances.get(tache_id)
+            erreur = 'Tâche non trouvée' if tache is None else autoriser and autoriser(tache)
+            if erreur:
+                resultats[position] = {'id': tache_id, 'error': erreur}
+                continue
+            resultats[position] = {'id': tache_id, 'success': True}
+            if getattr(tache, attname) == valeur:
+                continue
+            avant = tache.etat_statistiques()
+            setattr(tache, attname, valeur)
+            modifiees.append(tache)
+            changements.append((avant, tache.etat_statistiques()))
+        if modifiees:
+            # bulk_update ne renseigne pas les champs auto_now
+            maintenant = timezone.now()
+            for tache in modifiees:
+                tache.updated_at = maintenant
+            Tache.objects.bulk_update(modifiees, [champ, 'updated_at'])
+            enregistrer_changements(changements)
+            publier_taches(modifiees, 'modifie')
+    return resultats, len(modifiees)
+
+
+def creer_taches(elements, serializer_class, context, projets_ids=None):
+    """
+    Valide chaque élément avec `serializer_class` et crée les tâches valides en
+    un bulk_create. `projets_ids` (None : tous) limite les projets autorisés.
+    Retourne la liste des résultats, dans l'ordre des éléments.
+    """
+    resultats, valides = [], []
+    for index, element in enumerate(elements):
+        serializer = serializer_class(data=element, context=context)
+        if not serializer.is_valid():
+            resultats.append({'index': index, 'errors': serializer.errors})
+            continue
+        tache = Tache(**serializer.validated_data)
+        if projets_ids is not None and tache.projet_id not in projets_ids:
+            resultats.append({'index': index, 'errors': {'projet': ['Projet non autorisé']}})
+            continue
+        valides.append((len(resultats), tache))
+        resultats.append(None)
+
+    if valides:
+        with transaction.atomic():
+            creees = Tache.objects.bulk_create([tache for _, tache in valides])
+            enregistrer_changements([(None, tache.etat_statistiques()) for tache in creees])
+            publier_taches(creees, 'modifie')
+    for position, tache in valides:
+        resultats[position] = {'index': position, 'success': True, 'id': tache.id}
+    return resultats
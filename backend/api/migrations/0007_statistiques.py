@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_membre_archived_at_membre_is_active'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatistiquesMembre',
+            fields=[
+                ('taches_total', models.IntegerField(default=0)),
+                ('taches_en_attente', models.IntegerField(default=0)),
+                ('taches_en_cours', models.IntegerField(default=0)),
+                ('taches_terminees', models.IntegerField(default=0)),
+                ('taches_annulees', models.IntegerField(default=0)),
+                ('taches_retard', models.IntegerField(default=0)),
+                ('retard_calcule_le', models.DateField()),
+                ('membre', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='statistiques', serialize=False, to='api.membre')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='StatistiquesProjet',
+            fields=[
+                ('taches_total', models.IntegerField(default=0)),
+                ('taches_en_attente', models.IntegerField(default=0)),
+                ('taches_en_cours', models.IntegerField(default=0)),
+                ('taches_terminees', models.IntegerField(default=0)),
+                ('taches_annulees', models.IntegerField(default=0)),
+                ('taches_retard', models.IntegerField(default=0)),
+                ('retard_calcule_le', models.DateField()),
+                ('projet', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='statistiques', serialize=False, to='api.projet')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
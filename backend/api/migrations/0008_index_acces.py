@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_statistiques'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='commentaire',
+            index=models.Index(fields=['tache', 'date'], name='commentaire_tache_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='membre',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['id'], name='membre_actif_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(fields=['date_fin'], name='tache_date_fin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(fields=['statut', 'date_fin'], name='tache_statut_date_fin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(fields=['projet', 'statut'], name='tache_projet_statut_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(fields=['projet', 'date_debut'], name='tache_projet_date_debut_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(fields=['assignee', 'statut'], name='tache_assignee_statut_idx'),
+        ),
+    ]
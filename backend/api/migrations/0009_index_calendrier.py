@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_index_acces'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='projet',
+            index=models.Index(fields=['date_debut'], name='projet_date_debut_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projet',
+            index=models.Index(fields=['date_fin'], name='projet_date_fin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tache',
+            index=models.Index(fields=['date_debut'], name='tache_date_debut_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_index_calendrier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='membre',
+            name='version_jetons',
+            field=models.PositiveIntegerField(default=0, verbose_name='Version des jetons'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:07
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_version_jetons'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Televersement',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('nom', models.CharField(max_length=100)),
+                ('taille', models.BigIntegerField()),
+                ('taille_part', models.PositiveIntegerField()),
+                ('sha256', models.CharField(blank=True, default='', max_length=64)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('cree_par', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='televersements', to='api.membre')),
+                ('projet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='televersements', to='api.projet')),
+            ],
+        ),
+    ]
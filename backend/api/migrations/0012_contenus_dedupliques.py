@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:10
+
+import api.stockage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_televersement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Contenu',
+            fields=[
+                ('empreinte', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('nom', models.CharField(max_length=100, unique=True)),
+                ('taille', models.BigIntegerField()),
+                ('references', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='fichier',
+            name='fichier',
+            field=models.FileField(blank=True, null=True, storage=api.stockage.StockageContenu(), upload_to='fichiers/'),
+        ),
+    ]
@@ -1,7 +1,11 @@
+import uuid
+
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
+from .stockage import StockageContenu
+
 class Membre(models.Model):
     ROLE_CHOICES = [
         ("ADMIN", "Administrateur"),
@@ -14,12 +18,19 @@ class Membre(models.Model):
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default="MEMBRE", verbose_name="Rôle du Membre")
     is_active = models.BooleanField(default=True, verbose_name="Compte actif")
     archived_at = models.DateTimeField(null=True, blank=True, verbose_name="Date d'archivage")
+    # Incrémenté pour révoquer les jetons JWT émis avant (archivage, changement de rôle)
+    version_jetons = models.PositiveIntegerField(default=0, verbose_name="Version des jetons")
 
     class Meta:
         verbose_name = "Membre"
         verbose_name_plural = "Membres"
         db_table = 'MEMBRES'
         ordering = ['nom']  # correspond au champ 'nom' défini ci-dessus
+        indexes = [
+            # Liste des membres actifs (MembreViewSet) : Django génère `WHERE "is_active"`
+            # sans comparaison, qu'un index partiel de même condition peut servir
+            models.Index(fields=['id'], condition=models.Q(is_active=True), name='membre_actif_idx'),
+        ]
 
     def __str__(self):
         return f"{self.nom} (User: {self.user.username})"
@@ -33,6 +44,15 @@ class Projet(models.Model):
     statut = models.CharField(max_length=50)
     cree_par = models.ForeignKey(Membre, on_delete=models.CASCADE, related_name="projets")
     membres = models.ManyToManyField(Membre, related_name="projets_membre", blank=True)
+    # Synchronisation incrémentale (?since=, voir synchro.py)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Calendrier : projets qui recoupent une fenêtre de dates
+            models.Index(fields=['date_debut'], name='projet_date_debut_idx'),
+            models.Index(fields=['date_fin'], name='projet_date_fin_idx'),
+        ]
 
     def __str__(self):
         return self.nom
@@ -47,26 +67,145 @@ class Tache(models.Model):
     priorite = models.CharField(max_length=50)
     projet = models.ForeignKey(Projet, on_delete=models.CASCADE, related_name="taches")
     assignee = models.ForeignKey(Membre, on_delete=models.SET_NULL, null=True, blank=True, related_name="taches_assignees")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Champs dont dépendent les compteurs de StatistiquesProjet / StatistiquesMembre
+    CHAMPS_STATISTIQUES = ('projet_id', 'assignee_id', 'statut', 'date_fin')
+
+    class Meta:
+        indexes = [
+            # Tâches à venir (date_fin >= aujourd'hui triées par échéance) et tâches en retard
+            models.Index(fields=['date_fin'], name='tache_date_fin_idx'),
+            # Calendrier : recoupement date_debut <= fin AND date_fin >= debut
+            models.Index(fields=['date_debut'], name='tache_date_debut_idx'),
+            # Comptages par statut, globaux et en retard (statut puis échéance)
+            models.Index(fields=['statut', 'date_fin'], name='tache_statut_date_fin_idx'),
+            # Comptages par statut des projets d'un chef et activités récentes
+            models.Index(fields=['projet', 'statut'], name='tache_projet_statut_idx'),
+            models.Index(fields=['projet', 'date_debut'], name='tache_projet_date_debut_idx'),
+            # Tâches d'un membre par statut (tableau de bord membre, profil)
+            models.Index(fields=['assignee', 'statut'], name='tache_assignee_statut_idx'),
+        ]
 
     def __str__(self):
         return self.nom
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._etat_initial = instance.etat_statistiques()
+        return instance
+
+    def etat_statistiques(self):
+        """Valeurs des champs suivis par les compteurs, ou None si l'un d'eux n'est pas chargé."""
+        if any(champ not in self.__dict__ for champ in self.CHAMPS_STATISTIQUES):
+            return None
+        return tuple(self.__dict__[champ] for champ in self.CHAMPS_STATISTIQUES)
+
 
 class Fichier(models.Model):
     nom = models.CharField(max_length=100)
-    fichier = models.FileField(upload_to='fichiers/', null=True, blank=True)
+    # Contenus dédupliqués : voir stockage.py
+    fichier = models.FileField(upload_to='fichiers/', storage=StockageContenu(), null=True, blank=True)
     date_partage = models.DateField()
     projet = models.ForeignKey(Projet, on_delete=models.CASCADE, related_name="fichiers")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return self.nom
+
+    def save(self, *args, **kwargs):
+        # Contenu stocké, référence comptée (signaux) et Fichier validés ensemble : voir stockage.py
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class Contenu(models.Model):
+    """Contenu stocké une seule fois, partagé par les Fichier qui ont la même empreinte."""
+    empreinte = models.CharField(max_length=64, primary_key=True)
+    nom = models.CharField(max_length=100, unique=True)
+    taille = models.BigIntegerField()
+    # Nombre de Fichier qui pointent vers ce contenu (tenu à jour par les signaux)
+    references = models.IntegerField(default=0)
 
     def __str__(self):
         return self.nom
 
 
+class Televersement(models.Model):
+    """Téléversement d'un fichier en plusieurs parties, en cours (voir televersement.py)."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    nom = models.CharField(max_length=100)
+    projet = models.ForeignKey(Projet, on_delete=models.CASCADE, related_name="televersements")
+    cree_par = models.ForeignKey(Membre, on_delete=models.CASCADE, related_name="televersements")
+    taille = models.BigIntegerField()
+    taille_part = models.PositiveIntegerField()
+    # Empreinte SHA-256 (hexadécimale) attendue pour le fichier complet, facultative
+    sha256 = models.CharField(max_length=64, blank=True, default='')
+    date_creation = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.nom} ({self.id})"
+
+
 class Commentaire(models.Model):
     contenu = models.TextField()
     date = models.DateTimeField(auto_now_add=True)
     tache = models.ForeignKey(Tache, on_delete=models.CASCADE, related_name="commentaires")
     auteur = models.ForeignKey(Membre, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Commentaires d'une tâche dans l'ordre chronologique
+            models.Index(fields=['tache', 'date'], name='commentaire_tache_date_idx'),
+        ]
 
     def __str__(self):
         return f"Commentaire de {self.auteur.nom} sur {self.tache.nom}"
+
+
+class Suppression(models.Model):
+    """Trace d'un objet supprimé, lue par la synchronisation incrémentale (voir synchro.py)."""
+    modele = models.CharField(max_length=20)
+    objet_id = models.IntegerField()
+    # Projet de l'objet (pas de clé étrangère : le projet a pu être supprimé aussi)
+    projet_id = models.IntegerField(null=True)
+    date = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['modele', 'date'], name='suppression_modele_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.modele} {self.objet_id}"
+
+
+class StatistiquesTaches(models.Model):
+    """Compteurs de tâches dénormalisés, tenus à jour par les signaux de Tache."""
+    taches_total = models.IntegerField(default=0)
+    taches_en_attente = models.IntegerField(default=0)
+    taches_en_cours = models.IntegerField(default=0)
+    taches_terminees = models.IntegerField(default=0)
+    taches_annulees = models.IntegerField(default=0)
+    taches_retard = models.IntegerField(default=0)
+    # Le retard dépend de la date du jour : il est recalculé quand cette date est dépassée
+    retard_calcule_le = models.DateField()
+
+    class Meta:
+        abstract = True
+
+
+class StatistiquesProjet(StatistiquesTaches):
+    projet = models.OneToOneField(Projet, on_delete=models.CASCADE, primary_key=True, related_name="statistiques")
+
+    def __str__(self):
+        return f"Statistiques de {self.projet_id}"
+
+
+class StatistiquesMembre(StatistiquesTaches):
+    membre = models.OneToOneField(Membre, on_delete=models.CASCADE, primary_key=True, related_name="statistiques")
+
+    def __str__(self):
+        return f"Statistiques de {self.membre_id}"
@@ -0,0 +1,16 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class CurseurPagination(CursorPagination):
+    """
+    Pagination par curseur (keyset) sur la clé primaire : chaque page est lue par
+    `id > dernier id vu`, son coût ne dépend donc pas de sa position dans la table.
+    Réponse : {"next": <url|null>, "previous": <url|null>, "results": [...]}.
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+
+    @property
+    def max_page_size(self):
+        return getattr(settings, 'API_MAX_PAGE_SIZE', 500)
@@ -0,0 +1,124 @@
+"""
+Lecture rapide des listes : les lignes sont lues avec queryset.values() (les
+sources pointées comme `assignee.nom` par des annotations F() jointes) puis
+converties par les champs du serializer eux-mêmes, sans instancier de modèle
+ni appeler le serializer pour chaque ligne. Le résultat est identique à celui
+du serializer ; les serializers dont un champ n'est pas pris en charge
+(méthode, serializer imbriqué, relation multiple, fichier) gardent le
+chemin habituel.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F
+from rest_framework import serializers
+from rest_framework.response import Response
+
+# Champs dont to_representation() accepte directement la valeur lue par values()
+CHAMPS_PRIS_EN_CHARGE = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.DateField,
+    serializers.DateTimeField,
+    serializers.IntegerField,
+)
+
+
+def _colonne(modele, source):
+    """
+    (colonne à lire, colonne de la clé étrangère à tester ou None) pour une
+    source de champ, ou None si la source n'est pas une colonne du modèle.
+    """
+    attributs = source.split('.')
+    courant = modele
+    for position, attribut in enumerate(attributs):
+        try:
+            champ = courant._meta.get_field(attribut)
+        except FieldDoesNotExist:
+            return None
+        if champ.many_to_many or champ.one_to_many:
+            return None
+        if position < len(attributs) - 1:
+            if not champ.is_relation:
+                return None
+            courant = champ.related_model
+    cle_etrangere = attributs[0] if len(attributs) > 1 else None
+    return '__'.join(attributs), cle_etrangere
+
+
+def plan_de_lecture(serializer, modele):
+    """
+    Pour chaque champ lisible : (nom, colonne, clé étrangère, conversion). None
+    si un des champs n'est pas pris en charge par la lecture rapide.
+    """
+    plan = []
+    for champ in serializer._readable_fields:
+        if champ.source == '*':
+            return None
+        colonne = _colonne(modele, champ.source)
+        if colonne is None:
+            return None
+        if isinstance(champ, serializers.PrimaryKeyRelatedField):
+            conversion = None
+        elif isinstance(champ, CHAMPS_PRIS_EN_CHARGE):
+            conversion = champ.to_representation
+        else:
+            return None
+        plan.append((champ.field_name, *colonne, conversion))
+    return plan
+
+
+def _alias(colonne):
+    """Nom de l'annotation portant une colonne jointe (`assignee__nom` -> `_assignee_nom`)."""
+    return '_' + colonne.replace('__', '_')
+
+
+def lire_lignes(queryset, plan):
+    """
+    Queryset de dictionnaires portant une clé par colonne du plan, plus la clé
+    primaire même si les champs demandés (?fields=, ?omit=) l'excluent : la
+    pagination par curseur la lit pour construire le lien suivant. Elle ne
+    figure dans la réponse que si le plan la contient.
+    """
+    colonnes = {queryset.model._meta.pk.attname}
+    for _, colonne, cle_etrangere, _ in plan:
+        colonnes.add(colonne)
+        if cle_etrangere:
+            colonnes.add(cle_etrangere)
+    simples = [c for c in colonnes if '__' not in c]
+    jointes = {_alias(c): F(c) for c in colonnes if '__' in c}
+    return queryset.values(*simples, **jointes)
+
+
+def representer_ligne(ligne, plan):
+    """Dictionnaire identique à celui que produirait le serializer pour une ligne."""
+    ret = {}
+    for nom, colonne, cle_etrangere, conversion in plan:
+        if cle_etrangere is not None:
+            if ligne[cle_etrangere] is None:
+                # Le serializer saute un champ non requis dont un attribut intermédiaire est None
+                continue
+            valeur = ligne[_alias(colonne)]
+        else:
+            valeur = ligne[colonne]
+        ret[nom] = valeur if valeur is None or conversion is None else conversion(valeur)
+    return ret
+
+
+def representer(lignes, plan):
+    """Dictionnaires identiques à ceux que produirait le serializer."""
+    return [representer_ligne(ligne, plan) for ligne in lignes]
+
+
+class ListeRapideMixin:
+    """Pour un viewset : sert `list` par la lecture rapide quand le serializer le permet."""
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        plan = plan_de_lecture(self.get_serializer(), queryset.model)
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+        lignes = lire_lignes(queryset, plan)
+        page = self.paginate_queryset(lignes)
+        if page is not None:
+            return self.get_paginated_response(representer(page, plan))
+        return Response(representer(lignes, plan))
@@ -0,0 +1,30 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # orjson est optionnel : repli sur le rendu de DRF (json de la bibliothèque standard)
+    orjson = None
+
+# Dates et heures confiées à l'encodeur de DRF pour garder exactement son format
+OPTIONS_ORJSON = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+
+class RapideJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer qui encode avec orjson quand il est installé, en produisant
+    les mêmes octets que JSONRenderer (sortie compacte, non ASCII). Se replie
+    sur JSONRenderer pour les sorties indentées ou sans orjson.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or not self.compact or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=OPTIONS_ORJSON)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Comme JSONRenderer : \u2028 et \u2029 toujours échappés
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
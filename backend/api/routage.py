@@ -0,0 +1,152 @@
+"""
+Répartition des requêtes entre la base principale et des répliques en lecture.
+
+Les écritures et les migrations vont toujours sur 'default'. Pendant une
+requête HTTP, les lectures vont sur une des répliques de DATABASE_REPLIQUES,
+tirée au hasard une fois par requête pour que ses lectures restent cohérentes
+entre elles. Elles restent sur 'default' :
+
+- dans une transaction, pour qu'elle voie ses propres écritures ;
+- pour les requêtes qui modifient (POST, PUT, PATCH, DELETE) ;
+- après une écriture dans la même requête ;
+- pendant REPLIQUES_DELAI secondes après une écriture du même client. Le
+  client est reconnu à son en-tête Authorization, à défaut sa session ou son
+  adresse. LectureApresEcritureMiddleware retient cette fenêtre dans le cache,
+  partagé entre processus avec PROMANAGER_CACHE=file ou db.
+
+En dehors d'une requête (commandes, tâches de fond), tout passe par 'default'.
+
+Une réponse de tableau de bord calculée sur une réplique n'est gardée en cache
+que REPLIQUES_DELAI secondes, et servie sans ETag (voir cache_dashboard.py) :
+elle peut avoir le retard de la réplique, mais pas plus longtemps. Les projets
+visibles, gardés plus longtemps, sont toujours lus sur la base principale (voir
+visibilite.py).
+
+En local, les répliques sont des copies de la base SQLite tenues à jour par
+`manage.py synchroniser_repliques`. Voir PROMANAGER_DB_REPLIQUES dans les
+settings.
+"""
+import contextvars
+import hashlib
+import random
+import sqlite3
+from contextlib import closing
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+METHODES_SURES = ('GET', 'HEAD', 'OPTIONS')
+
+
+class EtatRoutage:
+    """Routage d'une requête : partagé (objet mutable) avec les threads lancés par sync_to_async."""
+
+    def __init__(self, primaire):
+        self.primaire = primaire
+        self.ecrit = False
+        self.replique = None
+
+
+_etat = contextvars.ContextVar('routage', default=None)
+
+
+def repliques():
+    return getattr(settings, 'DATABASE_REPLIQUES', [])
+
+
+def lit_sur_replique():
+    """Vrai si la requête en cours a lu sur une réplique."""
+    etat = _etat.get()
+    return etat is not None and etat.replique is not None
+
+
+class RouteurLectureEcriture:
+    def db_for_read(self, model, **hints):
+        etat = _etat.get()
+        if etat is None or etat.primaire or not repliques() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if etat.replique is None:
+            etat.replique = random.choice(repliques())
+        return etat.replique
+
+    def db_for_write(self, model, **hints):
+        etat = _etat.get()
+        if etat is not None:
+            # Lire ensuite ce qu'on vient d'écrire
+            etat.primaire = etat.ecrit = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        bases = {DEFAULT_DB_ALIAS, *repliques()}
+        if obj1._state.db in bases and obj2._state.db in bases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Les répliques reçoivent le schéma avec la copie de la base
+        if db in repliques():
+            return False
+        return None
+
+
+def cle_client(request):
+    source = (
+        request.headers.get('Authorization')
+        or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        or request.META.get('REMOTE_ADDR')
+    )
+    if not source:
+        return None
+    return 'routage:primaire:' + hashlib.sha256(source.encode()).hexdigest()
+
+
+class LectureApresEcritureMiddleware:
+    """Applique les règles de routage à chaque requête et retient les écritures de chaque client."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def debut(self, request):
+        cle = cle_client(request) if repliques() else None
+        primaire = request.method not in METHODES_SURES or (cle is not None and cache.get(cle) is not None)
+        etat = EtatRoutage(primaire)
+        return cle, etat, _etat.set(etat)
+
+    def fin(self, cle, etat, jeton):
+        _etat.reset(jeton)
+        if etat.ecrit and cle is not None:
+            cache.set(cle, 1, getattr(settings, 'REPLIQUES_DELAI', 10))
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        cle, etat, jeton = self.debut(request)
+        try:
+            return self.get_response(request)
+        finally:
+            self.fin(cle, etat, jeton)
+
+    async def __acall__(self, request):
+        cle, etat, jeton = self.debut(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            self.fin(cle, etat, jeton)
+
+
+def copier_base(source, destination):
+    """
+    Copie la base SQLite `source` dans `destination` avec l'API de sauvegarde
+    de SQLite. La copie voit un état cohérent de la source, même pendant des
+    écritures, et les lecteurs de la destination voient l'ancienne ou la
+    nouvelle version, jamais un mélange.
+    """
+    with closing(sqlite3.connect(source)) as depart, closing(sqlite3.connect(destination)) as arrivee:
+        depart.backup(arrivee)
@@ -1,25 +1,30 @@
 from rest_framework import serializers
-from .models import Membre, Projet, Tache, Fichier, Commentaire
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from django.conf import settings
+from .models import Membre, Projet, Tache, Fichier, Commentaire, Televersement
+from .champs import ChampsDynamiquesMixin
+from .authentification import claims_membre, version_jetons
 
-class MembreSerializer(serializers.ModelSerializer):
+class MembreSerializer(ChampsDynamiquesMixin, serializers.ModelSerializer):
     class Meta:
         model = Membre
-        fields = '__all__'
+        exclude = ['version_jetons']
 
-class MembreDetailSerializer(serializers.ModelSerializer):
+class MembreDetailSerializer(ChampsDynamiquesMixin, serializers.ModelSerializer):
     user_email = serializers.CharField(source='user.email', read_only=True)
     user_username = serializers.CharField(source='user.username', read_only=True)
     
     class Meta:
         model = Membre
-        fields = '__all__'
+        exclude = ['version_jetons']
 
-class ProjetSerializer(serializers.ModelSerializer):
+class ProjetSerializer(ChampsDynamiquesMixin, serializers.ModelSerializer):
     class Meta:
         model = Projet
         fields = '__all__'
 
-class TacheSerializer(serializers.ModelSerializer):
+class TacheSerializer(ChampsDynamiquesMixin, serializers.ModelSerializer):
     assignee_nom = serializers.CharField(source='assignee.nom', read_only=True)
     projet_nom = serializers.CharField(source='projet.nom', read_only=True)
     
@@ -27,7 +32,7 @@ class TacheSerializer(serializers.ModelSerializer):
         model = Tache
         fields = '__all__'
 
-class TacheDetailSerializer(serializers.ModelSerializer):
+class TacheDetailSerializer(ChampsDynamiquesMixin, serializers.ModelSerializer):
     assignee = MembreSerializer(read_only=True)
     projet_nom = serializers.CharField(source='projet.nom', read_only=True)
     
@@ -35,19 +40,47 @@ class TacheDetailSerializer(serializers.ModelSerializer):
         model = Tache
         fields = '__all__'
 
-class FichierSerializer(serializers.ModelSerializer):
+class FichierSerializer(ChampsDynamiquesMixin, serializers.ModelSerializer):
     class Meta:
         model = Fichier
         fields = '__all__'
 
-class CommentaireSerializer(serializers.ModelSerializer):
+class TeleversementSerializer(serializers.ModelSerializer):
+    parts_recues = serializers.SerializerMethodField()
+    nombre_parts = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Televersement
+        fields = ['id', 'nom', 'projet', 'taille', 'sha256', 'taille_part', 'nombre_parts', 'parts_recues', 'date_creation']
+        read_only_fields = ['taille_part']
+
+    def get_parts_recues(self, obj):
+        from .televersement import parts_recues
+        return parts_recues(obj)
+
+    def get_nombre_parts(self, obj):
+        from .televersement import nombre_parts
+        return nombre_parts(obj)
+
+    def validate_taille(self, value):
+        maximum = getattr(settings, 'TELEVERSEMENT_TAILLE_MAX', 20 * 1024 ** 3)
+        if not 0 < value <= maximum:
+            raise serializers.ValidationError(f'La taille doit être comprise entre 1 et {maximum} octets.')
+        return value
+
+    def validate_sha256(self, value):
+        if value and (len(value) != 64 or any(c not in '0123456789abcdefABCDEF' for c in value)):
+            raise serializers.ValidationError('Empreinte SHA-256 hexadécimale attendue.')
+        return value.lower()
+
+class CommentaireSerializer(ChampsDynamiquesMixin, serializers.ModelSerializer):
     auteur_nom = serializers.CharField(source='auteur.nom', read_only=True)
     
     class Meta:
         model = Commentaire
         fields = '__all__'
 
-class ProjetDetailSerializer(serializers.ModelSerializer):
+class ProjetDetailSerializer(ChampsDynamiquesMixin, serializers.ModelSerializer):
     membres = serializers.SerializerMethodField()
     taches = TacheSerializer(many=True, read_only=True)
     cree_par = MembreSerializer(read_only=True)
@@ -65,3 +98,33 @@ class ProjetDetailSerializer(serializers.ModelSerializer):
         model = Projet
         fields = '__all__'
         depth = 1
+
+
+class MembreTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Ajoute au jeton le rôle, l'id du membre, son état et la version de ses jetons."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        # Un utilisateur sans profil (créé hors de l'inscription) reçoit un profil MEMBRE
+        membre, _ = Membre.objects.get_or_create(user=user, defaults={'nom': user.username, 'role': 'MEMBRE'})
+        for cle, valeur in claims_membre(membre).items():
+            token[cle] = valeur
+        return token
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        membre = self.user.membre_profile
+        data.update(user_id=self.user.id, membre_id=membre.id, role=membre.role)
+        return data
+
+
+class MembreTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refuse de rafraîchir un jeton révoqué (version antérieure à celle du membre)."""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        membre_id = refresh.get('membre_id')
+        if membre_id is not None and refresh.get('version') != version_jetons(membre_id):
+            raise AuthenticationFailed('Jeton révoqué', code='token_revoked')
+        return super().validate(attrs)
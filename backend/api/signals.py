@@ -0,0 +1,224 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .authentification import oublier_utilisateur
+from .cache_dashboard import invalider
+from .compteurs import appliquer_changement
+from .models import Commentaire, Fichier, Membre, Projet, Tache
+from .stockage import ajuster_references
+from .synchro import ecrire_suppressions, tracer_suppression
+from .evenements import publier
+
+
+def portees_tache(*etats):
+    """Portées du cache des tableaux de bord concernées par une tâche dans les états donnés."""
+    portees = ['global']
+    for etat in etats:
+        if etat is None:
+            continue
+        projet_id, assignee_id = etat[0], etat[1]
+        portees.append(f'projet:{projet_id}')
+        if assignee_id is not None:
+            portees.append(f'membre:{assignee_id}')
+    return portees
+
+
+def _portees_membre(membre_id):
+    projets_ids = Projet.objects.filter(
+        Q(cree_par_id=membre_id) | Q(membres=membre_id)
+    ).values_list('id', flat=True).distinct()
+    return [f'membre:{membre_id}'] + [f'projet:{projet_id}' for projet_id in projets_ids]
+
+
+def _portees_projet(projet):
+    membres_ids = projet.membres.values_list('id', flat=True)
+    return ['global', f'projet:{projet.pk}', f'membre:{projet.cree_par_id}'] + [
+        f'membre:{membre_id}' for membre_id in membres_ids
+    ]
+
+
+@receiver(pre_save, sender=Tache)
+def tache_avant_sauvegarde(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if instance.pk is None:
+        instance._etat_initial = None
+    elif instance._state.adding or getattr(instance, '_etat_initial', None) is None:
+        # Instance non chargée depuis la base (ou champs différés) : lire l'état enregistré
+        instance._etat_initial = Tache.objects.filter(pk=instance.pk).values_list(
+            *Tache.CHAMPS_STATISTIQUES
+        ).first()
+
+
+@receiver(post_save, sender=Tache)
+def tache_apres_sauvegarde(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    avant = getattr(instance, '_etat_initial', None)
+    apres = instance.etat_statistiques()
+    if avant is not None and update_fields is not None:
+        # Seuls les champs enregistrés ont changé en base
+        enregistres = {Tache._meta.get_field(champ).attname for champ in update_fields}
+        apres = tuple(
+            nouveau if champ in enregistres else ancien
+            for champ, ancien, nouveau in zip(Tache.CHAMPS_STATISTIQUES, avant, apres or avant)
+        )
+    appliquer_changement(avant, apres)
+    invalider(*portees_tache(avant, apres))
+    publier('tache', 'modifie', instance.projet_id, [instance.pk])
+    if avant is not None and avant[0] != instance.projet_id:
+        # Tâche déplacée : elle disparaît de son ancien projet
+        publier('tache', 'supprime', avant[0], [instance.pk])
+    instance._etat_initial = apres
+
+
+@receiver(post_delete, sender=Tache)
+def tache_apres_suppression(sender, instance, origin=None, **kwargs):
+    etat = instance.etat_statistiques()
+    # Quand la suppression vient de celle du projet, ses statistiques disparaissent avec lui
+    appliquer_changement(etat, None, ignorer_projet=isinstance(origin, Projet))
+    invalider(*portees_tache(etat))
+    tracer_suppression(instance, instance.projet_id, origin)
+    publier('tache', 'supprime', instance.projet_id, [instance.pk])
+
+
+@receiver(pre_save, sender=Fichier)
+def fichier_avant_sauvegarde(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Contenu référencé avant la sauvegarde (le nouveau est enregistré pendant celle-ci)
+    instance._fichier_initial = (
+        Fichier.objects.filter(pk=instance.pk).values_list('fichier', flat=True).first()
+        if instance.pk is not None else None
+    )
+
+
+@receiver(post_save, sender=Fichier)
+def fichier_apres_sauvegarde(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    avant, apres = getattr(instance, '_fichier_initial', None), instance.fichier.name
+    if avant != apres:
+        ajuster_references(apres, 1)
+        ajuster_references(avant, -1)
+    instance._fichier_initial = apres
+    publier('fichier', 'modifie', instance.projet_id, [instance.pk])
+
+
+@receiver(post_delete, sender=Fichier)
+def fichier_apres_suppression(sender, instance, origin=None, **kwargs):
+    ajuster_references(instance.fichier.name, -1)
+    tracer_suppression(instance, instance.projet_id, origin)
+    publier('fichier', 'supprime', instance.projet_id, [instance.pk])
+
+
+@receiver(post_save, sender=Commentaire)
+def commentaire_apres_sauvegarde(sender, instance, raw=False, **kwargs):
+    if not raw:
+        publier('commentaire', 'modifie', instance.tache.projet_id, [instance.pk])
+
+
+@receiver(post_delete, sender=Commentaire)
+def commentaire_apres_suppression(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Tache):
+        projet_id = origin.projet_id
+    elif isinstance(origin, Projet):
+        projet_id = origin.pk
+    else:
+        projet_id = Tache.objects.filter(pk=instance.tache_id).values_list('projet_id', flat=True).first()
+    tracer_suppression(instance, projet_id, origin)
+    publier('commentaire', 'supprime', projet_id, [instance.pk])
+
+
+@receiver(pre_save, sender=Projet)
+def projet_avant_sauvegarde(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Créateur avant la sauvegarde : s'il change, l'ancien ne voit plus le projet
+    instance._cree_par_initial = (
+        Projet.objects.filter(pk=instance.pk).values_list('cree_par_id', flat=True).first()
+        if instance.pk is not None else None
+    )
+
+
+@receiver(post_save, sender=Projet)
+def projet_apres_sauvegarde(sender, instance, raw=False, created=False, **kwargs):
+    if not raw:
+        portees = _portees_projet(instance)
+        ancien = getattr(instance, '_cree_par_initial', None)
+        if ancien is not None and ancien != instance.cree_par_id:
+            portees.append(f'membre:{ancien}')
+        invalider(*portees)
+        instance._cree_par_initial = instance.cree_par_id
+        if created:
+            # Le créateur voit désormais ce projet
+            publier('projet', 'cree', instance.pk, [instance.cree_par_id])
+
+
+@receiver(pre_delete, sender=Projet)
+def projet_avant_suppression(sender, instance, **kwargs):
+    # Les membres ne sont plus lisibles une fois le projet supprimé
+    instance._portees_cache = _portees_projet(instance)
+
+
+@receiver(post_delete, sender=Projet)
+def projet_apres_suppression(sender, instance, origin=None, **kwargs):
+    invalider(*getattr(instance, '_portees_cache', ['global', f'projet:{instance.pk}']))
+    tracer_suppression(instance, instance.pk, origin)
+
+
+@receiver(m2m_changed, sender=Projet.membres.through)
+def membres_projet_modifies(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        lies = instance.projets_membre if reverse else instance.membres
+        instance._lies_avant_clear = set(lies.values_list('id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    lies = instance.__dict__.pop('_lies_avant_clear', set()) if action == 'post_clear' else pk_set
+    projets_ids, membres_ids = (lies, [instance.pk]) if reverse else ([instance.pk], lies)
+    # La liste des membres fait partie du projet renvoyé par la synchronisation
+    Projet.objects.filter(pk__in=projets_ids).update(updated_at=timezone.now())
+    for projet_id in projets_ids:
+        publier('membres', 'ajoute' if action == 'post_add' else 'retire', projet_id, membres_ids)
+    invalider(
+        *[f'projet:{projet_id}' for projet_id in projets_ids],
+        *[f'membre:{membre_id}' for membre_id in membres_ids],
+    )
+
+
+@receiver(post_save, sender=Membre)
+def membre_apres_sauvegarde(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalider(*_portees_membre(instance.pk))
+        oublier_utilisateur(instance.user_id)
+
+
+@receiver(pre_delete, sender=Membre)
+def membre_avant_suppression(sender, instance, **kwargs):
+    instance._portees_cache = _portees_membre(instance.pk)
+
+
+@receiver(post_delete, sender=Membre)
+def membre_apres_suppression(sender, instance, **kwargs):
+    invalider(*getattr(instance, '_portees_cache', [f'membre:{instance.pk}']))
+    oublier_utilisateur(instance.user_id)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def utilisateur_modifie(sender, instance, raw=False, **kwargs):
+    # L'utilisateur mis en cache par l'authentification JWT n'est plus à jour
+    if not raw:
+        oublier_utilisateur(instance.pk)
+
+
+@receiver(post_delete)
+def suppression_terminee(sender, instance, origin=None, **kwargs):
+    # Enregistré en dernier : l'origine d'une suppression reçoit post_delete après
+    # les objets qui en dépendent et après ses propres récepteurs
+    if instance is origin:
+        ecrire_suppressions(instance)
@@ -0,0 +1,60 @@
+from django.db.models import Count, Q
+from django.utils import timezone
+
+# Statuts de tâche comptés par les tableaux de bord (clé de réponse -> valeur en base)
+STATUTS_TACHE = {
+    'taches_terminees': 'Terminé',
+    'taches_en_cours': 'En cours',
+    'taches_en_attente': 'En attente',
+    'taches_annulees': 'Annulé',
+}
+
+
+def agregats_taches(today):
+    """Agrégats conditionnels : total, un compteur par statut et tâches en retard."""
+    agregats = {
+        'taches_total': Count('id'),
+        'taches_retard': Count('id', filter=Q(date_fin__lt=today) & ~Q(statut='Terminé')),
+    }
+    for cle, statut in STATUTS_TACHE.items():
+        agregats[cle] = Count('id', filter=Q(statut=statut))
+    return agregats
+
+
+def compter_taches(taches, today=None):
+    """
+    Calcule en une seule requête (agrégats conditionnels) le total, le nombre
+    de tâches par statut et le nombre de tâches en retard d'un queryset de tâches.
+    """
+    if today is None:
+        today = timezone.now().date()
+    return taches.order_by().aggregate(**agregats_taches(today))
+
+
+def taches_a_venir(taches, today=None, limite=5):
+    """Prochaines échéances d'un queryset de tâches, avec le nom du projet."""
+    if today is None:
+        today = timezone.now().date()
+    prochaines = taches.filter(date_fin__gte=today).select_related('projet').order_by('date_fin')[:limite]
+    return [
+        {
+            'id': t.id,
+            'nom': t.nom,
+            'statut': t.statut,
+            'date_fin': t.date_fin,
+            'projet': t.projet.nom,
+        } for t in prochaines
+    ]
+
+
+def projets_resume(projets):
+    """Représentation courte des projets utilisée par les tableaux de bord."""
+    return [
+        {
+            'id': p.id,
+            'nom': p.nom,
+            'statut': p.statut,
+            'date_debut': p.date_debut,
+            'date_fin': p.date_fin,
+        } for p in projets
+    ]
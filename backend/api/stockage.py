@@ -0,0 +1,149 @@
+"""
+Stockage adressé par le contenu des fichiers partagés (Fichier.fichier).
+
+Un fichier est enregistré sous le nom de son empreinte SHA-256
+(contenus/ab/abcdef...<extension>) : un document déjà présent n'est pas réécrit,
+le Fichier pointe vers le contenu existant. La table Contenu compte les Fichier
+qui référencent chaque contenu (tenue à jour par les signaux de Fichier) ; le
+fichier sur disque n'est supprimé qu'avec sa dernière référence, une fois la
+transaction validée. Le contenu, sa référence et le Fichier sont enregistrés
+dans une même transaction (Fichier.save), sous le verrou de la ligne Contenu.
+
+Les fichiers enregistrés avant ce stockage (fichiers/...) n'ont pas de Contenu
+et ne sont pas comptés : la commande dedupliquer_fichiers les convertit.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.deconstruct import deconstructible
+
+PREFIXE = 'contenus/'
+
+
+def empreinte_fichier(contenu):
+    """Empreinte SHA-256 (hexadécimale) d'un File, lu par blocs."""
+    empreinte = hashlib.sha256()
+    for bloc in contenu.chunks():
+        empreinte.update(bloc)
+    contenu.seek(0)
+    return empreinte.hexdigest()
+
+
+@deconstructible
+class StockageContenu(FileSystemStorage):
+    """FileSystemStorage dont les noms sont les empreintes des contenus (un seul exemplaire par contenu)."""
+
+    def nom_contenu(self, empreinte, nom):
+        extension = os.path.splitext(nom)[1].lower()[:10]
+        return f'{PREFIXE}{empreinte[:2]}/{empreinte}{extension}'
+
+    def get_available_name(self, name, max_length=None):
+        # Le nom définitif est choisi d'après le contenu dans _save()
+        return name
+
+    def _save(self, name, content):
+        from .models import Contenu
+
+        # Empreinte déjà calculée par l'appelant (téléversement, migration) si possible
+        empreinte = getattr(content, 'sha256', None) or empreinte_fichier(content)
+        # Ligne verrouillée jusqu'à la fin de la transaction qui enregistre le Fichier
+        # (voir Fichier.save) : supprimer_orphelins() ne peut pas retirer le contenu
+        # avant que la nouvelle référence soit comptée
+        with transaction.atomic():
+            existant = Contenu.objects.select_for_update().filter(pk=empreinte).values_list('nom', flat=True).first()
+            if existant is not None and self.exists(existant):
+                return existant
+            nom = self.nom_contenu(empreinte, name)
+            self.ecrire(nom, content)
+            Contenu.objects.update_or_create(empreinte=empreinte, defaults={'nom': nom, 'taille': self.size(nom)})
+        return nom
+
+    def ecrire(self, nom, content):
+        """
+        Crée le fichier `nom` sans jamais écraser ni renommer : le contenu est
+        écrit à côté puis lié sous son nom. Si le même contenu y a été écrit
+        entre-temps par une autre requête (FileExistsError), cet exemplaire est gardé.
+        """
+        chemin = self.path(nom)
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        try:
+            if hasattr(content, 'temporary_file_path'):
+                try:
+                    # Déjà sur disque (téléversement assemblé) : lien, sans recopie
+                    os.link(content.temporary_file_path(), chemin)
+                    return
+                except FileExistsError:
+                    raise
+                except OSError:
+                    # Autre système de fichiers : recopie ci-dessous
+                    pass
+            descripteur, temporaire = tempfile.mkstemp(dir=os.path.dirname(chemin), suffix='.partiel')
+            try:
+                with os.fdopen(descripteur, 'wb') as sortie:
+                    for bloc in content.chunks():
+                        sortie.write(bloc)
+                if self.file_permissions_mode is not None:
+                    os.chmod(temporaire, self.file_permissions_mode)
+                os.link(temporaire, chemin)
+            finally:
+                os.remove(temporaire)
+        except FileExistsError:
+            pass
+
+
+def stockage():
+    from .models import Fichier
+    return Fichier._meta.get_field('fichier').storage
+
+
+def supprimer_orphelins(noms=None):
+    """
+    Supprime les contenus qui ne sont plus référencés (parmi `noms`, ou tous) et
+    leurs fichiers. Retourne le nombre d'octets libérés.
+    """
+    from .models import Contenu
+
+    orphelins = Contenu.objects.filter(references__lte=0)
+    if noms is not None:
+        orphelins = orphelins.filter(nom__in=noms)
+    liberes = 0
+    for empreinte, nom, taille in orphelins.values_list('empreinte', 'nom', 'taille'):
+        # Même verrou que StockageContenu._save : un enregistrement du même contenu en cours est attendu
+        with transaction.atomic():
+            if Contenu.objects.select_for_update().filter(pk=empreinte, references__lte=0).exists():
+                # Seul celui qui supprime la ligne supprime le fichier
+                Contenu.objects.filter(pk=empreinte).delete()
+                stockage().delete(nom)
+                liberes += taille
+    return liberes
+
+
+def ajuster_references(nom, delta):
+    """Ajoute `delta` aux références du contenu `nom` ; supprime le contenu s'il n'en a plus."""
+    from .models import Contenu
+
+    if not nom or not nom.startswith(PREFIXE):
+        return
+    mis_a_jour = Contenu.objects.filter(nom=nom).update(references=F('references') + delta)
+    if delta > 0 and not mis_a_jour and stockage().exists(nom):
+        # Ligne retirée entre-temps (enregistrement hors transaction) : le fichier est toujours là
+        empreinte = os.path.splitext(os.path.basename(nom))[0]
+        Contenu.objects.get_or_create(empreinte=empreinte, defaults={
+            'nom': nom, 'taille': stockage().size(nom), 'references': delta,
+        })
+    if delta < 0:
+        # Le fichier reste en place si la transaction est annulée
+        transaction.on_commit(lambda: supprimer_orphelins([nom]))
+
+
+def recalculer_references():
+    """Recompte depuis la table des fichiers les références de chaque contenu."""
+    from .models import Contenu, Fichier
+
+    nombre = Fichier.objects.filter(fichier=OuterRef('nom')).order_by().values('fichier').annotate(n=Count('id')).values('n')
+    Contenu.objects.update(references=Coalesce(Subquery(nombre), 0))
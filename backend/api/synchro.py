@@ -0,0 +1,131 @@
+"""
+Synchronisation incrémentale des listes : `GET <liste>/?since=<curseur>`.
+
+Projet, Tache, Fichier et Commentaire portent une date de modification indexée
+(updated_at) et chaque suppression laisse une trace (Suppression, écrite par
+les signaux). Avec ?since=, une liste ne renvoie que ce qui a changé depuis le
+curseur, avec les mêmes règles de visibilité et les mêmes filtres que la liste
+complète, sans pagination :
+
+    {"curseur": "<à renvoyer la fois suivante>",
+     "modifies": [objets créés ou modifiés, tels que dans la liste],
+     "supprimes": [ids supprimés]}
+
+Le curseur de départ est donné par l'en-tête X-Curseur-Synchro de toute
+lecture (liste complète ou détail) ; `?since=0` renvoie tout. Le curseur est
+pris avant la lecture, moins SYNC_MARGE_SECONDES : une écriture validée
+pendant la lecture est renvoyée la fois suivante (un objet peut donc revenir
+deux fois). Si le curseur est plus ancien que la rétention des suppressions
+(SYNC_RETENTION_JOURS) ou s'il y a plus de SYNC_MAX_CHANGEMENTS objets
+modifiés, la réponse est 410 : le client recharge la liste complète.
+
+Les suppressions sont celles des projets visibles et des projets supprimés.
+Les champs lus dans un autre objet (projet_nom, assignee_nom...) ne changent
+pas updated_at, et un membre retiré d'un projet n'en reçoit pas les
+suppressions : le client recharge alors la liste complète.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Exists, Model, OuterRef, Q
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .export import lignes_serializees
+from .models import Projet, Suppression
+from .visibilite import projets_visibles
+
+ENTETE_CURSEUR = 'X-Curseur-Synchro'
+
+
+def ecrire_curseur(date):
+    return str(int(date.timestamp() * 1_000_000))
+
+
+def lire_curseur(valeur):
+    """Date d'un curseur (None pour '0' : depuis toujours). Lève ValueError."""
+    microsecondes = int(valeur)
+    if microsecondes < 0:
+        raise ValueError(valeur)
+    if microsecondes == 0:
+        return None
+    return datetime.fromtimestamp(microsecondes / 1_000_000, tz=dt_timezone.utc)
+
+
+def curseur_courant():
+    marge = getattr(settings, 'SYNC_MARGE_SECONDES', 2)
+    return ecrire_curseur(timezone.now() - timedelta(seconds=marge))
+
+
+def tracer_suppression(instance, projet_id, origin=None):
+    """
+    Enregistre la suppression de `instance`. Quand la suppression part d'un
+    objet (`origin`, éventuellement `instance` elle-même), les traces de la
+    cascade sont gardées sur l'origine puis écrites en une requête par
+    ecrire_suppressions().
+    """
+    trace = Suppression(modele=instance._meta.model_name, objet_id=instance.pk, projet_id=projet_id)
+    if isinstance(origin, Model):
+        origin.__dict__.setdefault('_suppressions', []).append(trace)
+    else:
+        trace.save()
+
+
+def ecrire_suppressions(instance):
+    """Écrit les traces gardées pendant la suppression en cascade dont `instance` est l'origine."""
+    traces = instance.__dict__.pop('_suppressions', None)
+    if traces:
+        Suppression.objects.bulk_create(traces)
+
+
+def ids_supprimes(modele, depuis, visibles):
+    """Ids des objets de `modele` supprimés après `depuis`, dans les projets `visibles` (None : tous)."""
+    suppressions = Suppression.objects.filter(modele=modele._meta.model_name, date__gt=depuis)
+    if visibles is not None:
+        projet_existe = Exists(Projet.objects.filter(pk=OuterRef('projet_id')))
+        suppressions = suppressions.filter(
+            Q(projet_id__in=visibles) | Q(projet_id__isnull=True) | ~projet_existe
+        )
+    return list(suppressions.order_by().values_list('objet_id', flat=True).distinct())
+
+
+class SynchroMixin:
+    """
+    Pour un viewset : `list` accepte ?since=<curseur> et les lectures portent
+    l'en-tête X-Curseur-Synchro.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        # Pris avant toute lecture
+        request.curseur_synchro = curseur_courant()
+        super().initial(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        curseur = getattr(request, 'curseur_synchro', None)
+        if curseur is not None and request.method == 'GET' and response.status_code == 200:
+            response[ENTETE_CURSEUR] = curseur
+        return response
+
+    def list(self, request, *args, **kwargs):
+        since = request.query_params.get('since')
+        if since is None:
+            return super().list(request, *args, **kwargs)
+        try:
+            depuis = lire_curseur(since)
+        except (ValueError, OverflowError, OSError):
+            return Response({'error': 'since doit être un curseur renvoyé par une synchronisation'}, status=400)
+        retention = timedelta(days=getattr(settings, 'SYNC_RETENTION_JOURS', 30))
+        if depuis is not None and depuis < timezone.now() - retention:
+            return Response({'error': 'Curseur expiré : recharger la liste complète'}, status=410)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if depuis is not None:
+            queryset = queryset.filter(updated_at__gt=depuis)
+        maximum = getattr(settings, 'SYNC_MAX_CHANGEMENTS', 1000)
+        modifies = list(islice(lignes_serializees(queryset.order_by('updated_at', 'id'), self.get_serializer()), maximum + 1))
+        if len(modifies) > maximum:
+            return Response({'error': 'Trop de changements : recharger la liste complète'}, status=410)
+        supprimes = [] if depuis is None else ids_supprimes(queryset.model, depuis, projets_visibles(request))
+        return Response({'curseur': request.curseur_synchro, 'modifies': modifies, 'supprimes': supprimes})
@@ -0,0 +1,157 @@
+"""
+Téléchargement des fichiers partagés : `GET /api/fichiers/<id>/download/`.
+
+Le fichier est envoyé par FileResponse (lu par blocs de TAILLE_BLOC, ou par
+sendfile quand le serveur WSGI le permet ; sous ASGI, par un itérateur
+asynchrone, voir flux_asgi.py), avec :
+
+- les requêtes partielles (en-tête Range, un seul intervalle, et If-Range) pour
+  reprendre un téléchargement interrompu ;
+- les requêtes conditionnelles (ETag : l'empreinte SHA-256 du contenu, voir
+  stockage.py, et Last-Modified) ;
+- si TELECHARGEMENT_SENDFILE vaut 'x-sendfile' ou 'x-accel-redirect', une
+  réponse vide dont l'en-tête confie l'envoi au serveur web frontal (Apache
+  mod_xsendfile, nginx), qui gère aussi Range : le processus Python est libéré
+  aussitôt.
+
+Un lien signé (`GET /api/fichiers/<id>/lien/`), valable
+TELECHARGEMENT_LIEN_DUREE secondes, permet au navigateur de télécharger sans
+en-tête Authorization.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core import signing
+from django.http import FileResponse, HttpResponse, Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+from .flux_asgi import diffuser
+from .stockage import PREFIXE
+
+SEL_LIEN = 'api.telechargement'
+PLAGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# Taille des blocs lus dans le fichier (un passage par un thread chacun sous ASGI)
+TAILLE_BLOC = 64 * 1024
+
+
+class PlageFichier:
+    """Lecture limitée à `longueur` octets d'un fichier, à partir de sa position courante."""
+
+    def __init__(self, fichier, longueur):
+        self.fichier = fichier
+        self.restant = longueur
+        self.name = fichier.name
+
+    def read(self, taille=-1):
+        if taille < 0 or taille > self.restant:
+            taille = self.restant
+        bloc = self.fichier.read(taille)
+        self.restant -= len(bloc)
+        return bloc
+
+    def close(self):
+        self.fichier.close()
+
+
+def jeton_lien(fichier):
+    return signing.dumps(fichier.pk, salt=SEL_LIEN)
+
+
+def fichier_du_jeton(jeton):
+    """Id du fichier désigné par un lien signé encore valable, sinon None."""
+    try:
+        return signing.loads(jeton, salt=SEL_LIEN, max_age=getattr(settings, 'TELECHARGEMENT_LIEN_DUREE', 300))
+    except signing.BadSignature:
+        return None
+
+
+def etag(fichier, taille, modifie):
+    # Un contenu adressé par son empreinte ne change jamais sous le même nom
+    if fichier.fichier.name.startswith(PREFIXE):
+        return '"%s"' % os.path.splitext(os.path.basename(fichier.fichier.name))[0]
+    return f'"{taille:x}-{int(modifie):x}"'
+
+
+def plage_demandee(request, taille, etiquette, modifie):
+    """
+    (début, fin incluse) de l'intervalle demandé, None pour le fichier entier
+    (pas de Range, plusieurs intervalles, ou If-Range périmé), ou 'invalide'.
+    """
+    entete = request.headers.get('Range')
+    if not entete:
+        return None
+    si_plage = request.headers.get('If-Range')
+    if si_plage and si_plage != etiquette and parse_http_date_safe(si_plage) != int(modifie):
+        return None
+    correspondance = PLAGE.match(entete.strip())
+    if correspondance is None:
+        return None
+    debut, fin = correspondance.groups()
+    if not debut:
+        if not fin or int(fin) == 0:
+            return 'invalide'
+        # Derniers octets : bytes=-n
+        return max(0, taille - int(fin)), taille - 1
+    debut = int(debut)
+    fin = min(int(fin), taille - 1) if fin else taille - 1
+    if debut >= taille or fin < debut:
+        return 'invalide'
+    return debut, fin
+
+
+def _disposition(nom):
+    return f"attachment; filename*=utf-8''{quote(nom)}"
+
+
+def reponse_fichier(request, fichier):
+    """Réponse de téléchargement du Fichier, avec Range, ETag/Last-Modified et X-Sendfile."""
+    if not fichier.fichier:
+        raise Http404('Fichier non disponible')
+    try:
+        chemin = fichier.fichier.path
+        infos = os.stat(chemin)
+    except (FileNotFoundError, NotImplementedError):
+        raise Http404('Fichier non disponible')
+    taille, modifie = infos.st_size, infos.st_mtime
+    etiquette = etag(fichier, taille, modifie)
+
+    conditionnelle = get_conditional_response(request, etag=etiquette, last_modified=int(modifie))
+    if conditionnelle is not None:
+        return conditionnelle
+
+    mode = getattr(settings, 'TELECHARGEMENT_SENDFILE', None)
+    if mode:
+        response = HttpResponse(content_type=mimetypes.guess_type(fichier.nom)[0] or 'application/octet-stream')
+        if mode == 'x-accel-redirect':
+            prefixe = getattr(settings, 'TELECHARGEMENT_ACCEL_PREFIXE', '/protege/')
+            response['X-Accel-Redirect'] = prefixe + quote(fichier.fichier.name)
+        else:
+            response['X-Sendfile'] = chemin
+        response['Content-Disposition'] = _disposition(fichier.nom)
+    else:
+        plage = plage_demandee(request, taille, etiquette, modifie)
+        if plage == 'invalide':
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{taille}'
+            return response
+        contenu = open(chemin, 'rb')
+        if plage is None:
+            response = FileResponse(contenu, as_attachment=True, filename=fichier.nom)
+        else:
+            debut, fin = plage
+            contenu.seek(debut)
+            response = FileResponse(PlageFichier(contenu, fin - debut + 1), as_attachment=True, filename=fichier.nom)
+            response.status_code = 206
+            response['Content-Length'] = fin - debut + 1
+            response['Content-Range'] = f'bytes {debut}-{fin}/{taille}'
+        response.block_size = TAILLE_BLOC
+        response['Accept-Ranges'] = 'bytes'
+        diffuser(request, response)
+    response['ETag'] = etiquette
+    response['Last-Modified'] = http_date(modifie)
+    response['Cache-Control'] = 'private'
+    return response
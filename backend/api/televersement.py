@@ -0,0 +1,159 @@
+"""
+Téléversement de fichiers en plusieurs parties, reprenable.
+
+1. POST /api/televersements/ {nom, projet, taille[, sha256]} ouvre un
+   téléversement et indique la taille des parties (TELEVERSEMENT_TAILLE_PART).
+2. PUT /api/televersements/<id>/parts/<n>/ (corps brut, en-tête X-Sha256
+   facultatif) enregistre la partie n (à partir de 0) sur disque. Une partie
+   est écrite sous un nom provisoire puis renommée : seules les parties
+   complètes comptent, et une partie peut être renvoyée.
+3. GET /api/televersements/<id>/ liste les parties reçues, pour reprendre
+   après une coupure.
+4. POST /api/televersements/<id>/complete/ assemble les parties dans l'ordre,
+   par blocs, en calculant l'empreinte SHA-256, vérifie la taille et l'empreinte
+   attendues, puis crée le Fichier. Le fichier assemblé est déplacé (et non
+   recopié) dans le stockage, ou abandonné si ce contenu y est déjà (voir
+   stockage.py).
+
+Les parties ne passent jamais entièrement en mémoire. L'écriture d'une partie,
+l'assemblage et la suppression verrouillent la ligne du téléversement
+(select_for_update, ou BEGIN IMMEDIATE avec le profil SQLite 'production') :
+une partie ne peut pas être remplacée pendant l'assemblage, ni recréer le
+dossier d'un téléversement déjà terminé.
+
+L'empreinte du fichier entier reste facultative : un navigateur ne peut la
+calculer (WebCrypto n'a pas de calcul par morceaux) qu'en chargeant tout le
+fichier en mémoire, ce que l'envoi par parties cherche justement à éviter.
+L'intégrité repose alors sur l'empreinte de chaque partie (X-Sha256, envoyée
+par le client web), et le contenu stocké est de toute façon adressé par son
+empreinte calculée à l'assemblage.
+"""
+import hashlib
+import os
+import shutil
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Fichier
+
+# Taille des blocs lus et écrits lors de la réception et de l'assemblage
+TAILLE_BLOC = 1024 * 1024
+NOM_ASSEMBLE = 'assemble'
+
+
+class FichierAssemble(File):
+    """Fichier sur disque que le stockage peut lier sous son nom au lieu de le recopier."""
+
+    def __init__(self, file, chemin):
+        super().__init__(file)
+        self.chemin = chemin
+
+    def temporary_file_path(self):
+        return self.chemin
+
+
+def dossier(televersement):
+    return os.path.join(settings.TELEVERSEMENTS_ROOT, str(televersement.pk))
+
+
+def nombre_parts(televersement):
+    return max(1, -(-televersement.taille // televersement.taille_part))
+
+
+def taille_part(televersement, numero):
+    """Taille attendue de la partie `numero`."""
+    if numero < nombre_parts(televersement) - 1:
+        return televersement.taille_part
+    return televersement.taille - televersement.taille_part * numero
+
+
+def parts_recues(televersement):
+    try:
+        noms = os.listdir(dossier(televersement))
+    except FileNotFoundError:
+        return []
+    return sorted(int(nom) for nom in noms if nom.isdigit())
+
+
+def ecrire_part(televersement, numero, flux, sha256=''):
+    """
+    Écrit la partie `numero` lue dans `flux` (par blocs). Lève ValueError si le
+    numéro, la taille ou l'empreinte SHA-256 donnée ne correspondent pas.
+    """
+    if not 0 <= numero < nombre_parts(televersement):
+        raise ValueError(f'Numéro de partie invalide (0 à {nombre_parts(televersement) - 1})')
+    attendue = taille_part(televersement, numero)
+    os.makedirs(dossier(televersement), exist_ok=True)
+    chemin = os.path.join(dossier(televersement), str(numero))
+    provisoire = f'{chemin}.partiel'
+    empreinte = hashlib.sha256()
+    recue = 0
+    try:
+        with open(provisoire, 'wb') as sortie:
+            while True:
+                bloc = flux.read(min(TAILLE_BLOC, attendue - recue + 1))
+                if not bloc:
+                    break
+                recue += len(bloc)
+                if recue > attendue:
+                    raise ValueError(f'La partie {numero} dépasse {attendue} octets')
+                empreinte.update(bloc)
+                sortie.write(bloc)
+        if recue != attendue:
+            raise ValueError(f'La partie {numero} fait {recue} octets au lieu de {attendue}')
+        if sha256 and empreinte.hexdigest() != sha256.lower():
+            raise ValueError(f'Empreinte SHA-256 de la partie {numero} incorrecte')
+    except BaseException:
+        if os.path.exists(provisoire):
+            os.remove(provisoire)
+        raise
+    os.replace(provisoire, chemin)
+    return recue
+
+
+def assembler(televersement):
+    """
+    Assemble les parties dans un fichier du dossier du téléversement et retourne
+    (chemin, empreinte SHA-256). Lève ValueError s'il manque des parties ou si
+    l'empreinte ne correspond pas à celle attendue.
+    """
+    manquantes = sorted(set(range(nombre_parts(televersement))) - set(parts_recues(televersement)))
+    if manquantes:
+        raise ValueError(f'Parties manquantes : {manquantes}')
+    chemin = os.path.join(dossier(televersement), NOM_ASSEMBLE)
+    empreinte = hashlib.sha256()
+    with open(chemin, 'wb') as sortie:
+        for numero in range(nombre_parts(televersement)):
+            with open(os.path.join(dossier(televersement), str(numero)), 'rb') as part:
+                for bloc in iter(lambda: part.read(TAILLE_BLOC), b''):
+                    empreinte.update(bloc)
+                    sortie.write(bloc)
+    if televersement.sha256 and empreinte.hexdigest() != televersement.sha256.lower():
+        os.remove(chemin)
+        raise ValueError('Empreinte SHA-256 du fichier incorrecte')
+    return chemin, empreinte.hexdigest()
+
+
+def terminer(televersement):
+    """Assemble les parties, crée le Fichier du projet et supprime le téléversement."""
+    chemin, empreinte = assembler(televersement)
+    fichier = Fichier(nom=televersement.nom, projet=televersement.projet, date_partage=timezone.now().date())
+    # Contenu stocké et Fichier enregistré dans la même transaction (voir stockage.py)
+    with transaction.atomic(), open(chemin, 'rb') as contenu:
+        assemble = FichierAssemble(contenu, chemin)
+        # Empreinte déjà calculée : le stockage ne relit pas le fichier
+        assemble.sha256 = empreinte
+        fichier.fichier.save(televersement.nom, assemble, save=False)
+        fichier.save()
+    supprimer(televersement)
+    return fichier
+
+
+def supprimer(televersement):
+    """Supprime le téléversement, puis ses parties reçues une fois la suppression validée."""
+    chemin = dossier(televersement)
+    televersement.delete()
+    transaction.on_commit(lambda: shutil.rmtree(chemin, ignore_errors=True))
@@ -1,3 +1,1854 @@
-from django.test import TestCase
+import csv
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from unittest import mock
+import tracemalloc
+from contextlib import closing
+from datetime import date, timedelta
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.db.utils import ConnectionHandler
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from .evenements import DiffusionLocale, diffusion
+from .authentification import charger_utilisateur, version_jetons
+from .compteurs import CHAMPS_COMPTEURS, recalculer_statistiques, statistiques_membre, statistiques_projets
+from .models import (
+    Commentaire, Contenu, Fichier, Membre, Projet, StatistiquesProjet, Suppression, Tache, Televersement,
+)
+from .renderers import RapideJSONRenderer
+from .routage import EtatRoutage, LectureApresEcritureMiddleware, RouteurLectureEcriture, _etat, copier_base
+from .stockage import StockageContenu, ajuster_references, stockage
+from .serializers import CommentaireSerializer, MembreSerializer, TacheSerializer
+from .stats import compter_taches
+from .visibilite import ids_projets_visibles
+from . import televersement
+from .views import ChefDashboardStatsView, TeleversementViewSet
+
+STATUTS = ['En attente', 'En cours', 'Terminé', 'Annulé']
+
+
+def creer_membre(username, role='MEMBRE'):
+    user = User.objects.create_user(username=username)
+    return Membre.objects.create(user=user, nom=username, role=role)
+
+
+def creer_projet(chef, nom='Projet', membres=()):
+    projet = Projet.objects.create(
+        nom=nom,
+        description='Description',
+        date_debut=date.today(),
+        date_fin=date.today() + timedelta(days=30),
+        statut='En cours',
+        cree_par=chef,
+    )
+    projet.membres.add(*membres)
+    return projet
+
+
+def creer_taches(projet, nombre, assignee=None):
+    # Créées une à une pour que les signaux tiennent les compteurs à jour
+    today = date.today()
+    return [
+        Tache.objects.create(
+            nom=f'Tâche {i}',
+            date_debut=today - timedelta(days=10),
+            date_fin=today + timedelta(days=(i % 7) - 3),
+            statut=STATUTS[i % len(STATUTS)],
+            priorite='Moyenne',
+            projet=projet,
+            assignee=assignee,
+        ) for i in range(nombre)
+    ]
+
+
+class DashboardTestMixin:
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def client_pour(self, membre):
+        client = APIClient()
+        client.force_authenticate(user=User.objects.get(pk=membre.user_id))
+        return client
+
+    def compter_requetes(self, membre, url):
+        client = self.client_pour(membre)
+        # Réponses non conservées en cache : on mesure le calcul lui-même
+        with self.settings(DASHBOARD_CACHE_TIMEOUT=0):
+            # Premier appel : création paresseuse des lignes de statistiques manquantes
+            client.get(url)
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+
+class CompterTachesTests(TestCase):
+    def test_correspond_aux_comptages_individuels(self):
+        chef = creer_membre('chef', 'CHEF_PROJET')
+        creer_taches(creer_projet(chef), 20)
+        today = date.today()
+
+        with self.assertNumQueries(1):
+            stats = compter_taches(Tache.objects.all(), today)
+
+        self.assertEqual(stats['taches_total'], Tache.objects.count())
+        self.assertEqual(stats['taches_terminees'], Tache.objects.filter(statut='Terminé').count())
+        self.assertEqual(stats['taches_en_cours'], Tache.objects.filter(statut='En cours').count())
+        self.assertEqual(stats['taches_en_attente'], Tache.objects.filter(statut='En attente').count())
+        self.assertEqual(stats['taches_annulees'], Tache.objects.filter(statut='Annulé').count())
+        self.assertEqual(
+            stats['taches_retard'],
+            Tache.objects.filter(date_fin__lt=today).exclude(statut='Terminé').count(),
+        )
+
+
+class DashboardStatsQueryCountTests(DashboardTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.chef = creer_membre('chef', 'CHEF_PROJET')
+        self.membre = creer_membre('membre')
+        self.projet = creer_projet(self.chef, membres=[self.membre])
+
+    def test_stats_nombre_de_requetes_constant(self):
+        creer_taches(self.projet, 5)
+        petit = self.compter_requetes(self.chef, '/api/dashboard/stats/')
+        for i in range(5):
+            creer_taches(creer_projet(self.chef, f'Projet {i}'), 50)
+        grand = self.compter_requetes(self.chef, '/api/dashboard/stats/')
+        self.assertEqual(petit, grand)
+
+    def test_stats_contenu(self):
+        creer_taches(self.projet, 8)
+        response = self.client_pour(self.chef).get('/api/dashboard/stats/')
+        self.assertEqual(response.data['taches_count'], 8)
+        self.assertEqual(response.data['projets_count'], 1)
+        for tache in response.data['taches_a_venir']:
+            self.assertEqual(tache['projet'], self.projet.nom)
+
+    def test_membre_nombre_de_requetes_constant(self):
+        creer_taches(self.projet, 3, assignee=self.membre)
+        petit = self.compter_requetes(self.membre, '/api/dashboard/membre/')
+        creer_taches(creer_projet(self.chef, 'Autre', membres=[self.membre]), 60, assignee=self.membre)
+        grand = self.compter_requetes(self.membre, '/api/dashboard/membre/')
+        self.assertEqual(petit, grand)
+
+
+class ChefDashboardQueryCountTests(DashboardTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.chef = creer_membre('chef', 'CHEF_PROJET')
+
+    def peupler(self, nb_projets, nb_membres, taches_par_projet):
+        membres = [creer_membre(f'membre_{nb_projets}_{i}') for i in range(nb_membres)]
+        for i in range(nb_projets):
+            projet = creer_projet(self.chef, f'Projet {nb_projets}-{i}', membres=membres)
+            for membre in membres:
+                creer_taches(projet, taches_par_projet, assignee=membre)
+        return membres
+
+    def test_nombre_de_requetes_constant(self):
+        self.peupler(1, 2, 1)
+        petit = self.compter_requetes(self.chef, '/api/dashboard/chef/')
+        self.peupler(4, 10, 3)
+        grand = self.compter_requetes(self.chef, '/api/dashboard/chef/')
+        self.assertEqual(petit, grand)
+
+    def test_taches_par_membre(self):
+        membres = self.peupler(2, 3, 2)
+        sans_taches = creer_membre('sans_taches')
+        Projet.objects.first().membres.add(sans_taches)
+        response = self.client_pour(self.chef).get('/api/dashboard/chef/')
+        taches = {m['id']: m['taches'] for m in response.data['membres']}
+        for membre in membres:
+            self.assertEqual(taches[membre.id], 4)
+        self.assertEqual(taches[sans_taches.id], 0)
+        self.assertEqual(len(response.data['activites']), 10)
+
+
+class CompteursMaterialisesTests(DashboardTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.chef = creer_membre('chef', 'CHEF_PROJET')
+        self.membre = creer_membre('membre')
+        self.projet = creer_projet(self.chef, membres=[self.membre])
+        self.taches = creer_taches(self.projet, 12, assignee=self.membre)
+        # Crée les lignes de statistiques avant les modifications suivies par les signaux
+        statistiques_projets([self.projet.id])
+        statistiques_membre(self.membre.id)
+
+    def attendu(self, taches):
+        stats = compter_taches(taches)
+        return {champ: stats[champ] for champ in CHAMPS_COMPTEURS}
+
+    def verifier(self):
+        self.assertEqual(statistiques_projets([self.projet.id]), self.attendu(Tache.objects.filter(projet=self.projet)))
+        self.assertEqual(statistiques_membre(self.membre.id), self.attendu(Tache.objects.filter(assignee=self.membre)))
+        self.assertEqual(recalculer_statistiques(corriger=False), {'StatistiquesProjet': 0, 'StatistiquesMembre': 0})
+
+    def test_creation_modification_suppression(self):
+        creer_taches(self.projet, 3)
+        tache = self.taches[0]
+        tache.statut = 'Terminé'
+        tache.date_fin = date.today() - timedelta(days=5)
+        tache.save()
+        self.taches[1].delete()
+        Tache.objects.get(pk=self.taches[2].pk).save(update_fields=['nom'])
+        self.verifier()
+
+    def test_actions_du_viewset(self):
+        client = self.client_pour(self.chef)
+        tache = self.taches[3]
+        autre = creer_membre('autre')
+        statistiques_membre(autre.id)
+        response = client.post(f'/api/taches/{tache.id}/change_status/', {'statut': 'Annulé'})
+        self.assertEqual(response.status_code, 200)
+        response = client.post(f'/api/taches/{tache.id}/assign/', {'membre_id': autre.id})
+        self.assertEqual(response.status_code, 200)
+        self.verifier()
+        self.assertEqual(statistiques_membre(autre.id)['taches_annulees'], 1)
+
+    def test_retard_recalcule_le_lendemain(self):
+        StatistiquesProjet.objects.update(taches_retard=0, retard_calcule_le=date.today() - timedelta(days=1))
+        self.verifier()
+
+    def test_suppression_du_projet(self):
+        self.projet.delete()
+        self.assertEqual(statistiques_membre(self.membre.id)['taches_total'], 0)
+
+    def test_commande_de_reconstruction(self):
+        StatistiquesProjet.objects.update(taches_total=999)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_statistiques', '--verifier', stdout=StringIO())
+        call_command('rebuild_statistiques', stdout=StringIO())
+        self.verifier()
+
+
+class DashboardCacheTests(DashboardTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.chef = creer_membre('chef', 'CHEF_PROJET')
+        self.membre = creer_membre('membre')
+        self.projet = creer_projet(self.chef, membres=[self.membre])
+        self.taches = creer_taches(self.projet, 4, assignee=self.membre)
+
+    def test_reponse_en_cache(self):
+        client = self.client_pour(self.chef)
+        premiere = client.get('/api/dashboard/chef/')
+        with CaptureQueriesContext(connection) as ctx:
+            seconde = client.get('/api/dashboard/chef/')
+        self.assertEqual(premiere.data, seconde.data)
+        self.assertFalse(any('api_tache' in q['sql'] for q in ctx.captured_queries))
+
+    def test_etag_304(self):
+        client = self.client_pour(self.membre)
+        response = client.get('/api/dashboard/membre/')
+        etag = response['ETag']
+        response = client.get('/api/dashboard/membre/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        self.taches[0].statut = 'Terminé'
+        self.taches[0].save()
+        response = client.get('/api/dashboard/membre/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_invalidation(self):
+        chef = self.client_pour(self.chef)
+        membre = self.client_pour(self.membre)
+        stats = self.client_pour(self.chef)
+        for client, url in ((chef, '/api/dashboard/chef/'), (membre, '/api/dashboard/membre/'), (stats, '/api/dashboard/stats/')):
+            client.get(url)
+
+        self.client_pour(self.chef).post(f'/api/taches/{self.taches[0].id}/change_status/', {'statut': 'Terminé'})
+        self.assertEqual(chef.get('/api/dashboard/chef/').data['taches_terminees'], 2)
+        self.assertEqual(membre.get('/api/dashboard/membre/').data['taches_terminees'], 2)
+        self.assertEqual(stats.get('/api/dashboard/stats/').data['taches_terminees'], 2)
+
+        nouveau = creer_membre('nouveau')
+        self.projet.membres.add(nouveau)
+        noms = [m['nom'] for m in chef.get('/api/dashboard/chef/').data['membres']]
+        self.assertIn('nouveau', noms)
+
+        self.membre.nom = 'Renommé'
+        self.membre.save()
+        noms = [m['nom'] for m in chef.get('/api/dashboard/chef/').data['membres']]
+        self.assertIn('Renommé', noms)
+
+        self.projet.membres.remove(self.membre)
+        self.assertEqual(membre.get('/api/dashboard/membre/').data['projets'], [])
+
+        creer_projet(self.chef, 'Second')
+        self.assertEqual(chef.get('/api/dashboard/chef/').data['projets_count'], 2)
+
+
+class ProjetsVisiblesTests(DashboardTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.chef = creer_membre('chef', 'CHEF_PROJET')
+        self.membre = creer_membre('membre')
+        self.admin = creer_membre('admin', 'ADMIN')
+        self.visible = creer_projet(self.chef, 'Visible', membres=[self.membre])
+        self.cache = creer_projet(self.chef, 'Caché')
+        self.tache_visible = creer_taches(self.visible, 1)[0]
+        self.tache_cachee = creer_taches(self.cache, 1)[0]
+        Commentaire.objects.create(contenu='visible', tache=self.tache_visible, auteur=self.chef)
+        Commentaire.objects.create(contenu='caché', tache=self.tache_cachee, auteur=self.chef)
+
+    def ids(self, client, url):
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return {objet['id'] for objet in response.data['results']}
+
+    def test_filtrage_par_projets_visibles(self):
+        membre = self.client_pour(self.membre)
+        self.assertEqual(self.ids(membre, '/api/projets/'), {self.visible.id})
+        self.assertEqual(self.ids(membre, '/api/taches/'), {self.tache_visible.id})
+        self.assertEqual(
+            {c['contenu'] for c in membre.get('/api/commentaires/').data['results']}, {'visible'}
+        )
+        admin = self.client_pour(self.admin)
+        self.assertEqual(self.ids(admin, '/api/projets/'), {self.visible.id, self.cache.id})
+        self.assertEqual(len(self.ids(admin, '/api/commentaires/')), 2)
+
+    def test_requete_sans_sous_requete_imbriquee(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client_pour(self.membre).get('/api/commentaires/')
+        sql = [q['sql'] for q in ctx.captured_queries if 'api_commentaire' in q['sql']]
+        self.assertEqual(len(sql), 1)
+        self.assertNotIn('SELECT U0', sql[0])
+
+    def test_cache_invalide_par_ajout_de_membre(self):
+        client = self.client_pour(self.membre)
+        self.assertEqual(self.ids(client, '/api/projets/'), {self.visible.id})
+        self.cache.membres.add(self.membre)
+        self.assertEqual(self.ids(client, '/api/projets/'), {self.visible.id, self.cache.id})
+        self.cache.membres.remove(self.membre)
+        self.assertEqual(self.ids(client, '/api/projets/'), {self.visible.id})
+
+    def test_cache_invalide_par_changement_de_createur(self):
+        client = self.client_pour(self.chef)
+        self.assertEqual(self.ids(client, '/api/projets/'), {self.visible.id, self.cache.id})
+        autre_chef = creer_membre('autre chef', 'CHEF_PROJET')
+        self.cache.cree_par = autre_chef
+        self.cache.save()
+        # L'ancien créateur ne le voit plus, le nouveau le voit
+        self.assertEqual(self.ids(client, '/api/projets/'), {self.visible.id})
+        self.assertEqual(self.ids(self.client_pour(autre_chef), '/api/projets/'), {self.cache.id})
+
+    def test_filtre_projet_id_des_taches(self):
+        client = self.client_pour(self.chef)
+        self.assertEqual(self.ids(client, f'/api/taches/?projet_id={self.cache.id}'), {self.tache_cachee.id})
+
+
+class PaginationTests(DashboardTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = creer_membre('admin', 'ADMIN')
+        self.projet = creer_projet(self.admin)
+        self.taches = creer_taches(self.projet, 25)
+
+    def parcourir(self, client, url):
+        ids = []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(set(response.data), {'next', 'previous', 'results'})
+            ids += [objet['id'] for objet in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def test_parcours_complet_par_curseur(self):
+        client = self.client_pour(self.admin)
+        ids = self.parcourir(client, '/api/taches/?page_size=10')
+        self.assertEqual(ids, sorted(t.id for t in self.taches))
+
+    def test_taille_de_page(self):
+        client = self.client_pour(self.admin)
+        self.assertEqual(len(client.get('/api/taches/?page_size=7').data['results']), 7)
+        with self.settings(API_MAX_PAGE_SIZE=5):
+            self.assertEqual(len(client.get('/api/taches/?page_size=50').data['results']), 5)
+
+    def test_enveloppe_sur_toutes_les_listes(self):
+        client = self.client_pour(self.admin)
+        for url in ('/api/taches/', '/api/projets/', '/api/membres/', '/api/fichiers/', '/api/commentaires/'):
+            self.assertIn('results', client.get(url).data, url)
+
+
+class PlansDeRequeteTests(DashboardTestMixin, TestCase):
+    """
+    Exécute EXPLAIN QUERY PLAN sur chaque requête émise par les vues les plus
+    sollicitées, sur une base générée, et échoue si l'une d'elles parcourt
+    entièrement une table volumineuse sans index.
+    """
+    TABLES_VOLUMINEUSES = ('api_tache', 'api_commentaire', 'MEMBRES')
+
+    @classmethod
+    def setUpTestData(cls):
+        from .management.commands._seed import seed_donnees
+        cls.chef = seed_donnees(20, 100, 2000, nb_commentaires=2000)
+        cls.membre = cls.chef.projets.first().membres.first()
+        cls.admin = creer_membre('admin', 'ADMIN')
+
+    def parcours_complets(self, client, url):
+        with self.settings(DASHBOARD_CACHE_TIMEOUT=0, VISIBILITE_CACHE_TIMEOUT=0):
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        parcours = []
+        with connection.cursor() as cursor:
+            for requete in ctx.captured_queries:
+                if not requete['sql'].startswith('SELECT'):
+                    continue
+                cursor.execute(f"EXPLAIN QUERY PLAN {requete['sql']}")
+                for ligne in cursor.fetchall():
+                    detail = ligne[-1]
+                    if detail.split(' ')[0] == 'SCAN' and detail.split(' ')[1] in self.TABLES_VOLUMINEUSES \
+                            and 'INDEX' not in detail:
+                        parcours.append((url, detail, requete['sql']))
+        return parcours
+
+    def test_aucun_parcours_complet(self):
+        tache = Tache.objects.filter(projet__cree_par=self.chef).first()
+        appels = [
+            (self.chef, '/api/dashboard/stats/'),
+            (self.chef, '/api/dashboard/chef/'),
+            (self.membre, '/api/dashboard/membre/'),
+            (self.membre, '/api/profile/'),
+            (self.membre, '/api/taches/'),
+            (self.membre, f'/api/taches/?projet_id={tache.projet_id}'),
+            (self.membre, '/api/projets/'),
+            (self.membre, '/api/fichiers/'),
+            (self.membre, '/api/commentaires/'),
+            (self.chef, f'/api/commentaires/?tache={tache.id}'),
+            (self.chef, '/api/membres/'),
+            (self.membre, f'/api/taches/calendrier/?debut={date.today()}&fin={date.today() + timedelta(days=6)}'),
+            (self.admin, f'/api/taches/calendrier/?debut={date.today()}&fin={date.today() + timedelta(days=6)}'),
+        ]
+        parcours = []
+        for membre, url in appels:
+            parcours += self.parcours_complets(self.client_pour(membre), url)
+        self.assertEqual(parcours, [])
+
+
+class ProjetDetailQueryCountTests(DashboardTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.chef = creer_membre('chef', 'CHEF_PROJET')
+        self.membres = [creer_membre(f'membre_{i}') for i in range(5)]
+
+    def test_nombre_de_requetes_fixe(self):
+        for nombre in (0, 10, 200):
+            projet = creer_projet(self.chef, f'Projet {nombre}', membres=self.membres)
+            for i, membre in enumerate(self.membres):
+                creer_taches(projet, nombre // len(self.membres), assignee=membre if i % 2 else None)
+            client = self.client_pour(self.chef)
+            # Profil, projets visibles, projet et créateur, tâches et assignés, membres
+            with self.assertNumQueries(5):
+                response = client.get(f'/api/projets/{projet.id}/')
+            self.assertEqual(len(response.data['taches']), nombre)
+            self.assertEqual(len(response.data['membres']), len(self.membres))
+            for tache in response.data['taches']:
+                self.assertEqual(tache['projet_nom'], projet.nom)
+
+
+class ChampsClairsemesTests(DashboardTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = creer_membre('admin', 'ADMIN')
+        self.membre = creer_membre('membre')
+        self.projet = creer_projet(self.admin, membres=[self.membre])
+        creer_taches(self.projet, 5, assignee=self.membre)
+
+    def get(self, url):
+        client = self.client_pour(self.admin)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, [q['sql'] for q in ctx.captured_queries if 'api_tache' in q['sql']]
+
+    def test_fields_restreint_reponse_et_colonnes(self):
+        response, sql = self.get('/api/taches/?fields=id,nom,statut,priorite,assignee,assignee_nom')
+        for tache in response.data['results']:
+            self.assertEqual(set(tache), {'id', 'nom', 'statut', 'priorite', 'assignee', 'assignee_nom'})
+            self.assertEqual(tache['assignee_nom'], 'membre')
+        self.assertEqual(len(sql), 1)
+        self.assertNotIn('description', sql[0])
+        self.assertIn('JOIN "MEMBRES"', sql[0])
+
+    def test_omit(self):
+        response, sql = self.get('/api/taches/?omit=description,projet_nom')
+        tache = response.data['results'][0]
+        self.assertNotIn('description', tache)
+        self.assertNotIn('projet_nom', tache)
+        self.assertIn('date_fin', tache)
+        self.assertNotIn('"api_tache"."description"', sql[0])
+
+    def test_pages_suivantes_sans_id(self):
+        for url in ('/api/taches/?fields=nom&page_size=2', '/api/taches/?omit=id&page_size=2'):
+            noms = []
+            while url:
+                response, _ = self.get(url)
+                self.assertTrue(all('id' not in tache for tache in response.data['results']))
+                noms += [tache['nom'] for tache in response.data['results']]
+                url = response.data['next']
+            self.assertEqual(noms, list(Tache.objects.order_by('id').values_list('nom', flat=True)))
+
+    def test_relation_multiple_prechargee(self):
+        for i in range(3):
+            creer_projet(self.admin, f'Autre {i}', membres=[self.membre])
+        client = self.client_pour(self.admin)
+        client.get('/api/projets/?fields=id,nom,membres')
+        with self.assertNumQueries(2):
+            response = client.get('/api/projets/?fields=id,nom,membres')
+        self.assertEqual(response.data['results'][0]['membres'], [self.membre.id])
+
+    def test_sans_parametre_reponse_complete(self):
+        response, _ = self.get('/api/taches/')
+        self.assertIn('description', response.data['results'][0])
+
+    def test_ecriture_non_affectee(self):
+        client = self.client_pour(self.admin)
+        response = client.patch(
+            f'/api/taches/{Tache.objects.first().id}/?fields=id', {'nom': 'Renommée'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['nom'], 'Renommée')
+
+
+class LectureRapideTests(DashboardTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = creer_membre('admin', 'ADMIN')
+        self.membre = creer_membre('membré spécial')
+        projet = creer_projet(self.admin, 'Projet «accentué»  ')
+        taches = creer_taches(projet, 3, assignee=self.membre) + creer_taches(projet, 2)
+        taches[0].description = None
+        taches[0].save()
+        for tache in taches:
+            Commentaire.objects.create(contenu='Commentaire \U0001F600 "cité"', tache=tache, auteur=self.membre)
+
+    def attendu(self, serializer_class, queryset):
+        data = serializer_class(queryset.order_by('id'), many=True).data
+        return JSONRenderer().render({'next': None, 'previous': None, 'results': data})
+
+    def test_octets_identiques_au_serializer(self):
+        client = self.client_pour(self.admin)
+        for url, serializer_class, queryset in (
+            ('/api/taches/', TacheSerializer, Tache.objects.all()),
+            ('/api/commentaires/', CommentaireSerializer, Commentaire.objects.all()),
+            ('/api/membres/', MembreSerializer, Membre.objects.filter(is_active=True)),
+        ):
+            response = client.get(url)
+            self.assertEqual(response.content, self.attendu(serializer_class, queryset), url)
+
+    def test_une_seule_requete_par_page(self):
+        client = self.client_pour(self.admin)
+        client.get('/api/taches/')
+        # Une seule requête jointe, sans chargement paresseux de l'assigné ou du projet
+        with self.assertNumQueries(1):
+            client.get('/api/taches/')
+
+    def test_rendu_orjson_identique(self):
+        data = {
+            'date': date(2025, 1, 2),
+            'moment': timezone.now(),
+            'texte': 'Ligne\u2028séparée\n"guillemets" \\ \U0001F600',
+            'liste': [1, 2.5, None, True],
+            3: 'clé entière',
+        }
+        self.assertEqual(RapideJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+class CalendrierTests(DashboardTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.chef = creer_membre('chef', 'CHEF_PROJET')
+        self.membre = creer_membre('membre')
+        self.projet = creer_projet(self.chef, 'Visible', membres=[self.membre])
+        Projet.objects.filter(pk=self.projet.pk).update(date_debut=date(2026, 1, 1), date_fin=date(2026, 6, 30))
+        self.autre = creer_projet(creer_membre('autre chef', 'CHEF_PROJET'), 'Caché')
+        self.debut = date(2026, 3, 1)
+        self.fin = date(2026, 3, 31)
+        intervalles = {
+            'avant': (date(2026, 2, 1), date(2026, 2, 28)),
+            'chevauche debut': (date(2026, 2, 20), date(2026, 3, 2)),
+            'dedans': (date(2026, 3, 10), date(2026, 3, 12)),
+            'englobe': (date(2026, 2, 1), date(2026, 4, 30)),
+            'apres': (date(2026, 4, 1), date(2026, 4, 5)),
+        }
+        self.taches = {}
+        for nom, (debut, fin) in intervalles.items():
+            self.taches[nom] = Tache.objects.create(
+                nom=nom, date_debut=debut, date_fin=fin, statut='En cours', priorite='Moyenne',
+                projet=self.projet, assignee=self.membre,
+            )
+        Tache.objects.create(
+            nom='cachée', date_debut=self.debut, date_fin=self.fin, statut='En cours', priorite='Moyenne',
+            projet=self.autre,
+        )
+
+    def get(self, membre, **params):
+        params = {'debut': self.debut.isoformat(), 'fin': self.fin.isoformat(), **params}
+        return self.client_pour(membre).get('/api/taches/calendrier/', params)
+
+    def test_taches_qui_recoupent_la_fenetre(self):
+        response = self.get(self.membre)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {t['nom'] for t in response.data['taches']}, {'chevauche debut', 'dedans', 'englobe'}
+        )
+        self.assertEqual(response.data['taches'][0]['projet_nom'], 'Visible')
+        self.assertEqual([p['nom'] for p in response.data['projets']], ['Visible'])
+
+    def test_echeances_par_jour(self):
+        response = self.get(self.membre)
+        self.assertEqual(response.data['jours'], {
+            '2026-03-02': [self.taches['chevauche debut'].id],
+            '2026-03-12': [self.taches['dedans'].id],
+        })
+
+    def test_nombre_de_requetes_fixe(self):
+        client = self.client_pour(self.membre)
+        params = {'debut': self.debut.isoformat(), 'fin': self.fin.isoformat()}
+        client.get('/api/taches/calendrier/', params)
+        # Projets visibles en cache : une requête pour les tâches, une pour les projets
+        with self.assertNumQueries(2):
+            client.get('/api/taches/calendrier/', params)
+
+    def test_filtre_par_projet(self):
+        response = self.get(self.membre, projet_id=self.projet.id)
+        self.assertEqual(len(response.data['taches']), 3)
+        self.assertEqual([p['nom'] for p in response.data['projets']], ['Visible'])
+        for projet_id in (self.autre.id, 0):
+            response = self.get(self.membre, projet_id=projet_id)
+            self.assertEqual((response.data['taches'], response.data['projets']), ([], []), projet_id)
+        self.assertEqual(len(self.get(self.membre, projet_id='').data['taches']), 3)
+
+    def test_fenetre_invalide(self):
+        for params in ({'debut': ''}, {'fin': '2026-13-01'}, {'fin': '2026-02-01'}, {'fin': '2028-01-01'},
+                       {'projet_id': 'abc'}):
+            self.assertEqual(self.get(self.membre, **params).status_code, 400, params)
+
+
+class OperationsEnMasseTests(DashboardTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.chef = creer_membre('chef', 'CHEF_PROJET')
+        self.membre = creer_membre('membre')
+        self.projet = creer_projet(self.chef, membres=[self.membre])
+        self.cache = creer_projet(creer_membre('autre chef', 'CHEF_PROJET'), 'Caché')
+        self.taches = creer_taches(self.projet, 6, assignee=self.membre)
+        self.cachee = creer_taches(self.cache, 1)[0]
+
+    def post(self, membre, action, taches):
+        return self.client_pour(membre).post(f'/api/taches/{action}/', {'taches': taches}, format='json')
+
+    def test_changement_de_statut_resultats_par_element(self):
+        a, b = self.taches[0], self.taches[1]
+        response = self.post(self.chef, 'bulk_change_status', [
+            {'id': a.id, 'statut': 'Terminé'},
+            {'id': b.id, 'statut': 'Inconnu'},
+            {'id': self.cachee.id, 'statut': 'Terminé'},
+            {'id': a.id, 'statut': 'En cours'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['resultats'], [
+            {'id': a.id, 'success': True},
+            {'id': b.id, 'error': 'Statut invalide'},
+            {'id': self.cachee.id, 'error': 'Tâche non trouvée'},
+            {'id': a.id, 'error': 'Tâche en double dans la requête'},
+        ])
+        a.refresh_from_db()
+        self.assertEqual(a.statut, 'Terminé')
+
+    def test_une_seule_mise_a_jour_et_compteurs_tenus(self):
+        elements = [{'id': t.id, 'statut': 'Terminé'} for t in self.taches]
+        client = self.client_pour(self.chef)
+        client.post('/api/taches/bulk_change_status/', {'taches': elements[:1]}, format='json')
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.post('/api/taches/bulk_change_status/', {'taches': elements}, format='json')
+        # Une seule écriture de tâches ; la première et celle créée terminée ne sont pas réécrites
+        self.assertEqual(response.data['modifiees'], 4)
+        ecritures = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "api_tache"')]
+        self.assertEqual(len(ecritures), 1)
+        self.assertEqual(recalculer_statistiques(corriger=False), {'StatistiquesProjet': 0, 'StatistiquesMembre': 0})
+        self.assertEqual(statistiques_membre(self.membre.id)['taches_terminees'], 6)
+
+    def test_membre_limite_a_ses_taches(self):
+        autre = creer_taches(self.projet, 1)[0]
+        response = self.post(self.membre, 'bulk_change_status', [
+            {'id': self.taches[0].id, 'statut': 'Terminé'},
+            {'id': autre.id, 'statut': 'Terminé'},
+        ])
+        self.assertTrue(response.data['resultats'][0]['success'])
+        self.assertIn('assignées', response.data['resultats'][1]['error'])
+
+    def test_assignation(self):
+        autre = creer_membre('autre')
+        response = self.post(self.chef, 'bulk_assign', [
+            {'id': self.taches[0].id, 'membre_id': autre.id},
+            {'id': self.taches[1].id, 'membre_id': 999999},
+            {'id': self.taches[2].id, 'membre_id': [autre.id]},
+            {'id': self.taches[3].id, 'membre_id': {'id': autre.id}},
+        ])
+        self.assertEqual(response.data['modifiees'], 1)
+        self.assertEqual(response.data['resultats'][1], {'id': self.taches[1].id, 'error': 'Membre non trouvé'})
+        self.assertEqual([r['error'] for r in response.data['resultats'][2:]], ['membre_id invalide'] * 2)
+        self.assertEqual(Tache.objects.get(pk=self.taches[0].id).assignee_id, autre.id)
+        self.assertEqual(statistiques_membre(autre.id)['taches_total'], 1)
+        self.assertEqual(recalculer_statistiques(corriger=False), {'StatistiquesProjet': 0, 'StatistiquesMembre': 0})
+
+    def test_creation(self):
+        statistiques_projets([self.projet.id])
+        valide = {
+            'nom': 'Nouvelle', 'date_debut': '2026-01-01', 'date_fin': '2026-01-10',
+            'statut': 'En attente', 'priorite': 'Haute', 'projet': self.projet.id,
+        }
+        response = self.post(self.membre, 'bulk_create', [
+            valide, {**valide, 'nom': ''}, {**valide, 'projet': self.cache.id},
+        ])
+        resultats = response.data['resultats']
+        self.assertEqual(response.data['creees'], 1)
+        self.assertTrue(Tache.objects.filter(pk=resultats[0]['id'], nom='Nouvelle').exists())
+        self.assertIn('nom', resultats[1]['errors'])
+        self.assertIn('projet', resultats[2]['errors'])
+        self.assertEqual(statistiques_projets([self.projet.id])['taches_total'], 7)
+
+    def test_corps_invalide(self):
+        for taches in ([], 'x', [{'id': 1}] * 501):
+            self.assertEqual(self.post(self.chef, 'bulk_change_status', taches).status_code, 400)
+
+
+class EcrituresCibleesTests(DashboardTestMixin, TestCase):
+    """Nombre et taille (en octets de SQL) des écritures émises par les actions de changement d'état."""
+
+    def setUp(self):
+        super().setUp()
+        self.admin = creer_membre('admin', 'ADMIN')
+        self.membre = creer_membre('membre')
+        projet = creer_projet(self.admin, membres=[self.membre])
+        self.tache = creer_taches(projet, 1)[0]
+        Tache.objects.filter(pk=self.tache.pk).update(description='x' * 5000, statut='En attente')
+
+    def ecritures(self, client, methode, url, data):
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(client, methode)(url, data, format='json')
+        self.assertLess(response.status_code, 300, response.data)
+        return [
+            q['sql'] for q in ctx.captured_queries
+            if q['sql'].startswith(('UPDATE "api_tache"', 'UPDATE "MEMBRES"', 'UPDATE "auth_user"'))
+        ]
+
+    def test_colonnes_ciblees(self):
+        client = self.client_pour(self.admin)
+        appels = [
+            ('post', f'/api/taches/{self.tache.id}/change_status/', {'statut': 'En cours'}),
+            ('post', f'/api/taches/{self.tache.id}/assign/', {'membre_id': self.membre.id}),
+            ('post', f'/api/membres/{self.membre.id}/archive/', {}),
+            ('post', f'/api/membres/{self.membre.id}/unarchive/', {}),
+            ('patch', '/api/profile/', {'nom': 'Nouveau nom', 'email': 'admin@example.com'}),
+        ]
+        for methode, url, data in appels:
+            ecritures = self.ecritures(client, methode, url, data)
+            self.assertTrue(ecritures, url)
+            for sql in ecritures:
+                # Une seule ligne, sans réécrire la description ni les autres colonnes
+                self.assertNotIn('description', sql, url)
+                self.assertLess(len(sql.encode()), 300, url)
+        self.assertEqual(recalculer_statistiques(corriger=False), {'StatistiquesProjet': 0, 'StatistiquesMembre': 0})
+
+    def test_aucune_ecriture_sans_changement(self):
+        client = self.client_pour(self.admin)
+        appels = [
+            ('post', f'/api/taches/{self.tache.id}/change_status/', {'statut': 'En attente'}),
+            ('post', f'/api/taches/{self.tache.id}/assign/', {'membre_id': self.membre.id}),
+            ('post', f'/api/membres/{self.membre.id}/unarchive/', {}),
+            ('patch', '/api/profile/', {'nom': 'admin', 'email': ''}),
+        ]
+        Tache.objects.filter(pk=self.tache.pk).update(assignee=self.membre)
+        for methode, url, data in appels:
+            self.assertEqual(self.ecritures(client, methode, url, data), [], url)
+
+
+class AuthentificationTests(DashboardTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.membre = creer_membre('membre')
+        self.client = APIClient()
+        token = AccessToken.for_user(User.objects.get(pk=self.membre.user_id))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def requetes_auth(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/profile/')
+        self.assertEqual(response.status_code, 200)
+        # Lectures de l'utilisateur ou de son profil (par user_id)
+        return [
+            q['sql'] for q in ctx.captured_queries
+            if '"auth_user"' in q['sql'] or '"MEMBRES"."user_id" =' in q['sql']
+        ]
+
+    def test_utilisateur_et_membre_en_une_requete(self):
+        with self.settings(AUTH_CACHE_TIMEOUT=0):
+            requetes = self.requetes_auth()
+        self.assertEqual(len(requetes), 1)
+        self.assertIn('JOIN "MEMBRES"', requetes[0])
+
+    def test_aucune_requete_depuis_le_cache(self):
+        self.requetes_auth()
+        self.assertEqual(self.requetes_auth(), [])
+
+    def test_cache_oublie_apres_changement_de_role(self):
+        self.assertEqual(self.client.get('/api/profile/').data['role'], 'MEMBRE')
+        self.membre.role = 'CHEF_PROJET'
+        self.membre.save()
+        self.assertEqual(self.client.get('/api/profile/').data['role'], 'CHEF_PROJET')
+
+    def test_utilisateur_desactive(self):
+        self.client.get('/api/profile/')
+        user = User.objects.get(pk=self.membre.user_id)
+        user.is_active = False
+        user.save()
+        self.assertEqual(self.client.get('/api/profile/').status_code, 401)
+
+    def test_mot_de_passe_pas_en_cache(self):
+        self.client.get('/api/profile/')
+        user = charger_utilisateur(self.membre.user_id)
+        self.assertNotIn('password', user.__dict__)
+        self.assertEqual(user.password, User.objects.get(pk=self.membre.user_id).password)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ClaimsJetonTests(DashboardTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = creer_membre('admin', 'ADMIN')
+        self.membre = creer_membre('membre')
+        user = self.membre.user
+        user.set_password('secret')
+        user.save()
+
+    def connexion(self):
+        response = APIClient().post('/api/login/', {'username': 'membre', 'password': 'secret'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        return client, response.data
+
+    def test_claims_et_reponse(self):
+        _, data = self.connexion()
+        token = AccessToken(data['access'])
+        self.assertEqual(
+            (token['membre_id'], token['role'], token['is_active'], token['version']),
+            (self.membre.id, 'MEMBRE', True, 0),
+        )
+        self.assertEqual((data['membre_id'], data['role']), (self.membre.id, 'MEMBRE'))
+
+    def test_permission_sans_requete(self):
+        client, _ = self.connexion()
+        client.get('/api/profile/')
+        # Utilisateur et version des jetons en cache, rôle lu dans le jeton
+        with self.assertNumQueries(0):
+            response = client.post('/api/projets/', {}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_archivage_revoque_les_jetons(self):
+        client, data = self.connexion()
+        self.assertEqual(client.get('/api/profile/').status_code, 200)
+        response = self.client_pour(self.admin).post(f'/api/membres/{self.membre.id}/archive/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client.get('/api/profile/').status_code, 401)
+        response = APIClient().post('/api/token/refresh/', {'refresh': data['refresh']}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_changement_de_role_revoque_les_jetons(self):
+        client, _ = self.connexion()
+        response = self.client_pour(self.admin).patch(
+            f'/api/membres/{self.membre.id}/', {'role': 'CHEF_PROJET'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client.get('/api/profile/').status_code, 401)
+        client, data = self.connexion()
+        self.assertEqual(data['role'], 'CHEF_PROJET')
+        self.assertEqual(client.get('/api/profile/').status_code, 200)
+
+    def test_desactivation_revoque_les_jetons(self):
+        client, _ = self.connexion()
+        response = self.client_pour(self.admin).patch(
+            f'/api/membres/{self.membre.id}/', {'is_active': False}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client.get('/api/profile/').status_code, 401)
+
+    def test_revocation_par_un_autre_processus(self):
+        client, _ = self.connexion()
+        self.assertEqual(client.get('/api/profile/').status_code, 200)
+        # Révocation faite ailleurs : seule la base est modifiée, pas ce cache
+        Membre.objects.filter(pk=self.membre.pk).update(version_jetons=1)
+        self.assertEqual(client.get('/api/profile/').status_code, 200)
+        cache.clear()  # expiration de AUTH_CACHE_TIMEOUT
+        self.assertEqual(client.get('/api/profile/').status_code, 401)
+
+
+class ExportTests(DashboardTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from .management.commands._seed import seed_donnees
+        cls.chef = seed_donnees(10, 20, 6000, nb_commentaires=200)
+        cls.membre = cls.chef.projets.first().membres.first()
+
+    def exporter(self, membre, url):
+        response = self.client_pour(membre).get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_identique_a_la_liste(self):
+        contenu = self.exporter(self.membre, '/api/taches/export/')
+        lignes = list(csv.DictReader(StringIO(contenu)))
+        visibles = Tache.objects.filter(projet__in=self.membre.projets_membre.all()).order_by('id')
+        self.assertEqual(len(lignes), visibles.count())
+        attendu = TacheSerializer(visibles.first()).data
+        premiere = min(lignes, key=lambda ligne: int(ligne['id']))
+        self.assertEqual(list(premiere), list(attendu))
+        self.assertEqual(premiere['nom'], attendu['nom'])
+        self.assertEqual(premiere['date_fin'], attendu['date_fin'])
+
+    def test_ndjson(self):
+        contenu = self.exporter(self.chef, '/api/commentaires/export/?type=ndjson')
+        lignes = [json.loads(ligne) for ligne in contenu.splitlines()]
+        self.assertEqual(len(lignes), 200)
+        commentaire = Commentaire.objects.get(pk=lignes[0]['id'])
+        attendu = json.loads(JSONRenderer().render(CommentaireSerializer(commentaire).data))
+        self.assertEqual(lignes[0], attendu)
+
+    def test_projets_avec_membres(self):
+        contenu = self.exporter(self.membre, '/api/projets/export/?type=ndjson')
+        lignes = [json.loads(ligne) for ligne in contenu.splitlines()]
+        self.assertEqual(len(lignes), self.membre.projets_membre.count())
+        self.assertTrue(all(self.membre.id in ligne['membres'] for ligne in lignes))
+
+    def test_type_invalide(self):
+        self.assertEqual(self.client_pour(self.chef).get('/api/taches/export/?type=xml').status_code, 400)
+
+    def pic_memoire(self, url):
+        client = self.client_pour(self.chef)
+        with self.settings(EXPORT_CHUNK_SIZE=200):
+            response = client.get(url)
+            taille = 0
+            tracemalloc.start()
+            try:
+                for morceau in response.streaming_content:
+                    taille += len(morceau)
+                _, pic = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+        return taille, pic
+
+    def test_memoire_bornee(self):
+        projet = self.chef.projets.first()
+        petite_taille, petit_pic = self.pic_memoire(f'/api/taches/export/?type=ndjson&projet_id={projet.id}')
+        taille, pic = self.pic_memoire('/api/taches/export/?type=ndjson')
+        # Dix fois plus de lignes, sans que le pic de mémoire ne suive
+        self.assertGreater(taille, 5 * petite_taille)
+        self.assertLess(pic, 2 * petit_pic)
+
+    def test_en_flux_sous_asgi(self):
+        attendu = self.exporter(self.membre, '/api/taches/export/?type=ndjson')
+        jeton = AccessToken.for_user(User.objects.get(pk=self.membre.user_id))
+
+        async def exporter():
+            response = await AsyncClient().get('/api/taches/export/?type=ndjson', headers={'Authorization': f'Bearer {jeton}'})
+            # Itérateur asynchrone : pas de lecture de tout l'export par sync_to_async(list)
+            self.assertTrue(response.is_async)
+            return b''.join([morceau async for morceau in response.streaming_content]).decode()
+
+        self.assertEqual(async_to_sync(exporter)(), attendu)
+
+
+class ImportTests(DashboardTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.chef = creer_membre('chef', 'CHEF_PROJET')
+        self.membre = creer_membre('membre')
+        self.projet = creer_projet(self.chef, 'Visible', membres=[self.membre])
+        self.cache = creer_projet(creer_membre('autre chef', 'CHEF_PROJET'), 'Caché')
+
+    def importer(self, membre, url, nom, contenu):
+        fichier = SimpleUploadedFile(nom, contenu.encode())
+        return self.client_pour(membre).post(url, {'fichier': fichier}, format='multipart')
+
+    def csv_taches(self, lignes):
+        entete = 'nom,date_debut,date_fin,statut,priorite,projet,assignee\n'
+        return entete + ''.join(f'{ligne}\n' for ligne in lignes)
+
+    def test_import_csv_avec_erreurs_par_ligne(self):
+        contenu = self.csv_taches([
+            'A,2026-01-01,2026-01-05,En cours,Haute,Visible,membre',
+            f'B,2026-01-01,2026-01-05,Terminé,Basse,{self.projet.id},',
+            'C,pas une date,2026-01-05,En cours,Haute,Visible,membre',
+            'D,2026-01-01,2026-01-05,En cours,Haute,Caché,membre',
+            'E,2026-01-01,2026-01-05,En cours,Haute,Visible,inconnu',
+        ])
+        response = self.importer(self.membre, '/api/taches/import/', 'taches.csv', contenu)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['lignes'], response.data['creees']), (5, 2))
+        self.assertEqual([e['ligne'] for e in response.data['erreurs']], [3, 4, 5])
+        self.assertIn('date_debut', response.data['erreurs'][0]['errors'])
+        self.assertIn('projet', response.data['erreurs'][1]['errors'])
+        self.assertIn('assignee', response.data['erreurs'][2]['errors'])
+        self.assertEqual(Tache.objects.get(nom='A').assignee_id, self.membre.id)
+        self.assertIsNone(Tache.objects.get(nom='B').assignee_id)
+        self.assertEqual(recalculer_statistiques(corriger=False), {'StatistiquesProjet': 0, 'StatistiquesMembre': 0})
+
+    def test_encodage_invalide(self):
+        # Lignes valides puis une ligne en Latin-1 : rien n'est importé
+        contenu = self.csv_taches(['A,2026-01-01,2026-01-05,En cours,Haute,Visible,membre'] * 3).encode()
+        contenu += 'É,2026-01-01,2026-01-05,En cours,Haute,Visible,membre\n'.encode('latin-1')
+        response = self.client_pour(self.membre).post(
+            '/api/taches/import/', {'fichier': SimpleUploadedFile('taches.csv', contenu)}, format='multipart'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('UTF-8', response.data['error'])
+        self.assertFalse(Tache.objects.exists())
+
+    def test_validation_sans_requete_par_ligne(self):
+        def requetes(nombre):
+            contenu = self.csv_taches(
+                [f'T{i},2026-01-01,2026-01-05,En cours,Haute,Visible,membre' for i in range(nombre)]
+            )
+            client = self.client_pour(self.chef)
+            client.get('/api/profile/')
+            with CaptureQueriesContext(connection) as ctx:
+                client.post('/api/taches/import/', {'fichier': SimpleUploadedFile('t.csv', contenu.encode())})
+            return len(ctx.captured_queries)
+
+        # Premier import : projets visibles mis en cache
+        requetes(1)
+        self.assertEqual(requetes(5), requetes(50))
+
+    def test_import_ndjson_de_projets(self):
+        contenu = '\n'.join([
+            json.dumps({'nom': 'Importé', 'description': 'd', 'date_debut': '2026-01-01',
+                        'date_fin': '2026-02-01', 'statut': 'En cours', 'membres': ['membre']}),
+            '{pas du json',
+        ])
+        response = self.importer(self.chef, '/api/projets/import/', 'projets.ndjson', contenu)
+        self.assertEqual(response.data['creees'], 1)
+        self.assertEqual(response.data['erreurs'][0]['ligne'], 2)
+        projet = Projet.objects.get(nom='Importé')
+        self.assertEqual(projet.cree_par_id, self.chef.id)
+        self.assertEqual(list(projet.membres.values_list('id', flat=True)), [self.membre.id])
+        # Visible immédiatement par le membre (cache de visibilité invalidé)
+        noms = [p['nom'] for p in self.client_pour(self.membre).get('/api/projets/').data['results']]
+        self.assertIn('Importé', noms)
+
+    def test_reimport_d_un_export(self):
+        creer_taches(self.projet, 3, assignee=self.membre)
+        export = b''.join(self.client_pour(self.chef).get('/api/taches/export/').streaming_content).decode()
+        response = self.importer(self.chef, '/api/taches/import/', 'taches.csv', export)
+        self.assertEqual((response.data['creees'], response.data['erreurs']), (3, []))
+        self.assertEqual(Tache.objects.filter(projet=self.projet).count(), 6)
+
+    def test_projets_reserves_aux_chefs(self):
+        response = self.importer(self.membre, '/api/projets/import/', 'projets.csv', 'nom\n')
+        self.assertEqual(response.status_code, 403)
+
+
+class TeleversementTests(DashboardTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        racine = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, racine, ignore_errors=True)
+        reglages = override_settings(
+            TELEVERSEMENTS_ROOT=os.path.join(racine, 'televersements'),
+            MEDIA_ROOT=os.path.join(racine, 'media'),
+            TELEVERSEMENT_TAILLE_PART=10,
+        )
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        self.chef = creer_membre('chef', 'CHEF_PROJET')
+        self.membre = creer_membre('membre')
+        self.projet = creer_projet(self.chef, membres=[self.membre])
+        self.contenu = bytes(range(25))
+
+    def ouvrir(self, membre=None, **donnees):
+        donnees = {'nom': 'maquette.psd', 'projet': self.projet.id, 'taille': len(self.contenu), **donnees}
+        return self.client_pour(membre or self.membre).post('/api/televersements/', donnees, format='json')
+
+    def envoyer(self, televersement_id, numero, contenu, membre=None, **entetes):
+        return self.client_pour(membre or self.membre).generic(
+            'PUT', f'/api/televersements/{televersement_id}/parts/{numero}/', contenu,
+            content_type='application/octet-stream', **entetes,
+        )
+
+    def partie(self, numero):
+        return self.contenu[numero * 10:(numero + 1) * 10]
+
+    def test_parties_dans_le_desordre_puis_reprise(self):
+        ouvert = self.ouvrir()
+        self.assertEqual(ouvert.status_code, 201)
+        self.assertEqual((ouvert.data['taille_part'], ouvert.data['nombre_parts']), (10, 3))
+        televersement_id = ouvert.data['id']
+        self.assertEqual(self.envoyer(televersement_id, 2, self.partie(2)).status_code, 200)
+        self.assertEqual(self.envoyer(televersement_id, 0, self.partie(0)).status_code, 200)
+
+        etat = self.client_pour(self.membre).get(f'/api/televersements/{televersement_id}/')
+        self.assertEqual(etat.data['parts_recues'], [0, 2])
+
+        self.assertEqual(self.envoyer(televersement_id, 1, self.partie(1)).status_code, 200)
+        # Dossier des parties supprimé une fois la transaction validée
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client_pour(self.membre).post(f'/api/televersements/{televersement_id}/complete/')
+        self.assertEqual(response.status_code, 201)
+        fichier = Fichier.objects.get(pk=response.data['id'])
+        self.assertEqual((fichier.nom, fichier.projet_id), ('maquette.psd', self.projet.id))
+        with fichier.fichier.open('rb') as contenu:
+            self.assertEqual(contenu.read(), self.contenu)
+        self.assertFalse(Televersement.objects.exists())
+        self.assertFalse(os.path.exists(os.path.join(settings.TELEVERSEMENTS_ROOT, str(televersement_id))))
+
+    def test_parties_refusees(self):
+        televersement_id = self.ouvrir().data['id']
+        mauvaise = hashlib.sha256(b'autre chose').hexdigest()
+        bonne = hashlib.sha256(self.partie(0)).hexdigest()
+        self.assertEqual(self.envoyer(televersement_id, 0, self.partie(0), HTTP_X_SHA256=mauvaise).status_code, 400)
+        self.assertEqual(self.envoyer(televersement_id, 0, self.partie(0)[:5]).status_code, 400)
+        self.assertEqual(self.envoyer(televersement_id, 2, self.contenu[20:] + b'!').status_code, 400)
+        self.assertEqual(self.envoyer(televersement_id, 3, b'x').status_code, 400)
+        self.assertEqual(self.envoyer(televersement_id, 0, b'').status_code, 400)
+        etat = self.client_pour(self.membre).get(f'/api/televersements/{televersement_id}/')
+        self.assertEqual(etat.data['parts_recues'], [])
+        self.assertEqual(self.envoyer(televersement_id, 0, self.partie(0), HTTP_X_SHA256=bonne).status_code, 200)
+
+    def test_assemblage_incomplet_ou_empreinte_incorrecte(self):
+        televersement_id = self.ouvrir(sha256=hashlib.sha256(b'autre chose').hexdigest()).data['id']
+        client = self.client_pour(self.membre)
+        self.envoyer(televersement_id, 0, self.partie(0))
+        response = client.post(f'/api/televersements/{televersement_id}/complete/')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('[1, 2]', response.data['error'])
+        for numero in (1, 2):
+            self.envoyer(televersement_id, numero, self.partie(numero))
+        self.assertEqual(client.post(f'/api/televersements/{televersement_id}/complete/').status_code, 400)
+        self.assertFalse(Fichier.objects.exists())
+        self.assertTrue(Televersement.objects.filter(pk=televersement_id).exists())
+
+    def test_acces_reserve_au_createur_et_aux_projets_visibles(self):
+        televersement_id = self.ouvrir().data['id']
+        intrus = creer_membre('intrus')
+        self.assertEqual(self.envoyer(televersement_id, 0, self.partie(0), membre=intrus).status_code, 404)
+        self.assertEqual(self.client_pour(intrus).get(f'/api/televersements/{televersement_id}/').status_code, 404)
+        self.assertEqual(self.ouvrir(membre=intrus).status_code, 400)
+        self.assertEqual(self.ouvrir(taille=0).status_code, 400)
+
+    def test_sans_profil_membre(self):
+        self.assertEqual(APIClient().get('/api/televersements/1/').status_code, 401)
+        sans_profil = APIClient()
+        sans_profil.force_authenticate(User.objects.create_user(username='sans_profil'))
+        self.assertEqual(sans_profil.get('/api/televersements/1/').status_code, 403)
+        self.assertEqual(sans_profil.post('/api/televersements/', {}, format='json').status_code, 403)
+
+    def test_parties_et_assemblage_sous_verrou(self):
+        televersement_id = self.ouvrir().data['id']
+        verrous = []
+
+        def sous_verrou(fonction):
+            def appel(objet, *args):
+                # Ligne relue par select_for_update, dans la transaction de la requête
+                verrous.append(connection.in_atomic_block and Televersement.objects.select_for_update().filter(
+                    pk=objet.pk).exists())
+                return fonction(objet, *args)
+            return appel
+
+        with mock.patch('api.televersement.ecrire_part', sous_verrou(televersement.ecrire_part)), \
+                mock.patch('api.televersement.terminer', sous_verrou(televersement.terminer)):
+            for numero in range(3):
+                self.envoyer(televersement_id, numero, self.partie(numero))
+            response = self.client_pour(self.membre).post(f'/api/televersements/{televersement_id}/complete/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(verrous, [True] * 4)
+        vue = TeleversementViewSet(request=mock.Mock(user=User.objects.get(pk=self.membre.user_id)))
+        for action in ('part', 'complete', 'destroy', 'retrieve'):
+            vue.action = action
+            self.assertEqual(vue.get_queryset().query.select_for_update, action != 'retrieve')
+
+    def test_purge_des_televersements_abandonnes(self):
+        televersement_id = self.ouvrir().data['id']
+        self.envoyer(televersement_id, 0, self.partie(0))
+        Televersement.objects.filter(pk=televersement_id).update(date_creation=timezone.now() - timedelta(days=2))
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('purger_televersements', stdout=StringIO())
+        self.assertFalse(Televersement.objects.exists())
+        self.assertFalse(os.path.exists(os.path.join(settings.TELEVERSEMENTS_ROOT, str(televersement_id))))
+
+
+class TeleversementReglagesTests(DashboardTestMixin, TestCase):
+    # Sans override_settings : les réglages du projet doivent suffire
+    def test_dossier_par_defaut(self):
+        self.assertEqual(str(settings.TELEVERSEMENTS_ROOT), os.path.join(settings.BASE_DIR, 'televersements'))
+        membre = creer_membre('membre')
+        projet = creer_projet(creer_membre('chef', 'CHEF_PROJET'), membres=[membre])
+        response = self.client_pour(membre).post(
+            '/api/televersements/', {'nom': 'plan.pdf', 'projet': projet.id, 'taille': 10}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['parts_recues'], [])
+        call_command('purger_televersements', stdout=StringIO())
+
+
+class StockageContenuTests(DashboardTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        racine = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, racine, ignore_errors=True)
+        reglages = override_settings(MEDIA_ROOT=racine, TELEVERSEMENTS_ROOT=os.path.join(racine, 'televersements'))
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        self.chef = creer_membre('chef', 'CHEF_PROJET')
+        self.projets = [creer_projet(self.chef, f'P{i}') for i in range(2)]
+
+    def deposer(self, projet, nom, contenu):
+        response = self.client_pour(self.chef).post('/api/fichiers/', {
+            'nom': nom, 'projet': projet.id, 'date_partage': '2026-01-01',
+            'fichier': SimpleUploadedFile(nom, contenu),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        return Fichier.objects.get(pk=response.data['id'])
+
+    def chemin(self, fichier):
+        return os.path.join(settings.MEDIA_ROOT, fichier.fichier.name)
+
+    def test_doublons_stockes_une_fois_et_supprimes_avec_la_derniere_reference(self):
+        premier = self.deposer(self.projets[0], 'cahier.pdf', b'%PDF identique')
+        second = self.deposer(self.projets[1], 'copie.pdf', b'%PDF identique')
+        autre = self.deposer(self.projets[1], 'autre.pdf', b'%PDF different')
+        empreinte = hashlib.sha256(b'%PDF identique').hexdigest()
+        self.assertEqual(premier.fichier.name, f'contenus/{empreinte[:2]}/{empreinte}.pdf')
+        self.assertEqual(second.fichier.name, premier.fichier.name)
+        self.assertNotEqual(autre.fichier.name, premier.fichier.name)
+        self.assertEqual(Contenu.objects.get(pk=empreinte).references, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client_pour(self.chef).delete(f'/api/fichiers/{premier.id}/')
+        self.assertTrue(os.path.exists(self.chemin(second)))
+        self.assertEqual(Contenu.objects.get(pk=empreinte).references, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.projets[1].delete()
+        self.assertFalse(os.path.exists(self.chemin(second)))
+        self.assertFalse(os.path.exists(self.chemin(autre)))
+        self.assertFalse(Contenu.objects.exists())
+
+    def test_meme_contenu_ecrit_en_meme_temps(self):
+        contenu = b'ecrit par deux requetes'
+        empreinte = hashlib.sha256(contenu).hexdigest()
+        nom = stockage().nom_contenu(empreinte, 'rapport.txt')
+        # L'autre requête a écrit le fichier après la vérification de celle-ci
+        os.makedirs(os.path.dirname(stockage().path(nom)))
+        with open(stockage().path(nom), 'wb') as autre:
+            autre.write(contenu)
+        with mock.patch.object(StockageContenu, 'exists', return_value=False):
+            enregistre = stockage().save('rapport.txt', SimpleUploadedFile('rapport.txt', contenu))
+        self.assertEqual(enregistre, nom)
+        self.assertEqual(os.listdir(os.path.dirname(stockage().path(nom))), [os.path.basename(nom)])
+        self.assertEqual(Contenu.objects.get(pk=empreinte).nom, nom)
+
+    def test_reference_recreee_si_le_contenu_a_ete_retire(self):
+        fichier = self.deposer(self.projets[0], 'note.txt', b'note')
+        Contenu.objects.all().delete()
+        ajuster_references(fichier.fichier.name, 1)
+        self.assertEqual(Contenu.objects.get().references, 1)
+
+    def test_remplacement_du_fichier(self):
+        fichier = self.deposer(self.projets[0], 'plan.txt', b'version 1')
+        ancien = self.chemin(fichier)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client_pour(self.chef).patch(
+                f'/api/fichiers/{fichier.id}/', {'fichier': SimpleUploadedFile('plan.txt', b'version 2')},
+                format='multipart',
+            )
+        self.assertEqual(response.status_code, 200)
+        fichier.refresh_from_db()
+        self.assertFalse(os.path.exists(ancien))
+        with fichier.fichier.open('rb') as contenu:
+            self.assertEqual(contenu.read(), b'version 2')
+        self.assertEqual(list(Contenu.objects.values_list('nom', 'references')), [(fichier.fichier.name, 1)])
+
+    def test_televersement_d_un_contenu_deja_stocke(self):
+        existant = self.deposer(self.projets[0], 'maquette.psd', b'calques')
+        client = self.client_pour(self.chef)
+        ouvert = client.post(
+            '/api/televersements/', {'nom': 'maquette.psd', 'projet': self.projets[1].id, 'taille': 7}, format='json'
+        )
+        client.generic('PUT', f"/api/televersements/{ouvert.data['id']}/parts/0/", b'calques',
+                       content_type='application/octet-stream')
+        response = client.post(f"/api/televersements/{ouvert.data['id']}/complete/")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Fichier.objects.get(pk=response.data['id']).fichier.name, existant.fichier.name)
+        self.assertEqual(Contenu.objects.get().references, 2)
+
+    def test_migration_des_anciens_fichiers(self):
+        os.makedirs(os.path.join(settings.MEDIA_ROOT, 'fichiers'))
+        for nom, contenu in (('a.pdf', b'meme contenu'), ('b.pdf', b'meme contenu'), ('c.pdf', b'unique')):
+            with open(os.path.join(settings.MEDIA_ROOT, 'fichiers', nom), 'wb') as sortie:
+                sortie.write(contenu)
+        anciens = [
+            Fichier.objects.create(nom=nom, fichier=f'fichiers/{nom}', projet=self.projets[0], date_partage=date.today())
+            for nom in ('a.pdf', 'b.pdf', 'c.pdf', 'a.pdf')
+        ]
+
+        sortie = StringIO()
+        call_command('dedupliquer_fichiers', '--simuler', stdout=sortie)
+        self.assertIn('12 octet(s) seraient récupérés', sortie.getvalue())
+        self.assertFalse(Contenu.objects.exists())
+
+        sortie = StringIO()
+        call_command('dedupliquer_fichiers', stdout=sortie)
+        self.assertIn('12 octet(s) récupérés', sortie.getvalue())
+        noms = [Fichier.objects.get(pk=f.pk).fichier.name for f in anciens]
+        self.assertEqual(len({noms[0], noms[1], noms[3]}), 1)
+        self.assertNotEqual(noms[0], noms[2])
+        self.assertEqual(os.listdir(os.path.join(settings.MEDIA_ROOT, 'fichiers')), [])
+        self.assertEqual(dict(Contenu.objects.values_list('nom', 'references')), {noms[0]: 3, noms[2]: 1})
+        with open(os.path.join(settings.MEDIA_ROOT, noms[0]), 'rb') as contenu:
+            self.assertEqual(contenu.read(), b'meme contenu')
+
+
+class TelechargementTests(DashboardTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        racine = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, racine, ignore_errors=True)
+        reglages = override_settings(MEDIA_ROOT=racine)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        self.chef = creer_membre('chef', 'CHEF_PROJET')
+        self.membre = creer_membre('membre')
+        self.contenu = bytes(range(256)) * 4
+        self.fichier = Fichier(nom='plan été.pdf', projet=creer_projet(self.chef, membres=[self.membre]),
+                               date_partage=date.today())
+        self.fichier.fichier.save('plan.pdf', SimpleUploadedFile('plan.pdf', self.contenu))
+        self.url = f'/api/fichiers/{self.fichier.id}/download/'
+
+    def telecharger(self, membre=None, **entetes):
+        return self.client_pour(membre or self.membre).get(self.url, **entetes)
+
+    def test_fichier_entier(self):
+        response = self.telecharger()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.contenu)
+        self.assertEqual(response['Content-Length'], str(len(self.contenu)))
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIn("filename*=utf-8''plan%20%C3%A9t%C3%A9.pdf", response['Content-Disposition'])
+        self.assertEqual(response['ETag'], f'"{hashlib.sha256(self.contenu).hexdigest()}"')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('Last-Modified', response)
+
+    def test_requetes_partielles(self):
+        for plage, attendu in (('bytes=10-19', self.contenu[10:20]), ('bytes=1000-', self.contenu[1000:]),
+                               ('bytes=-5', self.contenu[-5:]), ('bytes=1020-5000', self.contenu[1020:])):
+            response = self.telecharger(HTTP_RANGE=plage)
+            self.assertEqual(response.status_code, 206, plage)
+            self.assertEqual(b''.join(response.streaming_content), attendu, plage)
+            self.assertEqual(response['Content-Length'], str(len(attendu)))
+        self.assertEqual(self.telecharger(HTTP_RANGE='bytes=10-19')['Content-Range'], 'bytes 10-19/1024')
+        response = self.telecharger(HTTP_RANGE='bytes=2000-')
+        self.assertEqual((response.status_code, response['Content-Range']), (416, 'bytes */1024'))
+        # Plusieurs intervalles ou If-Range périmé : fichier entier
+        self.assertEqual(self.telecharger(HTTP_RANGE='bytes=0-1,5-6').status_code, 200)
+        self.assertEqual(self.telecharger(HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"autre"').status_code, 200)
+        etag = self.telecharger()['ETag']
+        self.assertEqual(self.telecharger(HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE=etag).status_code, 206)
+
+    def test_requetes_conditionnelles(self):
+        premiere = self.telecharger()
+        self.assertEqual(self.telecharger(HTTP_IF_NONE_MATCH=premiere['ETag']).status_code, 304)
+        self.assertEqual(self.telecharger(HTTP_IF_MODIFIED_SINCE=premiere['Last-Modified']).status_code, 304)
+        self.assertEqual(self.telecharger(HTTP_IF_NONE_MATCH='"autre"').status_code, 200)
+
+    def test_envoi_confie_au_serveur_web(self):
+        with override_settings(TELECHARGEMENT_SENDFILE='x-accel-redirect'):
+            response = self.telecharger()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['X-Accel-Redirect'], f'/protege/{self.fichier.fichier.name}')
+        with override_settings(TELECHARGEMENT_SENDFILE='x-sendfile'):
+            response = self.telecharger()
+        self.assertEqual(response['X-Sendfile'], self.fichier.fichier.path)
+
+    def test_permissions_et_lien_signe(self):
+        intrus = creer_membre('intrus')
+        self.assertEqual(self.telecharger(intrus).status_code, 404)
+        self.assertEqual(APIClient().get(self.url).status_code, 404)
+        self.assertEqual(self.client_pour(intrus).get(f'/api/fichiers/{self.fichier.id}/lien/').status_code, 404)
+
+        lien = self.client_pour(self.membre).get(f'/api/fichiers/{self.fichier.id}/lien/').data['url']
+        response = APIClient().get(lien)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.contenu)
+        self.assertEqual(APIClient().get(lien.replace('jeton=', 'jeton=x')).status_code, 403)
+        with override_settings(TELECHARGEMENT_LIEN_DUREE=-1):
+            self.assertEqual(APIClient().get(lien).status_code, 403)
+
+    def test_en_flux_sous_asgi(self):
+        lien = self.client_pour(self.membre).get(f'/api/fichiers/{self.fichier.id}/lien/').data['url']
+
+        async def telecharger(**entetes):
+            response = await AsyncClient().get(lien, headers=entetes)
+            self.assertTrue(response.is_async)
+            return response, b''.join([morceau async for morceau in response.streaming_content])
+
+        # Petits blocs : le fichier est bien envoyé en plusieurs morceaux
+        with mock.patch('api.telechargement.TAILLE_BLOC', 100):
+            response, contenu = async_to_sync(telecharger)()
+            self.assertEqual((response.status_code, contenu), (200, self.contenu))
+            self.assertEqual(response['Content-Length'], str(len(self.contenu)))
+            response, contenu = async_to_sync(telecharger)(Range='bytes=10-509')
+            self.assertEqual((response.status_code, contenu), (206, self.contenu[10:510]))
+
+
+class SynchroTests(DashboardTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.chef = creer_membre('chef', 'CHEF_PROJET')
+        self.membre = creer_membre('membre')
+        self.projet = creer_projet(self.chef, 'Visible', membres=[self.membre])
+        self.cache = creer_projet(creer_membre('autre chef', 'CHEF_PROJET'), 'Caché')
+        self.taches = [self.tache(self.projet, f'T{i}', assignee=self.membre) for i in range(3)]
+        self.tache_cachee = self.tache(self.cache, 'Cachée')
+        # Écritures antérieures à toute synchronisation, marge comprise
+        passe = timezone.now() - timedelta(minutes=5)
+        Projet.objects.update(updated_at=passe)
+        Tache.objects.update(updated_at=passe)
+
+    def tache(self, projet, nom, assignee=None):
+        return Tache.objects.create(
+            nom=nom, date_debut=date.today(), date_fin=date.today(), statut='En cours', priorite='Haute',
+            projet=projet, assignee=assignee,
+        )
+
+    def synchroniser(self, membre, url, curseur):
+        separateur = '&' if '?' in url else '?'
+        return self.client_pour(membre).get(f'{url}{separateur}since={curseur}')
+
+    def test_changements_et_suppressions_depuis_le_curseur(self):
+        client = self.client_pour(self.membre)
+        liste = client.get('/api/taches/')
+        curseur = liste['X-Curseur-Synchro']
+
+        client.post(f'/api/taches/{self.taches[0].id}/change_status/', {'statut': 'Terminé'}, format='json')
+        nouvelle = self.tache(self.projet, 'Nouvelle')
+        supprimee = self.taches[1].id
+        self.taches[1].delete()
+        self.tache_cachee.delete()
+
+        response = self.synchroniser(self.membre, '/api/taches/', curseur)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t['id'] for t in response.data['modifies']], [self.taches[0].id, nouvelle.id])
+        self.assertEqual(response.data['modifies'][0]['statut'], 'Terminé')
+        self.assertEqual(response.data['supprimes'], [supprimee])
+        self.assertIn('updated_at', response.data['modifies'][0])
+
+        suivante = self.synchroniser(self.membre, '/api/taches/', response.data['curseur'])
+        self.assertEqual(suivante.data['supprimes'], [supprimee])
+        with override_settings(SYNC_MARGE_SECONDES=0):
+            curseur = client.get('/api/taches/')['X-Curseur-Synchro']
+            self.assertEqual(self.synchroniser(self.membre, '/api/taches/', curseur).data['modifies'], [])
+
+    def test_filtres_et_champs_de_la_liste(self):
+        curseur = self.client_pour(self.chef).get('/api/taches/')['X-Curseur-Synchro']
+        autre = creer_projet(self.chef, 'Autre')
+        self.tache(autre, 'Ailleurs')
+        self.tache(self.projet, 'Ici')
+        response = self.synchroniser(self.chef, f'/api/taches/?projet_id={self.projet.id}&fields=id,nom', curseur)
+        self.assertEqual(response.data['modifies'], [{'id': Tache.objects.get(nom='Ici').id, 'nom': 'Ici'}])
+
+    def test_ecritures_groupees_et_membres(self):
+        client = self.client_pour(self.chef)
+        curseur_taches = client.get('/api/taches/')['X-Curseur-Synchro']
+        curseur_projets = client.get(f'/api/projets/{self.projet.id}/')['X-Curseur-Synchro']
+        client.post('/api/taches/bulk_change_status/', {'taches': [
+            {'id': self.taches[2].id, 'statut': 'Annulé'},
+        ]}, format='json')
+        client.post(f'/api/projets/{self.projet.id}/remove_member/', {'membre_id': self.membre.id}, format='json')
+
+        taches = self.synchroniser(self.chef, '/api/taches/', curseur_taches)
+        self.assertEqual([t['id'] for t in taches.data['modifies']], [self.taches[2].id])
+        projets = self.synchroniser(self.chef, '/api/projets/', curseur_projets)
+        self.assertEqual([(p['id'], p['membres']) for p in projets.data['modifies']], [(self.projet.id, [])])
+
+    def test_suppression_en_cascade_d_un_projet(self):
+        curseur = self.client_pour(self.membre).get('/api/projets/')['X-Curseur-Synchro']
+        Commentaire.objects.create(contenu='Vu', tache=self.taches[0], auteur=self.membre)
+        commentaire = Commentaire.objects.create(contenu='Seul', tache=self.taches[0], auteur=self.membre)
+        commentaire.delete()
+        projet_id, taches_ids = self.projet.id, [t.id for t in self.taches]
+        with CaptureQueriesContext(connection) as ctx:
+            self.projet.delete()
+        inserts = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "api_suppression"')]
+        self.assertEqual(len(inserts), 1)
+        # Projet, 3 tâches, 2 commentaires (dont un supprimé avant)
+        self.assertEqual(Suppression.objects.count(), 1 + 3 + 2)
+
+        for url, attendus in (
+            ('/api/projets/', [projet_id]),
+            ('/api/taches/', taches_ids),
+            ('/api/commentaires/', list(Suppression.objects.filter(modele='commentaire').values_list('objet_id', flat=True))),
+        ):
+            response = self.synchroniser(self.membre, url, curseur)
+            self.assertEqual(sorted(response.data['supprimes']), sorted(attendus), url)
+
+    def test_curseurs_refuses(self):
+        self.assertEqual(self.synchroniser(self.membre, '/api/taches/', 'demain').status_code, 400)
+        ancien = int((timezone.now() - timedelta(days=31)).timestamp() * 1_000_000)
+        self.assertEqual(self.synchroniser(self.membre, '/api/taches/', ancien).status_code, 410)
+        complet = self.synchroniser(self.membre, '/api/taches/', 0)
+        self.assertEqual((len(complet.data['modifies']), complet.data['supprimes']), (3, []))
+        with override_settings(SYNC_MAX_CHANGEMENTS=2):
+            self.assertEqual(self.synchroniser(self.membre, '/api/taches/', 0).status_code, 410)
+
+    def test_purge_des_traces(self):
+        ancienne, recente = self.taches[0].id, self.taches[1].id
+        self.taches[0].delete()
+        self.taches[1].delete()
+        Suppression.objects.filter(objet_id=ancienne).update(date=timezone.now() - timedelta(days=40))
+        call_command('purger_suppressions', stdout=StringIO())
+        self.assertEqual(list(Suppression.objects.values_list('objet_id', flat=True)), [recente])
+
+
+class EvenementsTests(DashboardTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.chef = creer_membre('chef', 'CHEF_PROJET')
+        self.membre = creer_membre('membre')
+        self.projet = creer_projet(self.chef, 'Visible', membres=[self.membre])
+        self.cache = creer_projet(creer_membre('autre chef', 'CHEF_PROJET'), 'Caché')
+        self.tache = Tache.objects.create(
+            nom='T', date_debut=date.today(), date_fin=date.today(), statut='En cours', priorite='Haute',
+            projet=self.projet, assignee=self.membre,
+        )
+
+    def publies(self):
+        recus = []
+        patch = mock.patch.object(diffusion(), 'publier', recus.append)
+        patch.start()
+        self.addCleanup(patch.stop)
+        return recus
+
+    def lien(self, membre):
+        return self.client_pour(membre).get('/api/evenements/lien/').data['url']
+
+    def test_evenements_publies_apres_validation(self):
+        recus = self.publies()
+        with self.captureOnCommitCallbacks(execute=False):
+            annule = Commentaire.objects.create(contenu='Annulé', tache=self.tache, auteur=self.membre)
+        self.assertEqual(recus, [])
+
+        client = self.client_pour(self.chef)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(f'/api/taches/{self.tache.id}/change_status/', {'statut': 'Terminé'}, format='json')
+            commentaire = Commentaire.objects.create(contenu='Vu', tache=self.tache, auteur=self.chef)
+            client.post(f'/api/projets/{self.projet.id}/remove_member/', {'membre_id': self.membre.id}, format='json')
+            tache_id = self.tache.id
+            self.tache.delete()
+        self.assertEqual([(e['type'], e['action'], e['projet'], e['ids']) for e in recus], [
+            ('tache', 'modifie', self.projet.id, [tache_id]),
+            ('commentaire', 'modifie', self.projet.id, [commentaire.id]),
+            ('membres', 'retire', self.projet.id, [self.membre.id]),
+            ('commentaire', 'supprime', self.projet.id, [commentaire.id]),
+            ('commentaire', 'supprime', self.projet.id, [annule.id]),
+            ('tache', 'supprime', self.projet.id, [tache_id]),
+        ])
+
+    def test_ecritures_en_masse(self):
+        autre = Tache.objects.create(
+            nom='U', date_debut=date.today(), date_fin=date.today(), statut='En cours', priorite='Basse',
+            projet=self.projet,
+        )
+        recus = self.publies()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client_pour(self.chef).post('/api/taches/bulk_change_status/', {'taches': [
+                {'id': self.tache.id, 'statut': 'Annulé'}, {'id': autre.id, 'statut': 'Annulé'},
+            ]}, format='json')
+        self.assertEqual(recus, [
+            {'type': 'tache', 'action': 'modifie', 'projet': self.projet.id, 'ids': [self.tache.id, autre.id]},
+        ])
+
+    def test_flux_refuse_sans_asgi_ou_sans_lien_valide(self):
+        lien = self.lien(self.membre)
+        self.assertEqual(self.client.get(lien).status_code, 501)
+        self.assertEqual(async_to_sync(AsyncClient().get)('/api/evenements/?jeton=faux').status_code, 403)
+        self.assertEqual(APIClient().get('/api/evenements/lien/').status_code, 401)
+
+    @override_settings(EVENEMENTS_PING_SECONDES=0.05)
+    async def test_flux_filtre_par_visibilite(self):
+        lien = await sync_to_async(self.lien)(self.membre)
+        response = await AsyncClient().get(lien)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        messages = aiter(response.streaming_content)
+        try:
+            self.assertEqual(await anext(messages), b'retry: 5000\n\n')
+            diffusion().publier({'type': 'tache', 'action': 'modifie', 'projet': self.cache.id, 'ids': [1]})
+            diffusion().publier({'type': 'tache', 'action': 'modifie', 'projet': self.projet.id, 'ids': [2]})
+            self.assertEqual(
+                await anext(messages),
+                f'event: tache\ndata: {{"type": "tache", "action": "modifie", "projet": {self.projet.id}, '
+                f'"ids": [2]}}\n\n'.encode(),
+            )
+            self.assertEqual(await anext(messages), b': ping\n\n')
+
+            # Retiré du projet : le membre reçoit l'événement, puis plus rien de ce projet
+            await sync_to_async(self.projet.membres.remove)(self.membre)
+            diffusion().publier({'type': 'membres', 'action': 'retire', 'projet': self.projet.id, 'ids': [self.membre.id]})
+            diffusion().publier({'type': 'tache', 'action': 'modifie', 'projet': self.projet.id, 'ids': [3]})
+            self.assertTrue((await anext(messages)).startswith(b'event: membres\n'))
+            self.assertEqual(await anext(messages), b': ping\n\n')
+        finally:
+            await messages.aclose()
+
+    @override_settings(EVENEMENTS_TAILLE_FILE=2)
+    async def test_abonne_trop_lent(self):
+        lien = await sync_to_async(self.lien)(self.chef)
+        messages = aiter((await AsyncClient().get(lien)).streaming_content)
+        try:
+            await anext(messages)
+            for numero in range(5):
+                diffusion().publier({'type': 'tache', 'action': 'modifie', 'projet': self.projet.id, 'ids': [numero]})
+            self.assertEqual(await anext(messages), b'event: resync\ndata: {}\n\n')
+        finally:
+            await messages.aclose()
+
+    async def test_diffusion_depuis_un_autre_thread(self):
+        locale = DiffusionLocale()
+        with locale.abonnement() as abonne:
+            self.assertEqual(locale.nombre_abonnes(), 1)
+            thread = threading.Thread(target=locale.publier, args=({'ids': [1]},))
+            thread.start()
+            thread.join()
+            self.assertEqual(await abonne.suivant(1), {'ids': [1]})
+            self.assertIsNone(await abonne.suivant(0.01))
+        self.assertEqual(locale.nombre_abonnes(), 0)
+
+
+@override_settings(DASHBOARD_PARALLELE=False)
+class DashboardAsyncTests(DashboardTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.chef = creer_membre('chef', 'CHEF_PROJET')
+        self.membre = creer_membre('membre')
+        self.projet = creer_projet(self.chef, membres=[self.membre])
+        creer_taches(self.projet, 12, assignee=self.membre)
+
+    def test_memes_reponses_que_les_vues_synchrones(self):
+        for membre, vue in ((self.chef, 'stats'), (self.chef, 'chef'), (self.membre, 'membre')):
+            client = self.client_pour(membre)
+            with self.settings(DASHBOARD_CACHE_TIMEOUT=0):
+                synchrone = client.get(f'/api/dashboard/{vue}/')
+                asynchrone = client.get(f'/api/dashboard/async/{vue}/')
+            self.assertEqual(asynchrone.status_code, 200)
+            self.assertEqual(asynchrone.json(), synchrone.json())
+            self.assertEqual(asynchrone['ETag'], synchrone['ETag'])
+
+    def test_cache_partage_et_304(self):
+        client = self.client_pour(self.chef)
+        etag = client.get('/api/dashboard/chef/')['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get('/api/dashboard/async/chef/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('api_tache' in q['sql'] for q in ctx.captured_queries))
+        response = client.get('/api/dashboard/async/chef/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_authentification_et_erreurs(self):
+        self.assertEqual(APIClient().get('/api/dashboard/async/membre/').status_code, 401)
+        self.assertEqual(self.client_pour(self.membre).post('/api/dashboard/async/membre/').status_code, 405)
+        sans_profil = APIClient()
+        sans_profil.force_authenticate(User.objects.create_user(username='sans_profil'))
+        self.assertEqual(sans_profil.get('/api/dashboard/async/chef/').status_code, 400)
+
+
+class DashboardParalleleTests(DashboardTestMixin, TransactionTestCase):
+    # Hors transaction, les lectures peuvent aller sur les répliques configurées
+    databases = '__all__'
+    def test_parties_executees_en_meme_temps(self):
+        chef = creer_membre('chef', 'CHEF_PROJET')
+        creer_taches(creer_projet(chef), 5)
+        parties = ChefDashboardStatsView.parties
+
+        def parties_synchronisees(vue, request):
+            resultat = parties(vue, request)
+            # Chaque partie attend toutes les autres : ne passe que si elles tournent en même temps
+            barriere = threading.Barrier(len(resultat), timeout=5)
+
+            def synchronisee(partie):
+                def executer():
+                    barriere.wait()
+                    return partie()
+                return executer
+            return {nom: synchronisee(partie) for nom, partie in resultat.items()}
+
+        client = self.client_pour(chef)
+        with self.settings(DASHBOARD_CACHE_TIMEOUT=0):
+            with mock.patch.object(ChefDashboardStatsView, 'parties', parties_synchronisees):
+                response = client.get('/api/dashboard/async/chef/')
+            synchrone = client.get('/api/dashboard/chef/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), synchrone.json())
+
+
+class ProfilSQLiteTests(TestCase):
+    def test_simple_par_defaut(self):
+        # La base suivie par git ne doit pas passer en WAL au premier manage.py
+        self.assertEqual(settings.DATABASES['default']['ENGINE'], 'django.db.backends.sqlite3')
+        if os.environ.get('PROMANAGER_DB_PROFIL') is None:
+            self.assertNotIn('init_command', settings.DATABASES['default'].get('OPTIONS', {}))
+
+    def test_pragmas_appliques_a_la_connexion(self):
+        with tempfile.TemporaryDirectory() as dossier:
+            bases = ConnectionHandler({'default': {
+                **settings.DATABASE_PROFILS['production'], 'NAME': os.path.join(dossier, 'production.sqlite3'),
+            }})
+            base = bases['default']
+            try:
+                with base.cursor() as cursor:
+                    self.assertEqual(cursor.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+                    # 1 : NORMAL, 2 : MEMORY
+                    self.assertEqual(cursor.execute('PRAGMA synchronous').fetchone()[0], 1)
+                    self.assertEqual(cursor.execute('PRAGMA temp_store').fetchone()[0], 2)
+                    self.assertEqual(
+                        cursor.execute('PRAGMA cache_size').fetchone()[0], settings.SQLITE_PRAGMAS['cache_size']
+                    )
+                    self.assertEqual(
+                        cursor.execute('PRAGMA busy_timeout').fetchone()[0], settings.SQLITE_TIMEOUT * 1000
+                    )
+            finally:
+                base.close()
+
+
+@override_settings(DATABASE_REPLIQUES=['replique_1', 'replique_2'], REPLIQUES_DELAI=10)
+class RoutageTests(TransactionTestCase):
+    # TransactionTestCase : dans une transaction, tout est lu sur la base principale
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.routeur = RouteurLectureEcriture()
+        self.factory = RequestFactory()
+
+    def bases(self, request, ecrire=False):
+        """Bases de lecture choisies pendant la requête (avant et après une éventuelle écriture)."""
+        lues = []
+
+        def vue(request):
+            lues.append(self.routeur.db_for_read(Tache))
+            if ecrire:
+                self.assertEqual(self.routeur.db_for_write(Tache), 'default')
+            lues.append(self.routeur.db_for_read(Projet))
+            return HttpResponse()
+
+        LectureApresEcritureMiddleware(vue)(request)
+        return lues
+
+    def test_lectures_sur_une_meme_replique(self):
+        self.assertEqual(self.routeur.db_for_read(Tache), 'default')
+        premiere, seconde = self.bases(self.factory.get('/', HTTP_AUTHORIZATION='Bearer a'))
+        self.assertIn(premiere, ['replique_1', 'replique_2'])
+        self.assertEqual(premiere, seconde)
+        # Hors requête (commandes) : base principale
+        self.assertEqual(self.routeur.db_for_read(Tache), 'default')
+
+    def test_lecture_apres_ecriture(self):
+        client_a = {'HTTP_AUTHORIZATION': 'Bearer a'}
+        avant, apres = self.bases(self.factory.get('/', **client_a), ecrire=True)
+        self.assertNotEqual(avant, 'default')
+        self.assertEqual(apres, 'default')
+        # Le même client lit sur la base principale pendant REPLIQUES_DELAI, pas les autres
+        self.assertEqual(self.bases(self.factory.get('/', **client_a)), ['default', 'default'])
+        self.assertNotIn('default', self.bases(self.factory.get('/', HTTP_AUTHORIZATION='Bearer b')))
+        cache.clear()
+        self.assertNotIn('default', self.bases(self.factory.get('/', **client_a)))
+
+    def test_modifications_et_transactions_sur_la_principale(self):
+        self.assertEqual(self.bases(self.factory.post('/', HTTP_AUTHORIZATION='Bearer a')), ['default', 'default'])
+        with transaction.atomic():
+            self.assertEqual(self.bases(self.factory.get('/', HTTP_AUTHORIZATION='Bearer b')), ['default', 'default'])
+
+    async def test_ecriture_dans_un_thread(self):
+        async def vue(request):
+            # Écriture faite dans un thread (sync_to_async) : visible par la suite de la requête
+            await sync_to_async(self.routeur.db_for_write)(Tache)
+            return HttpResponse(self.routeur.db_for_read(Tache))
+
+        response = await LectureApresEcritureMiddleware(vue)(self.factory.get('/', HTTP_AUTHORIZATION='Bearer a'))
+        self.assertEqual(response.content, b'default')
+
+    def sur_replique(self, fonction, *args):
+        etat = EtatRoutage(primaire=False)
+        etat.replique = 'replique_1'
+        jeton = _etat.set(etat)
+        try:
+            return fonction(*args)
+        finally:
+            _etat.reset(jeton)
+
+    def test_tableau_de_bord_calcule_sur_une_replique(self):
+        contexte = ('dashboard:reponse:test', {'ETag': '"version"', 'Cache-Control': 'private, no-cache'})
+        response = self.sur_replique(ChefDashboardStatsView().enregistrer, contexte, Response({'total': 1}))
+        # Pas d'ETag : un 304 figerait une réponse peut-être en retard
+        self.assertFalse(response.has_header('ETag'))
+        self.assertEqual(response['Cache-Control'], 'private, no-store')
+        self.assertEqual(cache.get('dashboard:reponse:test'), ({'total': 1}, True))
+
+    def test_visibilite_lue_sur_la_principale(self):
+        membre = creer_membre('membre')
+        projet = creer_projet(membre)
+        self.assertEqual(self.sur_replique(ids_projets_visibles, membre), {projet.id})
+
+    def test_authentification_lue_sur_la_principale(self):
+        membre = creer_membre('membre')
+        # Mis en cache pour AUTH_CACHE_TIMEOUT : jamais lus sur une réplique en retard
+        self.assertEqual(self.sur_replique(charger_utilisateur, membre.user_id).membre_profile, membre)
+        self.assertEqual(self.sur_replique(version_jetons, membre.id), 0)
+
+    def test_migrations_sur_la_principale_seulement(self):
+        self.assertIs(self.routeur.allow_migrate('replique_1', 'api'), False)
+        self.assertIsNone(self.routeur.allow_migrate('default', 'api'))
+
+    def test_copie_de_la_base(self):
+        with tempfile.TemporaryDirectory() as dossier:
+            source, replique = os.path.join(dossier, 'source.sqlite3'), os.path.join(dossier, 'replique.sqlite3')
+            with closing(sqlite3.connect(source)) as base:
+                base.execute('CREATE TABLE t (x INTEGER)')
+                base.execute('INSERT INTO t VALUES (1), (2)')
+                base.commit()
+                copier_base(source, replique)
+                base.execute('INSERT INTO t VALUES (3)')
+                base.commit()
+            with closing(sqlite3.connect(replique)) as base:
+                self.assertEqual(base.execute('SELECT COUNT(*) FROM t').fetchone()[0], 2)
+            copier_base(source, replique)
+            with closing(sqlite3.connect(replique)) as base:
+                self.assertEqual(base.execute('SELECT COUNT(*) FROM t').fetchone()[0], 3)
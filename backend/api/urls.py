@@ -5,6 +5,8 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 from .views import RegisterView, CustomTokenObtainPairView, ProfileView, DashboardStatsView, ChefDashboardStatsView, MembreDashboardStatsView
+from .views import EvenementsLienView, flux_evenements
+from . import dashboard_async
 
 router = DefaultRouter()
 router.register(r'membres', MembreViewSet, basename='membre')
@@ -12,6 +14,7 @@ router.register(r'projets', ProjetViewSet, basename='projet')
 router.register(r'taches', TacheViewSet, basename='tache')
 router.register(r'fichiers', FichierViewSet, basename='fichier')
 router.register(r'commentaires', CommentaireViewSet, basename='commentaire')
+router.register(r'televersements', TeleversementViewSet, basename='televersement')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -19,7 +22,7 @@ urlpatterns = [
     path('login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
 
     # Route pour rafraîchir le token
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/refresh/', TokenRefreshView.as_view(serializer_class=MembreTokenRefreshSerializer), name='token_refresh'),
 
     # Route pour s'inscrire
     path('register/', RegisterView.as_view(), name='register'),
@@ -28,6 +31,14 @@ urlpatterns = [
     path('dashboard/stats/', DashboardStatsView.as_view(), name='dashboard-stats'),
     path('dashboard/chef/', ChefDashboardStatsView.as_view(), name='dashboard-chef'),
     path('dashboard/membre/', MembreDashboardStatsView.as_view(), name='dashboard-membre'),
+    # Mêmes tableaux de bord, requêtes indépendantes lancées en parallèle (voir dashboard_async.py)
+    path('dashboard/async/stats/', dashboard_async.dashboard_stats, name='dashboard-stats-async'),
+    path('dashboard/async/chef/', dashboard_async.dashboard_chef, name='dashboard-chef-async'),
+    path('dashboard/async/membre/', dashboard_async.dashboard_membre, name='dashboard-membre-async'),
+
+    # Changements en temps réel (Server-Sent Events, sous ASGI)
+    path('evenements/', flux_evenements, name='evenements'),
+    path('evenements/lien/', EvenementsLienView.as_view(), name='evenements-lien'),
 ]
 
 
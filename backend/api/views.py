@@ -1,20 +1,46 @@
+import io
+import logging
+
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
 from django.utils import timezone
+from django.conf import settings
+from django.urls import reverse
 
 # Create your views here.
 
-from rest_framework import viewsets
-from .models import Membre, Projet, Tache, Fichier, Commentaire
+from rest_framework import mixins, viewsets
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from .models import Membre, Projet, Tache, Fichier, Commentaire, Televersement
 from .serializers import *
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework import permissions
 from rest_framework.decorators import action
-from django.db import models
-
-class MembreViewSet(viewsets.ModelViewSet):
+from django.db import transaction
+from django.db.models import Count, Prefetch
+from .stats import taches_a_venir, projets_resume
+from .compteurs import statistiques_projets, statistiques_membre
+from .cache_dashboard import DashboardCacheMixin
+from .visibilite import ProjetsVisiblesMixin, ids_projets_visibles, projets_visibles
+from .calendrier import flux_calendrier, lire_fenetre
+from .champs import ChampsClairsemesMixin
+from .rapide import ListeRapideMixin
+from .export import ExportMixin
+from .importation import ImportMixin
+from .masse import creer_taches, lire_elements, modifier_taches
+from .authentification import revoquer_jetons, role_demandeur
+from . import televersement
+from .telechargement import fichier_du_jeton, jeton_lien, reponse_fichier
+from .synchro import SynchroMixin
+from .evenements import flux, jeton_flux, membre_du_jeton
+
+logger = logging.getLogger(__name__)
+
+class MembreViewSet(ChampsClairsemesMixin, ListeRapideMixin, viewsets.ModelViewSet):
     queryset = Membre.objects.all()
     serializer_class = MembreSerializer
 
@@ -30,6 +56,13 @@ class MembreViewSet(viewsets.ModelViewSet):
             return MembreDetailSerializer
         return MembreSerializer
 
+    def perform_update(self, serializer):
+        avant = (serializer.instance.role, serializer.instance.is_active)
+        membre = serializer.save()
+        # Les jetons émis portent l'ancien rôle et l'ancien état actif
+        if (membre.role, membre.is_active) != avant:
+            revoquer_jetons(membre)
+
     def get_object_for_archive_actions(self):
         """Récupérer un objet membre sans filtrage par is_active pour les actions d'archivage"""
         queryset = Membre.objects.all()
@@ -43,9 +76,13 @@ class MembreViewSet(viewsets.ModelViewSet):
         """Archiver un utilisateur (désactiver sans supprimer)"""
         try:
             membre = self.get_object_for_archive_actions()
-            membre.is_active = False
-            membre.archived_at = timezone.now()
-            membre.save()
+            # Écriture limitée aux colonnes d'archivage, et seulement si l'état change
+            if membre.is_active:
+                membre.is_active = False
+                membre.archived_at = timezone.now()
+                membre.save(update_fields=['is_active', 'archived_at'])
+                # Les jetons déjà émis ne doivent plus donner accès
+                revoquer_jetons(membre)
             return Response({
                 'success': True, 
                 'message': f'Utilisateur {membre.nom} archivé avec succès'
@@ -61,9 +98,11 @@ class MembreViewSet(viewsets.ModelViewSet):
         """Réactiver un utilisateur archivé"""
         try:
             membre = self.get_object_for_archive_actions()
-            membre.is_active = True
-            membre.archived_at = None
-            membre.save()
+            if not membre.is_active or membre.archived_at is not None:
+                membre.is_active = True
+                membre.archived_at = None
+                membre.save(update_fields=['is_active', 'archived_at'])
+                revoquer_jetons(membre)
             return Response({
                 'success': True, 
                 'message': f'Utilisateur {membre.nom} réactivé avec succès'
@@ -79,35 +118,28 @@ class IsChefProjetOrAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
         if request.method in permissions.SAFE_METHODS:
             return True
-        user = request.user
-        if not user.is_authenticated:
-            return False
-        try:
-            membre = user.membre_profile
-            return membre.role in ["ADMIN", "CHEF_PROJET"]
-        except Exception:
+        if not request.user.is_authenticated:
             return False
+        # Rôle lu dans le jeton (claims) si possible, sinon dans le profil Membre
+        return role_demandeur(request) in ["ADMIN", "CHEF_PROJET"]
 
 class IsMembreOrChefOrAdmin(permissions.BasePermission):
     """Permission pour permettre aux membres de voir et d'ajouter du contenu."""
     def has_permission(self, request, view):
         if request.method in permissions.SAFE_METHODS:
             return True
-        user = request.user
-        if not user.is_authenticated:
-            return False
-        try:
-            membre = user.membre_profile
-            # Tous les rôles peuvent ajouter du contenu (commentaires, fichiers)
-            # Accepter les formats français et anglais
-            return membre.role in ["ADMIN", "CHEF_PROJET", "MEMBRE"]
-        except Exception:
+        if not request.user.is_authenticated:
             return False
+        # Tous les rôles peuvent ajouter du contenu (commentaires, fichiers)
+        return role_demandeur(request) in ["ADMIN", "CHEF_PROJET", "MEMBRE"]
 
 # Ajouter les permissions au MembreViewSet après la définition des classes de permission
 MembreViewSet.permission_classes = [IsChefProjetOrAdmin]
 
-class ProjetViewSet(viewsets.ModelViewSet):
+class ProjetViewSet(SynchroMixin, ProjetsVisiblesMixin, ChampsClairsemesMixin, ExportMixin, ImportMixin, viewsets.ModelViewSet):
+    champ_projet = 'id'
+    nom_export = 'projets'
+    cible_import = 'projets'
     serializer_class = ProjetSerializer
     permission_classes = [IsMembreOrChefOrAdmin]
 
@@ -115,25 +147,23 @@ class ProjetViewSet(viewsets.ModelViewSet):
         """
         Les membres peuvent voir les projets, mais seuls les chefs/admin peuvent les modifier.
         """
-        if self.action in ['create', 'update', 'partial_update', 'destroy', 'add_member', 'remove_member']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'add_member', 'remove_member', 'importer']:
             permission_classes = [IsChefProjetOrAdmin]
         else:
             permission_classes = [IsMembreOrChefOrAdmin]
         return [permission() for permission in permission_classes]
 
     def get_queryset(self):
-        user = self.request.user
-        try:
-            membre = user.membre_profile
-            # ADMIN voit tous les projets
-            if membre.role in ['ADMIN', 'Admin']:
-                return Projet.objects.all()
-            # Les autres (CHEF_PROJET et MEMBRE) ne voient que leurs projets (créés par eux ou où ils sont membres)
-            return Projet.objects.filter(
-                models.Q(cree_par=membre) | models.Q(membres=membre)
-            ).distinct()
-        except:
-            return Projet.objects.none()
+        # ADMIN voit tous les projets, les autres (CHEF_PROJET et MEMBRE) ne voient que
+        # leurs projets (créés par eux ou où ils sont membres)
+        queryset = self.filtrer_projets_visibles(Projet.objects.all())
+        if self.action == 'retrieve':
+            # Tout ce que lit ProjetDetailSerializer, en un nombre fixe de requêtes
+            queryset = queryset.select_related('cree_par').prefetch_related(
+                Prefetch('taches', queryset=Tache.objects.select_related('assignee')),
+                'membres',
+            )
+        return queryset
 
     def retrieve(self, request, *args, **kwargs):
         self.serializer_class = ProjetDetailSerializer
@@ -171,35 +201,40 @@ class ProjetViewSet(viewsets.ModelViewSet):
         data = [{'id': m.id, 'nom': m.nom, 'role': m.role} for m in membres]
         return Response(data)
 
-class TacheViewSet(viewsets.ModelViewSet):
+class TacheViewSet(SynchroMixin, ProjetsVisiblesMixin, ChampsClairsemesMixin, ListeRapideMixin, ExportMixin, ImportMixin,
+                   viewsets.ModelViewSet):
+    nom_export = 'taches'
+    cible_import = 'taches'
     serializer_class = TacheSerializer
     permission_classes = [IsMembreOrChefOrAdmin]
 
     def get_queryset(self):
-        user = self.request.user
-        try:
-            membre = user.membre_profile
-            # ADMIN voit toutes les tâches
-            if membre.role in ['ADMIN', 'Admin']:
-                return Tache.objects.all()
-            # Les autres ne voient que les tâches des projets où ils sont membres
-            projets_membre = Projet.objects.filter(
-                models.Q(cree_par=membre) | models.Q(membres=membre)
-            )
-            return Tache.objects.filter(projet__in=projets_membre)
-        except:
-            return Tache.objects.none()
+        # ADMIN voit toutes les tâches, les autres ne voient que les tâches des projets où ils sont membres
+        queryset = self.filtrer_projets_visibles(Tache.objects.all())
+        # Filtrer par projet si un projet_id est fourni
+        projet_id = self.request.query_params.get('projet_id')
+        if projet_id and self.action in ('list', 'export'):
+            queryset = queryset.filter(projet_id=projet_id)
+        return queryset
 
     def retrieve(self, request, *args, **kwargs):
         self.serializer_class = TacheDetailSerializer
         return super().retrieve(request, *args, **kwargs)
 
-    def list(self, request, *args, **kwargs):
-        # Filtrer par projet si un projet_id est fourni
-        projet_id = request.query_params.get('projet_id')
-        if projet_id:
-            self.queryset = self.queryset.filter(projet_id=projet_id)
-        return super().list(request, *args, **kwargs)
+    @action(detail=False, methods=['get'])
+    def calendrier(self, request):
+        # Tâches et projets visibles qui recoupent la fenêtre ?debut=...&fin=...
+        try:
+            debut, fin, projet_id = lire_fenetre(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        ids = projets_visibles(request)
+        projets = Projet.objects.all() if ids is None else Projet.objects.filter(id__in=ids)
+        taches = self.get_queryset()
+        if projet_id is not None:
+            projets = projets.filter(id=projet_id)
+            taches = taches.filter(projet_id=projet_id)
+        return Response(flux_calendrier(taches, projets, debut, fin))
 
     @action(detail=True, methods=['post'])
     def assign(self, request, pk=None):
@@ -209,8 +244,9 @@ class TacheViewSet(viewsets.ModelViewSet):
             return Response({'error': 'membre_id requis'}, status=400)
         try:
             membre = Membre.objects.get(id=membre_id)
-            tache.assignee = membre
-            tache.save()
+            if tache.assignee_id != membre.id:
+                tache.assignee = membre
+                tache.save(update_fields=['assignee', 'updated_at'])
             return Response({'success': True, 'message': f'Tâche assignée à {membre.nom}'})
         except Membre.DoesNotExist:
             return Response({'error': 'Membre non trouvé'}, status=404)
@@ -235,71 +271,214 @@ class TacheViewSet(viewsets.ModelViewSet):
                 pass
             # MEMBRE ne peut modifier que ses tâches assignées
             elif membre.role == 'MEMBRE':
-                if tache.assignee != membre:
+                if tache.assignee_id != membre.id:
                     return Response({'error': 'Vous ne pouvez modifier que vos tâches assignées'}, status=403)
             else:
                 return Response({'error': 'Permission insuffisante'}, status=403)
         except:
             return Response({'error': 'Erreur de permission'}, status=403)
         
-        tache.statut = nouveau_statut
-        tache.save()
+        if tache.statut != nouveau_statut:
+            tache.statut = nouveau_statut
+            # La tâche et ses compteurs (signaux) en une seule écriture
+            with transaction.atomic():
+                tache.save(update_fields=['statut', 'updated_at'])
         return Response({'success': True, 'message': f'Statut changé à {nouveau_statut}'})
 
-class FichierViewSet(viewsets.ModelViewSet):
+    # Opérations en masse : {"taches": [...]} -> {"resultats": [un résultat par élément, dans l'ordre]}
+
+    @action(detail=False, methods=['post'])
+    def bulk_create(self, request):
+        try:
+            elements = lire_elements(request.data)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        resultats = creer_taches(
+            elements, TacheSerializer, self.get_serializer_context(), projets_visibles(request)
+        )
+        return Response({'resultats': resultats, 'creees': sum('id' in r for r in resultats)})
+
+    @action(detail=False, methods=['post'])
+    def bulk_change_status(self, request):
+        # Éléments {"id": ..., "statut": ...} ; mêmes règles que change_status
+        try:
+            elements = lire_elements(request.data)
+            membre = request.user.membre_profile
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        except Exception:
+            return Response({'error': 'Erreur de permission'}, status=403)
+        if membre.role not in ['ADMIN', 'CHEF_PROJET', 'MEMBRE']:
+            return Response({'error': 'Permission insuffisante'}, status=403)
+
+        statuts_valides = ['En attente', 'En cours', 'Terminé', 'Annulé']
+
+        def valider(element):
+            statut = element.get('statut')
+            if not statut:
+                return None, 'statut requis'
+            if statut not in statuts_valides:
+                return None, 'Statut invalide'
+            return statut, None
+
+        def autoriser(tache):
+            # MEMBRE ne peut modifier que ses tâches assignées
+            if membre.role == 'MEMBRE' and tache.assignee_id != membre.id:
+                return 'Vous ne pouvez modifier que vos tâches assignées'
+            return None
+
+        resultats, modifiees = modifier_taches(self.get_queryset(), elements, 'statut', valider, autoriser)
+        return Response({'resultats': resultats, 'modifiees': modifiees})
+
+    @action(detail=False, methods=['post'])
+    def bulk_assign(self, request):
+        # Éléments {"id": ..., "membre_id": ...}
+        try:
+            elements = lire_elements(request.data)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        def lire_membre_id(element):
+            # Entier ou chaîne de chiffres seulement (pas de liste, d'objet ni de booléen)
+            valeur = element.get('membre_id') if isinstance(element, dict) else None
+            if isinstance(valeur, bool) or not isinstance(valeur, (int, str)) or not str(valeur).isdigit():
+                return None
+            return int(valeur)
+
+        membres_ids = set(Membre.objects.filter(
+            id__in={lire_membre_id(e) for e in elements} - {None}
+        ).values_list('id', flat=True))
+
+        def valider(element):
+            if not element.get('membre_id'):
+                return None, 'membre_id requis'
+            membre_id = lire_membre_id(element)
+            if membre_id is None:
+                return None, 'membre_id invalide'
+            if membre_id not in membres_ids:
+                return None, 'Membre non trouvé'
+            return membre_id, None
+
+        resultats, modifiees = modifier_taches(self.get_queryset(), elements, 'assignee', valider)
+        return Response({'resultats': resultats, 'modifiees': modifiees})
+
+class FichierViewSet(SynchroMixin, ProjetsVisiblesMixin, ChampsClairsemesMixin, viewsets.ModelViewSet):
     serializer_class = FichierSerializer
     permission_classes = [IsMembreOrChefOrAdmin]
 
     def get_queryset(self):
-        user = self.request.user
+        # ADMIN voit tous les fichiers, les autres ne voient que les fichiers des projets où ils sont membres
+        queryset = self.filtrer_projets_visibles(Fichier.objects.all())
+        
+        # Filtrer par projet si le paramètre est fourni
+        projet_id = self.request.query_params.get('projet')
+        if projet_id:
+            queryset = queryset.filter(projet_id=projet_id)
+        
+        return queryset
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        jeton = request.query_params.get('jeton')
+        if jeton is not None:
+            # Lien signé (voir l'action lien) : pas d'en-tête Authorization depuis le navigateur
+            if str(fichier_du_jeton(jeton)) != str(pk):
+                return Response({'error': 'Lien invalide ou expiré'}, status=403)
+            fichier = Fichier.objects.filter(pk=pk).first()
+            if fichier is None:
+                return Response(status=404)
+        else:
+            fichier = self.get_object()
+        return reponse_fichier(request, fichier)
+
+    @action(detail=True, methods=['get'])
+    def lien(self, request, pk=None):
+        fichier = self.get_object()
+        url = f"{reverse('fichier-download', args=[fichier.pk])}?jeton={jeton_lien(fichier)}"
+        return Response({
+            'url': request.build_absolute_uri(url),
+            'expire_dans': getattr(settings, 'TELECHARGEMENT_LIEN_DUREE', 300),
+        })
+
+class TeleversementViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.DestroyModelMixin,
+                           viewsets.GenericViewSet):
+    """Téléversement d'un fichier en plusieurs parties (voir televersement.py)."""
+    serializer_class = TeleversementSerializer
+    permission_classes = [permissions.IsAuthenticated, IsMembreOrChefOrAdmin]
+    # Actions qui verrouillent la ligne du téléversement jusqu'à la fin de la requête
+    actions_verrouillees = ('part', 'complete', 'destroy')
+
+    def membre(self):
+        try:
+            return self.request.user.membre_profile
+        except Exception:
+            raise PermissionDenied('Profil membre non trouvé pour cet utilisateur')
+
+    def get_queryset(self):
+        # Chacun ne voit que ses propres téléversements
+        queryset = Televersement.objects.filter(cree_par=self.membre())
+        if self.action in self.actions_verrouillees:
+            # Une partie ne s'écrit pas pendant l'assemblage ou la suppression, ni l'inverse
+            queryset = queryset.select_for_update()
+        return queryset
+
+    def perform_create(self, serializer):
+        membre = self.membre()
+        visibles = projets_visibles(self.request)
+        if visibles is not None and serializer.validated_data['projet'].id not in visibles:
+            raise ValidationError({'projet': ['Projet non autorisé']})
+        serializer.save(
+            cree_par=membre,
+            taille_part=getattr(settings, 'TELEVERSEMENT_TAILLE_PART', 8 * 1024 * 1024),
+        )
+
+    @transaction.atomic
+    def destroy(self, request, *args, **kwargs):
+        return super().destroy(request, *args, **kwargs)
+
+    def perform_destroy(self, instance):
+        televersement.supprimer(instance)
+
+    @action(detail=True, methods=['put'], url_path=r'parts/(?P<numero>[0-9]+)')
+    @transaction.atomic
+    def part(self, request, pk=None, numero=None):
+        objet = self.get_object()
         try:
-            membre = user.membre_profile
-            # ADMIN voit tous les fichiers
-            if membre.role in ['ADMIN', 'Admin']:
-                queryset = Fichier.objects.all()
-            else:
-                # Les autres ne voient que les fichiers des projets où ils sont membres
-                projets_membre = Projet.objects.filter(
-                    models.Q(cree_par=membre) | models.Q(membres=membre)
-                )
-                queryset = Fichier.objects.filter(projet__in=projets_membre)
-            
-            # Filtrer par projet si le paramètre est fourni
-            projet_id = self.request.query_params.get('projet')
-            if projet_id:
-                queryset = queryset.filter(projet_id=projet_id)
-            
-            return queryset
-        except:
-            return Fichier.objects.none()
+            # Corps brut lu par blocs : la partie n'est jamais entièrement en mémoire.
+            # DRF donne un flux None pour un corps vide : partie de 0 octet
+            recue = televersement.ecrire_part(
+                objet, int(numero), request.stream or io.BytesIO(), request.headers.get('X-Sha256', '')
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        return Response({'numero': int(numero), 'taille': recue})
 
-class CommentaireViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['post'])
+    @transaction.atomic
+    def complete(self, request, pk=None):
+        objet = self.get_object()
+        try:
+            fichier = televersement.terminer(objet)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        return Response(FichierSerializer(fichier, context=self.get_serializer_context()).data, status=201)
+
+class CommentaireViewSet(SynchroMixin, ProjetsVisiblesMixin, ChampsClairsemesMixin, ListeRapideMixin, ExportMixin, viewsets.ModelViewSet):
+    champ_projet = 'tache__projet_id'
+    nom_export = 'commentaires'
     serializer_class = CommentaireSerializer
     permission_classes = [IsMembreOrChefOrAdmin]
 
     def get_queryset(self):
-        user = self.request.user
-        try:
-            membre = user.membre_profile
-            # ADMIN voit tous les commentaires
-            if membre.role in ['ADMIN', 'Admin']:
-                queryset = Commentaire.objects.all()
-            else:
-                # Les autres ne voient que les commentaires des tâches des projets où ils sont membres
-                projets_membre = Projet.objects.filter(
-                    models.Q(cree_par=membre) | models.Q(membres=membre)
-                )
-                taches_membre = Tache.objects.filter(projet__in=projets_membre)
-                queryset = Commentaire.objects.filter(tache__in=taches_membre)
-            
-            # Filtrer par tâche si le paramètre est fourni
-            tache_id = self.request.query_params.get('tache')
-            if tache_id:
-                queryset = queryset.filter(tache_id=tache_id)
-            
-            return queryset
-        except:
-            return Commentaire.objects.none()
+        # ADMIN voit tous les commentaires, les autres ne voient que les commentaires
+        # des tâches des projets où ils sont membres (jointure sur la tâche)
+        queryset = self.filtrer_projets_visibles(Commentaire.objects.all())
+        
+        # Filtrer par tâche si le paramètre est fourni
+        tache_id = self.request.query_params.get('tache')
+        if tache_id:
+            queryset = queryset.filter(tache_id=tache_id)
+        
+        return queryset
 
 
 def accueil(request):
@@ -335,32 +514,8 @@ class RegisterView(generics.CreateAPIView):
     serializer_class = RegisterSerializer
 
 class CustomTokenObtainPairView(TokenObtainPairView):
-    def post(self, request, *args, **kwargs):
-        response = super().post(request, *args, **kwargs)
-        
-        if response.status_code == 200:
-            username = request.data.get('username')
-            if username:
-                try:
-                    user = User.objects.get(username=username)
-                    try:
-                        membre = Membre.objects.get(user=user)
-                        response.data['user_id'] = user.id
-                        response.data['membre_id'] = membre.id
-                        response.data['role'] = membre.role
-                    except Membre.DoesNotExist:
-                        membre = Membre.objects.create(
-                            user=user,
-                            nom=user.username,
-                            role="MEMBRE"
-                        )
-                        response.data['user_id'] = user.id
-                        response.data['membre_id'] = membre.id
-                        response.data['role'] = membre.role
-                except User.DoesNotExist:
-                    pass
-        
-        return response
+    # Le jeton porte le rôle et l'id du membre, aussi renvoyés dans la réponse
+    serializer_class = MembreTokenObtainPairSerializer
 
 from rest_framework.views import APIView
 from rest_framework.response import Response as DRFResponse
@@ -374,7 +529,7 @@ class ProfileView(APIView):
         try:
             membre = user.membre_profile
             projets_count = membre.projets.count()
-            taches_count = membre.taches_assignees.filter(statut='Terminé').count()
+            taches_count = statistiques_membre(membre.id)['taches_terminees']
             return DRFResponse({
                 'username': user.username,
                 'email': user.email,
@@ -391,214 +546,232 @@ class ProfileView(APIView):
         data = request.data
         try:
             membre = user.membre_profile
-            # Mise à jour du nom du membre
-            if 'nom' in data:
+            # Mise à jour du nom du membre (seulement s'il change)
+            if 'nom' in data and data['nom'] != membre.nom:
                 membre.nom = data['nom']
+                membre.save(update_fields=['nom'])
             # Mise à jour de l'email utilisateur
-            if 'email' in data:
+            if 'email' in data and data['email'] != user.email:
                 user.email = data['email']
+                user.save(update_fields=['email'])
             # Le rôle ne peut pas être modifié par l'utilisateur
-            membre.save()
-            user.save()
             return DRFResponse({'success': True, 'message': 'Profil mis à jour.'})
         except Exception as e:
             return DRFResponse({'error': str(e)}, status=400)
 
-class DashboardStatsView(APIView):
+class DashboardStatsView(DashboardCacheMixin, APIView):
     permission_classes = [IsAuthenticated]
-    def get(self, request):
-        # Statistiques globales
-        projets_count = Projet.objects.count()
-        taches_count = Tache.objects.count()
-        taches_terminees = Tache.objects.filter(statut='Terminé').count()
-        taches_en_cours = Tache.objects.filter(statut='En cours').count()
-        taches_en_attente = Tache.objects.filter(statut='En attente').count()
-        taches_annulees = Tache.objects.filter(statut='Annulé').count()
-        # Tâches en retard (date_fin < aujourd'hui et pas terminées)
-        today = timezone.now().date()
-        taches_retard = Tache.objects.filter(date_fin__lt=today).exclude(statut='Terminé').count()
-        # Projets récents
-        projets_recents = Projet.objects.order_by('-id')[:5]
-        projets_recents_data = [
-            {
-                'id': p.id,
-                'nom': p.nom,
-                'statut': p.statut,
-                'date_debut': p.date_debut,
-                'date_fin': p.date_fin,
-            } for p in projets_recents
-        ]
-        # Tâches à venir (prochaines échéances)
-        taches_a_venir = Tache.objects.filter(date_fin__gte=today).order_by('date_fin')[:5]
-        taches_a_venir_data = [
-            {
-                'id': t.id,
-                'nom': t.nom,
-                'statut': t.statut,
-                'date_fin': t.date_fin,
-                'projet': t.projet.nom,
-            } for t in taches_a_venir
-        ]
-        return DRFResponse({
-            'projets_count': projets_count,
-            'taches_count': taches_count,
-            'taches_terminees': taches_terminees,
-            'taches_en_cours': taches_en_cours,
-            'taches_en_attente': taches_en_attente,
-            'taches_annulees': taches_annulees,
-            'taches_retard': taches_retard,
-            'projets_recents': projets_recents_data,
-            'taches_a_venir': taches_a_venir_data,
-        })
 
-class ChefDashboardStatsView(APIView):
+    def portees_cache(self, request):
+        # Statistiques globales : identiques pour tous les utilisateurs
+        return ['global']
+
+    def parties(self, request):
+        today = timezone.now().date()
+        return {
+            # Statistiques globales (total, par statut et en retard) lues dans les compteurs des projets
+            'stats': lambda: statistiques_projets(today=today),
+            'projets_count': lambda: Projet.objects.count(),
+            # Projets récents
+            'projets_recents': lambda: projets_resume(Projet.objects.order_by('-id')[:5]),
+            # Tâches à venir (prochaines échéances)
+            'taches_a_venir': lambda: taches_a_venir(Tache.objects.all(), today),
+        }
+
+    def assembler(self, resultats):
+        stats = resultats['stats']
+        return {
+            'projets_count': resultats['projets_count'],
+            'taches_count': stats['taches_total'],
+            'taches_terminees': stats['taches_terminees'],
+            'taches_en_cours': stats['taches_en_cours'],
+            'taches_en_attente': stats['taches_en_attente'],
+            'taches_annulees': stats['taches_annulees'],
+            'taches_retard': stats['taches_retard'],
+            'projets_recents': resultats['projets_recents'],
+            'taches_a_venir': resultats['taches_a_venir'],
+        }
+
+class ChefDashboardStatsView(DashboardCacheMixin, APIView):
     permission_classes = [IsAuthenticated]
-    def get(self, request):
+
+    def portees_cache(self, request):
+        try:
+            membre = request.user.membre_profile
+        except Exception:
+            return None
+        projets_ids = Projet.objects.filter(cree_par=membre).values_list('id', flat=True)
+        return [f'membre:{membre.id}'] + [f'projet:{projet_id}' for projet_id in projets_ids]
+
+    def parties(self, request):
         user = request.user
         try:
             membre = user.membre_profile
-            print(f"Utilisateur: {user.username}, Membre: {membre.nom}, Role: {membre.role}")
+            logger.debug("Utilisateur: %s, Membre: %s, Role: %s", user.username, membre.nom, membre.role)
         except Exception as e:
-            print(f"Erreur profil membre: {e}")
+            logger.debug("Erreur profil membre: %s", e)
             return DRFResponse({'error': 'Profil membre non trouvé pour cet utilisateur'}, status=400)
-        
-        try:
-            # Projets où il est chef
-            projets_chef = Projet.objects.filter(cree_par=membre)
-            projets_ids = list(projets_chef.values_list('id', flat=True))
-            print(f"Nombre de projets trouvés: {projets_chef.count()}")
-            
-            # Gérer le cas où il n'y a pas de projets
-            if not projets_ids:
-                return DRFResponse({
-                    'projets_count': 0,
-                    'taches_total': 0,
-                    'taches_terminees': 0,
-                    'taches_en_cours': 0,
-                    'taches_retard': 0,
-                    'projets': [],
-                    'membres': [],
-                    'activites': [],
-                })
-            
-            taches_total = Tache.objects.filter(projet_id__in=projets_ids).count()
-            taches_terminees = Tache.objects.filter(projet_id__in=projets_ids, statut='Terminé').count()
-            taches_en_cours = Tache.objects.filter(projet_id__in=projets_ids, statut='En cours').count()
-            taches_retard = Tache.objects.filter(projet_id__in=projets_ids, date_fin__lt=timezone.now().date()).exclude(statut='Terminé').count()
-            
+
+        # Projets où il est chef
+        projets_chef = Projet.objects.filter(cree_par=membre)
+        projets_ids = list(projets_chef.values_list('id', flat=True))
+        logger.debug("Nombre de projets trouvés: %s", len(projets_ids))
+
+        # Gérer le cas où il n'y a pas de projets
+        if not projets_ids:
+            return DRFResponse({
+                'projets_count': 0,
+                'taches_total': 0,
+                'taches_terminees': 0,
+                'taches_en_cours': 0,
+                'taches_retard': 0,
+                'projets': [],
+                'membres': [],
+                'activites': [],
+            })
+
+        return {
+            'stats': lambda: statistiques_projets(projets_ids),
             # Données des projets
-            projets_data = [
-                {
-                    'id': p.id,
-                    'nom': p.nom,
-                    'statut': p.statut,
-                    'date_debut': p.date_debut,
-                    'date_fin': p.date_fin,
-                } for p in projets_chef
-            ]
-            
+            'projets': lambda: projets_resume(projets_chef),
             # Membres des projets (tous les membres qui participent aux projets du chef)
-            membres_projets = Membre.objects.filter(projets_membre__in=projets_chef).distinct()
-            membres_data = []
-            for m in membres_projets:
-                # Compter les tâches assignées à ce membre dans les projets du chef
-                taches_membre = Tache.objects.filter(
-                    projet_id__in=projets_ids,
-                    assignee=m
-                ).count()
-                membres_data.append({
-                    'id': m.id,
-                    'nom': m.nom,
-                    'role': m.role,
-                    'taches': taches_membre,
-                })
-            
+            'membres': lambda: list(Membre.objects.filter(projets_membre__in=projets_ids).distinct()),
+            # Compter les tâches assignées à chaque membre dans les projets du chef (une requête groupée)
+            'taches_par_membre': lambda: dict(
+                Tache.objects.filter(projet_id__in=projets_ids, assignee__isnull=False)
+                .order_by()
+                .values('assignee')
+                .annotate(nombre=Count('id'))
+                .values_list('assignee', 'nombre')
+            ),
             # Activités récentes (tâches créées/modifiées/terminées dans les projets du chef)
-            taches_recentes = Tache.objects.filter(
-                projet_id__in=projets_ids
-            ).order_by('-date_debut')[:10]
-            
-            activites_data = []
-            for tache in taches_recentes:
-                # Déterminer le type d'activité basé sur le statut et la date
-                if tache.statut == 'Terminé':
-                    action = 'terminée'
-                    date_activite = tache.date_fin
-                elif tache.statut == 'En cours':
-                    action = 'démarrée'
-                    date_activite = tache.date_debut
-                else:
-                    action = 'créée'
-                    date_activite = tache.date_debut
-                
-                activites_data.append({
-                    'type': 'tache',
-                    'action': action,
-                    'nom': tache.nom,
-                    'date': date_activite.strftime('%Y-%m-%d'),
-                    'user': tache.assignee.nom if tache.assignee else 'Non assignée',
-                    'projet': tache.projet.nom,
-                })
-            
-            return DRFResponse({
-                'projets_count': projets_chef.count(),
-                'taches_total': taches_total,
-                'taches_terminees': taches_terminees,
-                'taches_en_cours': taches_en_cours,
-                'taches_retard': taches_retard,
-                'projets': projets_data,
-                'membres': membres_data,
-                'activites': activites_data,
+            'taches_recentes': lambda: list(
+                Tache.objects.filter(projet_id__in=projets_ids)
+                .select_related('assignee', 'projet').order_by('-date_debut')[:10]
+            ),
+        }
+
+    def assembler(self, resultats):
+        stats = resultats['stats']
+        taches_par_membre = resultats['taches_par_membre']
+        membres_data = [
+            {
+                'id': m.id,
+                'nom': m.nom,
+                'role': m.role,
+                'taches': taches_par_membre.get(m.id, 0),
+            } for m in resultats['membres']
+        ]
+
+        activites_data = []
+        for tache in resultats['taches_recentes']:
+            # Déterminer le type d'activité basé sur le statut et la date
+            if tache.statut == 'Terminé':
+                action = 'terminée'
+                date_activite = tache.date_fin
+            elif tache.statut == 'En cours':
+                action = 'démarrée'
+                date_activite = tache.date_debut
+            else:
+                action = 'créée'
+                date_activite = tache.date_debut
+
+            activites_data.append({
+                'type': 'tache',
+                'action': action,
+                'nom': tache.nom,
+                'date': date_activite.strftime('%Y-%m-%d'),
+                'user': tache.assignee.nom if tache.assignee else 'Non assignée',
+                'projet': tache.projet.nom,
             })
-        except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            print(f"Erreur dans ChefDashboardStatsView: {str(e)}")
-            print(f"Traceback: {error_details}")
-            return DRFResponse({'error': f'Erreur lors de la récupération des données: {str(e)}'}, status=500)
 
-class MembreDashboardStatsView(APIView):
+        return {
+            'projets_count': len(resultats['projets']),
+            'taches_total': stats['taches_total'],
+            'taches_terminees': stats['taches_terminees'],
+            'taches_en_cours': stats['taches_en_cours'],
+            'taches_retard': stats['taches_retard'],
+            'projets': resultats['projets'],
+            'membres': membres_data,
+            'activites': activites_data,
+        }
+
+class MembreDashboardStatsView(DashboardCacheMixin, APIView):
     permission_classes = [IsAuthenticated]
-    def get(self, request):
+
+    def portees_cache(self, request):
+        try:
+            return [f'membre:{request.user.membre_profile.id}']
+        except Exception:
+            return None
+
+    def parties(self, request):
         user = request.user
         try:
             membre = user.membre_profile
         except:
             return DRFResponse({'error': 'Profil membre non trouvé pour cet utilisateur'}, status=400)
-        
-        try:
-            projets = membre.projets_membre.all()
-            taches_assignees = membre.taches_assignees.all()
-            taches_terminees = taches_assignees.filter(statut='Terminé').count()
-            taches_en_cours = taches_assignees.filter(statut='En cours').count()
-            taches_retard = taches_assignees.filter(date_fin__lt=timezone.now().date()).exclude(statut='Terminé').count()
-            projets_data = [
-                {
-                    'id': p.id,
-                    'nom': p.nom,
-                    'statut': p.statut,
-                    'date_debut': p.date_debut,
-                    'date_fin': p.date_fin,
-                } for p in projets
-            ]
-            taches_data = [
+
+        return {
+            'projets': lambda: projets_resume(membre.projets_membre.all()),
+            'taches': lambda: [
                 {
                     'id': t.id,
                     'nom': t.nom,
                     'statut': t.statut,
                     'date_fin': t.date_fin,
                     'projet': t.projet.nom,
-                } for t in taches_assignees
-            ]
-            return DRFResponse({
-                'projets_count': projets.count(),
-                'taches_total': taches_assignees.count(),
-                'taches_terminees': taches_terminees,
-                'taches_en_cours': taches_en_cours,
-                'taches_retard': taches_retard,
-                'projets': projets_data,
-                'taches': taches_data,
-            })
-        except Exception as e:
-            return DRFResponse({'error': f'Erreur lors de la récupération des données: {str(e)}'}, status=500)
+                } for t in membre.taches_assignees.select_related('projet')
+            ],
+            'stats': lambda: statistiques_membre(membre.id),
+        }
+
+    def assembler(self, resultats):
+        stats = resultats['stats']
+        return {
+            'projets_count': len(resultats['projets']),
+            'taches_total': stats['taches_total'],
+            'taches_terminees': stats['taches_terminees'],
+            'taches_en_cours': stats['taches_en_cours'],
+            'taches_retard': stats['taches_retard'],
+            'projets': resultats['projets'],
+            'taches': resultats['taches'],
+        }
+
+
+class EvenementsLienView(APIView):
+    """Lien signé et de courte durée vers le flux d'événements (EventSource n'envoie pas d'en-tête)."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            membre = request.user.membre_profile
+        except Exception:
+            return DRFResponse({'error': 'Profil membre non trouvé pour cet utilisateur'}, status=400)
+        url = f"{reverse('evenements')}?jeton={jeton_flux(membre)}"
+        return DRFResponse({
+            'url': request.build_absolute_uri(url),
+            'expire_dans': getattr(settings, 'EVENEMENTS_LIEN_DUREE', 60),
+        })
+
 
+async def flux_evenements(request):
+    """Flux Server-Sent Events des changements des projets visibles (voir evenements.py)."""
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'Le flux d\'événements nécessite le serveur ASGI'}, status=501)
+    membre_id = membre_du_jeton(request.GET.get('jeton', ''))
+    membre = membre_id and await Membre.objects.filter(pk=membre_id, is_active=True).afirst()
+    if not membre:
+        return JsonResponse({'error': 'Lien invalide ou expiré'}, status=403)
+
+    async def recalculer_visibles():
+        return await sync_to_async(ids_projets_visibles)(membre)
+
+    response = StreamingHttpResponse(
+        flux(membre.id, await recalculer_visibles(), recalculer_visibles),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Pas de mise en tampon par un proxy nginx
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,69 @@
+"""
+Résolution des projets visibles par l'utilisateur d'une requête.
+
+Les ids sont calculés une seule fois par requête (mémorisés sur l'objet requête)
+et, entre les requêtes, conservés dans le cache sous la version de la portée
+'membre:<id>', que les signaux changent quand les projets du membre changent.
+Les viewsets filtrent ensuite par un simple `projet_id IN (...)`.
+
+Ils sont toujours lus sur la base principale : lus sur une réplique en retard,
+ils seraient gardés sous une version plus récente que leurs données.
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Q
+
+from .cache_dashboard import get_cache, versions
+from .models import Projet
+
+ROLES_ADMIN = ['ADMIN', 'Admin']
+
+
+def ids_projets_visibles(membre):
+    """
+    Ids des projets créés par le membre ou dont il est membre, ou None pour un
+    administrateur (qui voit tous les projets).
+    """
+    if membre.role in ROLES_ADMIN:
+        return None
+    timeout = getattr(settings, 'VISIBILITE_CACHE_TIMEOUT', 300)
+    cle = None
+    if timeout:
+        cle = f'visibilite:{membre.id}:{versions([f"membre:{membre.id}"])[0]}'
+        ids = get_cache().get(cle)
+        if ids is not None:
+            return ids
+    ids = frozenset(
+        Projet.objects.using(DEFAULT_DB_ALIAS).filter(Q(cree_par=membre) | Q(membres=membre)).values_list('id', flat=True)
+    )
+    if cle:
+        get_cache().set(cle, ids, timeout)
+    return ids
+
+
+def projets_visibles(request):
+    """
+    Ids des projets visibles par l'utilisateur de la requête (None : tous,
+    ensemble vide : aucun), calculés une seule fois par requête.
+    """
+    if not hasattr(request, '_projets_visibles'):
+        try:
+            membre = request.user.membre_profile
+        except Exception:
+            ids = frozenset()
+        else:
+            ids = ids_projets_visibles(membre)
+        request._projets_visibles = ids
+    return request._projets_visibles
+
+
+class ProjetsVisiblesMixin:
+    """Restreint le queryset d'un viewset aux objets des projets visibles par l'utilisateur."""
+    # Chemin vers l'id du projet depuis le modèle du viewset
+    champ_projet = 'projet_id'
+
+    def filtrer_projets_visibles(self, queryset):
+        ids = projets_visibles(self.request)
+        if ids is None:
+            return queryset
+        return queryset.filter(**{f'{self.champ_projet}__in': ids})
@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { FaEye, FaEdit, FaArchive, FaUser, FaUsers, FaUserTie, FaUserCog, FaTimes, FaSave, FaUndo } from 'react-icons/fa';
+import { fetchAllPages } from '../pagination';
 
 const AdminUsers = () => {
   const navigate = useNavigate();
@@ -19,14 +20,12 @@ const AdminUsers = () => {
     const fetchUsers = async () => {
       try {
         const token = localStorage.getItem('token');
-        const res = await fetch('http://localhost:8000/api/membres/?show_archived=true', {
+        const data = await fetchAllPages('http://localhost:8000/api/membres/?show_archived=true', {
           headers: { Authorization: `Bearer ${token}` }
         });
-        if (!res.ok) throw new Error('Erreur lors du chargement des utilisateurs');
-        const data = await res.json();
         setUsers(data);
       } catch (err) {
-        setError(err.message);
+        setError('Erreur lors du chargement des utilisateurs');
       } finally {
         setLoading(false);
       }
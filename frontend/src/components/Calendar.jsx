@@ -22,7 +22,7 @@ const Toast = ({ message, type, onClose }) => (
   </div>
 );
 
-const TaskCalendar = ({ tasks = [] }) => {
+const TaskCalendar = ({ tasks = [], onMonthChange }) => {
   const [selectedDate, setSelectedDate] = useState(new Date());
   const [tasksForDay, setTasksForDay] = useState([]);
   const [toast, setToast] = useState({ message: '', type: '' });
@@ -61,6 +61,7 @@ const TaskCalendar = ({ tasks = [] }) => {
           <Calendar
             onChange={setSelectedDate}
             value={selectedDate}
+            onActiveStartDateChange={({ activeStartDate }) => onMonthChange && onMonthChange(activeStartDate)}
             tileClassName={({ date }) => getTileClassName({ date, tasks })}
             className="border-none"
           />
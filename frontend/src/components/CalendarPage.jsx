@@ -2,11 +2,22 @@ import React, { useState, useEffect } from 'react';
 import TaskCalendar from './Calendar';
 import { FaArrowLeft } from 'react-icons/fa';
 import { useNavigate } from 'react-router-dom';
+import axios from 'axios';
+
+// Fenêtre [premier jour, dernier jour] du mois affiché, au format AAAA-MM-JJ
+const fenetreDuMois = (date) => {
+  const iso = (d) => `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, '0')}-${String(d.getDate()).padStart(2, '0')}`;
+  return {
+    debut: iso(new Date(date.getFullYear(), date.getMonth(), 1)),
+    fin: iso(new Date(date.getFullYear(), date.getMonth() + 1, 0)),
+  };
+};
 
 const CalendarPage = () => {
   const [tasks, setTasks] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const [mois, setMois] = useState(new Date());
   const navigate = useNavigate();
 
   useEffect(() => {
@@ -18,21 +29,17 @@ const CalendarPage = () => {
           return;
         }
 
-        const response = await fetch('http://localhost:8000/api/taches/', {
+        // Seules les tâches qui recoupent le mois affiché sont chargées
+        const response = await axios.get('http://localhost:8000/api/taches/calendrier/', {
+          params: fenetreDuMois(mois),
           headers: {
             'Authorization': `Bearer ${token}`,
             'Content-Type': 'application/json',
           },
         });
-
-        if (!response.ok) {
-          throw new Error('Erreur lors du chargement des tâches');
-        }
-
-        const data = await response.json();
-        setTasks(data);
+        setTasks(response.data.taches);
       } catch (err) {
-        setError(err.message);
+        setError('Erreur lors du chargement des tâches');
         console.error('Erreur:', err);
       } finally {
         setLoading(false);
@@ -40,7 +47,7 @@ const CalendarPage = () => {
     };
 
     fetchTasks();
-  }, [navigate]);
+  }, [navigate, mois]);
 
   if (loading) {
     return (
@@ -88,7 +95,7 @@ const CalendarPage = () => {
               <h1 className="text-xl font-semibold text-gray-900">Calendrier des tâches</h1>
             </div>
             <div className="text-sm text-gray-500">
-              {tasks.length} tâche{tasks.length > 1 ? 's' : ''} au total
+              {tasks.length} tâche{tasks.length > 1 ? 's' : ''} ce mois-ci
               {(() => {
                 const projets = [...new Set(tasks.map(t => t.projet_nom))];
                 return projets.length > 0 ? ` • ${projets.length} projet${projets.length > 1 ? 's' : ''}` : '';
@@ -100,7 +107,7 @@ const CalendarPage = () => {
 
       {/* Calendrier */}
       <div className="max-w-7xl mx-auto py-6 px-4 sm:px-6 lg:px-8">
-        <TaskCalendar tasks={tasks} />
+        <TaskCalendar tasks={tasks} onMonthChange={setMois} />
         
         {/* Résumé par projet */}
         {tasks.length > 0 && (
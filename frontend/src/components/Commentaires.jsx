@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import axios from 'axios';
+import { fetchAllPages } from '../pagination';
 
 const Commentaires = ({ tacheId, membreId }) => {
   const [commentaires, setCommentaires] = useState([]);
@@ -12,10 +13,10 @@ const Commentaires = ({ tacheId, membreId }) => {
     setLoading(true);
     const token = localStorage.getItem('token');
     try {
-      const res = await axios.get(`http://127.0.0.1:8000/api/commentaires/?tache=${tacheId}`, {
+      const data = await fetchAllPages(`http://127.0.0.1:8000/api/commentaires/?tache=${tacheId}`, {
         headers: { Authorization: `Bearer ${token}` },
       });
-      setCommentaires(res.data);
+      setCommentaires(data);
     } catch (err) {
       setError('Erreur lors du chargement des commentaires.');
     } finally {
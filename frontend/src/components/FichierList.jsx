@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from 'react';
-import axios from 'axios';
 import Navbar from './Navbar';
+import { fetchAllPages } from '../pagination';
+import { telecharger } from '../telechargement';
 
 const FichierList = () => {
   const [fichiers, setFichiers] = useState([]);
@@ -12,10 +13,10 @@ const FichierList = () => {
       const token = localStorage.getItem('token');
       if (!token) return;
       try {
-        const response = await axios.get('http://127.0.0.1:8000/api/fichiers/', {
+        const data = await fetchAllPages('http://127.0.0.1:8000/api/fichiers/', {
           headers: { Authorization: `Bearer ${token}` },
         });
-        setFichiers(response.data);
+        setFichiers(data);
       } catch (err) {
         console.error('Error fetching fichiers:', err);
         setError('Erreur lors du chargement des fichiers.');
@@ -26,6 +27,15 @@ const FichierList = () => {
     fetchFichiers();
   }, []);
 
+  const handleDownload = async (id) => {
+    const token = localStorage.getItem('token');
+    try {
+      await telecharger(id, { headers: { Authorization: `Bearer ${token}` } });
+    } catch (err) {
+      console.error('Error downloading fichier:', err);
+    }
+  };
+
   if (loading) return (
     <div className="min-h-screen flex items-center justify-center">
       <div className="animate-spin rounded-full h-12 w-12 border-t-4 border-blue-600 border-opacity-50"></div>
@@ -72,15 +82,12 @@ const FichierList = () => {
                         </div>
                         <div className="flex gap-2 ml-2">
                           {fichier.fichier ? (
-                            <a
-                              href={fichier.fichier}
-                              download
-                              target="_blank"
-                              rel="noopener noreferrer"
+                            <button
+                              onClick={() => handleDownload(fichier.id)}
                               className="bg-blue-500 hover:bg-blue-600 text-white px-3 py-1 rounded text-sm"
                             >
                               Télécharger
-                            </a>
+                            </button>
                           ) : (
                             <span className="text-gray-400 text-sm px-3 py-1 border border-gray-200 rounded">
                               Non disponible
@@ -1,5 +1,8 @@
 import React, { useEffect, useState } from 'react';
 import axios from 'axios';
+import { fetchAllPages } from '../pagination';
+import { televerser } from '../televersement';
+import { telecharger } from '../telechargement';
 
 const FichiersProjet = ({ projetId }) => {
   const [fichiers, setFichiers] = useState([]);
@@ -11,17 +14,17 @@ const FichiersProjet = ({ projetId }) => {
     setLoading(true);
     const token = localStorage.getItem('token');
     try {
-      const res = await axios.get(`http://127.0.0.1:8000/api/fichiers/?projet=${projetId}`, {
+      const data = await fetchAllPages(`http://127.0.0.1:8000/api/fichiers/?projet=${projetId}`, {
         headers: { Authorization: `Bearer ${token}` },
       });
-      console.log('Fichiers reçus:', res.data);
-      res.data.forEach((fichier, index) => {
+      console.log('Fichiers reçus:', data);
+      data.forEach((fichier, index) => {
         console.log(`Fichier ${index + 1}:`, fichier);
         console.log(`  - nom: ${fichier.nom}`);
         console.log(`  - fichier: ${fichier.fichier}`);
         console.log(`  - date_partage: ${fichier.date_partage}`);
       });
-      setFichiers(res.data);
+      setFichiers(data);
     } catch (err) {
       setToast({ message: 'Erreur lors du chargement des fichiers.', type: 'error' });
     } finally {
@@ -38,15 +41,9 @@ const FichiersProjet = ({ projetId }) => {
     e.preventDefault();
     if (!file) return;
     const token = localStorage.getItem('token');
-    const formData = new FormData();
-    formData.append('nom', file.name);
-    formData.append('date_partage', new Date().toISOString().slice(0, 10));
-    formData.append('projet', projetId);
-    formData.append('fichier', file); // Upload réel du fichier
     try {
-      await axios.post('http://127.0.0.1:8000/api/fichiers/', formData, {
-        headers: { Authorization: `Bearer ${token}` },
-      });
+      // Envoi en plusieurs parties : les gros fichiers ne passent pas en une requête
+      await televerser(file, projetId, { headers: { Authorization: `Bearer ${token}` } });
       setToast({ message: 'Fichier ajouté !', type: 'success' });
       setFile(null);
       fetchFichiers();
@@ -55,6 +52,15 @@ const FichiersProjet = ({ projetId }) => {
     }
   };
 
+  const handleDownload = async (id) => {
+    const token = localStorage.getItem('token');
+    try {
+      await telecharger(id, { headers: { Authorization: `Bearer ${token}` } });
+    } catch (err) {
+      setToast({ message: 'Erreur lors du téléchargement.', type: 'error' });
+    }
+  };
+
   const handleDelete = async (id) => {
     if (!window.confirm('Supprimer ce fichier ?')) return;
     const token = localStorage.getItem('token');
@@ -98,16 +104,12 @@ const FichiersProjet = ({ projetId }) => {
                 </div>
                 <div className="flex items-center gap-2">
                   {f.fichier ? (
-                    <a
-                      href={f.fichier}
-                      download
-                      target="_blank"
-                      rel="noopener noreferrer"
+                    <button
+                      onClick={() => handleDownload(f.id)}
                       className="text-blue-600 hover:underline text-xs px-2 py-1 border border-blue-200 rounded"
-                      onClick={() => console.log('Fichier URL:', f.fichier)}
                     >
                       Télécharger
-                    </a>
+                    </button>
                   ) : (
                     <span className="text-gray-400 text-xs px-2 py-1 border border-gray-200 rounded">
                       Fichier non disponible
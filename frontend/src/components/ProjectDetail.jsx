@@ -4,6 +4,7 @@ import axios from 'axios';
 import Navbar from './Navbar';
 import Commentaires from './Commentaires';
 import FichiersProjet from './FichiersProjet';
+import { synchroniser } from '../synchro';
 
 const Toast = ({ message, type, onClose }) => (
   <div className={`fixed top-6 right-6 z-50 px-4 py-2 rounded shadow text-white ${type === 'success' ? 'bg-green-600' : 'bg-red-600'}`}> 
@@ -35,6 +36,7 @@ const ProjectDetail = () => {
   const { id } = useParams();
   const navigate = useNavigate();
   const [project, setProject] = useState(null);
+  const [curseur, setCurseur] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [availableMembers, setAvailableMembers] = useState([]);
@@ -72,6 +74,7 @@ const ProjectDetail = () => {
         });
         console.log('Project data:', response.data);
         setProject(response.data);
+        setCurseur(response.headers['x-curseur-synchro']);
       } catch (err) {
         console.error('Error fetching project:', err);
         setError('Erreur lors du chargement du projet.');
@@ -106,10 +109,9 @@ const ProjectDetail = () => {
         { membre_id: selectedMember },
         { headers: { Authorization: `Bearer ${token}` } }
       );
-      const response = await axios.get(`http://127.0.0.1:8000/api/projets/${id}/`, {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-      setProject(response.data);
+      // Pas de rechargement du projet : le membre ajouté est déjà connu
+      const ajoute = availableMembers.find((m) => String(m.id) === String(selectedMember));
+      setProject((p) => ({ ...p, membres: [...p.membres.filter((m) => m.id !== ajoute.id), ajoute] }));
       setSelectedMember('');
       setToast({ message: 'Membre ajouté avec succès !', type: 'success' });
     } catch (err) {
@@ -125,10 +127,7 @@ const ProjectDetail = () => {
         { membre_id: membreId },
         { headers: { Authorization: `Bearer ${token}` } }
       );
-      const response = await axios.get(`http://127.0.0.1:8000/api/projets/${id}/`, {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-      setProject(response.data);
+      setProject((p) => ({ ...p, membres: p.membres.filter((m) => m.id !== membreId) }));
       setToast({ message: 'Membre retiré avec succès !', type: 'success' });
     } catch (err) {
       setToast({ message: 'Erreur lors du retrait du membre.', type: 'error' });
@@ -146,10 +145,14 @@ const ProjectDetail = () => {
         { statut: statutChoisi },
         { headers: { Authorization: `Bearer ${token}` } }
       );
-      const response = await axios.get(`http://127.0.0.1:8000/api/projets/${id}/`, {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-      setProject(response.data);
+      // Seules les tâches du projet modifiées ou supprimées depuis le dernier chargement
+      const liste = await synchroniser(
+        `http://127.0.0.1:8000/api/taches/?projet_id=${id}`,
+        { elements: project.taches, curseur },
+        { headers: { Authorization: `Bearer ${token}` } }
+      );
+      setProject((p) => ({ ...p, taches: liste.elements }));
+      setCurseur(liste.curseur);
       setToast({ message: `Statut changé à: ${statutChoisi}`, type: 'success' });
     } catch (err) {
       setToast({ message: 'Erreur lors du changement de statut.', type: 'error' });
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 import { useNavigate } from 'react-router-dom';
 import Navbar from './Navbar';
+import { fetchAllPages } from '../pagination';
 
 const Toast = ({ message, type, onClose }) => (
   <div className={`fixed top-6 right-6 z-50 px-4 py-2 rounded shadow text-white ${type === 'success' ? 'bg-green-600' : 'bg-red-600'}`}> 
@@ -39,10 +40,10 @@ const ProjectList = () => {
         });
         setRole(profileRes.data.role);
         // Récupère les projets
-        const response = await axios.get('http://127.0.0.1:8000/api/projets/', {
+        const data = await fetchAllPages('http://127.0.0.1:8000/api/projets/', {
           headers: { Authorization: `Bearer ${token}` },
         });
-        setProjects(response.data);
+        setProjects(data);
       } catch (error) {
         console.error("Erreur lors du chargement des projets ou du profil:", error);
         navigate('/');
@@ -1,14 +1,22 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import axios from 'axios';
 import Navbar from './Navbar';
+import { chargerListe, synchroniser } from '../synchro';
+import { ecouter } from '../evenements';
 
 const TacheList = () => {
   const [taches, setTaches] = useState([]);
+  const [curseur, setCurseur] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [role, setRole] = useState(null);
   const navigate = useNavigate();
+  const liste = useRef({ elements: [], curseur: null });
+
+  useEffect(() => {
+    liste.current = { elements: taches, curseur };
+  }, [taches, curseur]);
 
   useEffect(() => {
     const fetchProfile = async () => {
@@ -31,10 +39,11 @@ const TacheList = () => {
       const token = localStorage.getItem('token');
       if (!token) return;
       try {
-        const response = await axios.get('http://127.0.0.1:8000/api/taches/', {
+        const liste = await chargerListe('http://127.0.0.1:8000/api/taches/', {
           headers: { Authorization: `Bearer ${token}` },
         });
-        setTaches(response.data);
+        setTaches(liste.elements);
+        setCurseur(liste.curseur);
       } catch (err) {
         console.error('Error fetching taches:', err);
         setError('Erreur lors du chargement des tâches.');
@@ -45,6 +54,24 @@ const TacheList = () => {
     fetchTaches();
   }, []);
 
+  // Les changements faits ailleurs sont signalés par le serveur : on ne relit que ceux-là
+  useEffect(() => {
+    const token = localStorage.getItem('token');
+    if (!token) return undefined;
+    const config = { headers: { Authorization: `Bearer ${token}` } };
+    return ecouter(['tache', 'membres', 'resync'], async (type) => {
+      const url = 'http://127.0.0.1:8000/api/taches/';
+      try {
+        // Membres changés ou événements perdus : ?since= ne suffit pas, on recharge tout
+        const nouvelle = type === 'tache' ? await synchroniser(url, liste.current, config) : await chargerListe(url, config);
+        setTaches(nouvelle.elements);
+        setCurseur(nouvelle.curseur);
+      } catch (err) {
+        console.error('Error syncing taches:', err);
+      }
+    }, config);
+  }, []);
+
   const handleChangeStatus = async (taskId) => {
     const statuts = ['En attente', 'En cours', 'Terminé', 'Annulé'];
     const nouveauStatut = prompt('Choisir le nouveau statut:\n1. En attente\n2. En cours\n3. Terminé\n4. Annulé\n\nEntrez le numéro (1-4):');
@@ -56,11 +83,12 @@ const TacheList = () => {
         { statut: statutChoisi },
         { headers: { Authorization: `Bearer ${token}` } }
       );
-      // Recharger les tâches
-      const response = await axios.get('http://127.0.0.1:8000/api/taches/', {
+      // Récupérer seulement les tâches modifiées ou supprimées depuis le dernier chargement
+      const liste = await synchroniser('http://127.0.0.1:8000/api/taches/', { elements: taches, curseur }, {
         headers: { Authorization: `Bearer ${token}` },
       });
-      setTaches(response.data);
+      setTaches(liste.elements);
+      setCurseur(liste.curseur);
     } catch (err) {
       console.error('Error changing status:', err);
     }
@@ -0,0 +1,59 @@
+import axios from 'axios';
+
+// Statut HTTP de l'URL du flux (EventSource ne le donne pas), null si inconnu.
+// La requête est interrompue dès les en-têtes reçus.
+const statutDuFlux = async (url) => {
+  const controleur = new AbortController();
+  try {
+    const response = await fetch(url, { signal: controleur.signal });
+    return response.status;
+  } catch (err) {
+    return null;
+  } finally {
+    controleur.abort();
+  }
+};
+
+// Changements poussés par le serveur (Server-Sent Events, voir api/evenements.py).
+// `types` : événements écoutés ('tache', 'commentaire', 'fichier', 'membres',
+// 'projet', 'resync'). Le lien signé expirant vite, la connexion est rouverte
+// avec un nouveau lien après une erreur, sauf si le serveur répond 501 (flux
+// servi sans ASGI) : réessayer n'y changerait rien. Renvoie la fonction qui
+// arrête l'écoute.
+export const ecouter = (types, onEvenement, config = {}) => {
+  let source = null;
+  let relance = null;
+  let arrete = false;
+
+  const ouvrir = async () => {
+    try {
+      const { data } = await axios.get('http://127.0.0.1:8000/api/evenements/lien/', config);
+      if (arrete) return;
+      source = new EventSource(data.url);
+      types.forEach((type) => source.addEventListener(type, (e) => onEvenement(type, JSON.parse(e.data))));
+      source.onerror = async () => {
+        // CLOSED : le serveur a refusé la connexion (statut autre que 200)
+        const refusee = source.readyState === EventSource.CLOSED;
+        source.close();
+        if (refusee && (await statutDuFlux(data.url)) === 501) {
+          console.warn("Flux d'événements indisponible : le serveur ne tourne pas sous ASGI");
+          return;
+        }
+        relancer();
+      };
+    } catch (err) {
+      relancer();
+    }
+  };
+
+  const relancer = () => {
+    if (!arrete) relance = setTimeout(ouvrir, 5000);
+  };
+
+  ouvrir();
+  return () => {
+    arrete = true;
+    clearTimeout(relance);
+    if (source) source.close();
+  };
+};
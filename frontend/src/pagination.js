@@ -0,0 +1,14 @@
+import axios from 'axios';
+
+// Les listes de l'API sont paginées par curseur : { next, previous, results }.
+// Suit les liens `next` pour récupérer tous les éléments.
+export const fetchAllPages = async (url, config = {}) => {
+  const results = [];
+  let next = url;
+  while (next) {
+    const response = await axios.get(next, config);
+    results.push(...response.data.results);
+    next = response.data.next;
+  }
+  return results;
+};
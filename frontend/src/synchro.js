@@ -0,0 +1,45 @@
+import axios from 'axios';
+import { fetchAllPages } from './pagination';
+
+// Listes synchronisées de façon incrémentale (?since=, voir api/synchro.py) :
+// la liste complète est chargée une fois, puis seules les modifications et les
+// suppressions depuis le dernier curseur sont demandées.
+
+const avecSince = (url, curseur) => `${url}${url.includes('?') ? '&' : '?'}since=${curseur}`;
+
+// Charge toute la liste : { elements, curseur }.
+export const chargerListe = async (url, config = {}) => {
+  let curseur = null;
+  const elements = await fetchAllPages(url, {
+    ...config,
+    transformResponse: [
+      ...axios.defaults.transformResponse,
+      (data, headers) => {
+        curseur = curseur || headers['x-curseur-synchro'];
+        return data;
+      },
+    ],
+  });
+  return { elements, curseur };
+};
+
+// Applique à `elements` les changements survenus depuis `curseur` : { elements, curseur }.
+// Recharge toute la liste si le serveur ne peut plus fournir les changements (410).
+export const synchroniser = async (url, { elements, curseur }, config = {}) => {
+  if (!curseur) return chargerListe(url, config);
+  try {
+    const { data } = await axios.get(avecSince(url, curseur), config);
+    return { elements: fusionner(elements, data.modifies, data.supprimes), curseur: data.curseur };
+  } catch (err) {
+    if (err.response && err.response.status === 410) return chargerListe(url, config);
+    throw err;
+  }
+};
+
+// Remplace les éléments modifiés, ajoute les nouveaux (triés par id) et retire les supprimés.
+export const fusionner = (elements, modifies, supprimes) => {
+  const retires = new Set(supprimes);
+  const parId = new Map(elements.filter((e) => !retires.has(e.id)).map((e) => [e.id, e]));
+  modifies.forEach((e) => parId.set(e.id, { ...parId.get(e.id), ...e }));
+  return Array.from(parId.values()).sort((a, b) => a.id - b.id);
+};
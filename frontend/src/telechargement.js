@@ -0,0 +1,9 @@
+import axios from 'axios';
+
+// Télécharge un fichier partagé : demande un lien signé de courte durée à l'API,
+// puis laisse le navigateur suivre ce lien (pas d'en-tête Authorization à
+// transmettre, reprise des téléchargements interrompus gérée par le navigateur).
+export const telecharger = async (fichierId, config = {}) => {
+  const { data } = await axios.get(`http://127.0.0.1:8000/api/fichiers/${fichierId}/lien/`, config);
+  window.location.assign(data.url);
+};
@@ -0,0 +1,32 @@
+import axios from 'axios';
+
+const API = 'http://127.0.0.1:8000/api/televersements/';
+
+const sha256 = async (blob) => {
+  const empreinte = await crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+  return Array.from(new Uint8Array(empreinte), (o) => o.toString(16).padStart(2, '0')).join('');
+};
+
+// Téléverse `file` dans le projet en plusieurs parties (voir api/televersement.py) :
+// ouverture, envoi des parties manquantes (chacune avec son empreinte SHA-256),
+// puis assemblage. Renvoyer le même `reprise` (id d'un téléversement ouvert)
+// reprend un envoi interrompu. Retourne le Fichier créé.
+export const televerser = async (file, projetId, config = {}, { reprise, onProgress } = {}) => {
+  const { data: televersement } = reprise
+    ? await axios.get(`${API}${reprise}/`, config)
+    : await axios.post(API, { nom: file.name, projet: projetId, taille: file.size }, config);
+  const recues = new Set(televersement.parts_recues);
+  for (let numero = 0; numero < televersement.nombre_parts; numero += 1) {
+    if (!recues.has(numero)) {
+      const debut = numero * televersement.taille_part;
+      const part = file.slice(debut, debut + televersement.taille_part);
+      await axios.put(`${API}${televersement.id}/parts/${numero}/`, part, {
+        ...config,
+        headers: { ...config.headers, 'Content-Type': 'application/octet-stream', 'X-Sha256': await sha256(part) },
+      });
+    }
+    if (onProgress) onProgress((numero + 1) / televersement.nombre_parts, televersement.id);
+  }
+  const { data: fichier } = await axios.post(`${API}${televersement.id}/complete/`, {}, config);
+  return fichier;
+};